@@ -1,20 +1,61 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, font
+import argparse
 import json
-import random
 import os
+import random
 import sys
+import threading
 from typing import List, Dict, Optional
 
+from question_bank import open_bank, format_timings
+from sampler import QuestionSampler
+from adaptive import AdaptiveSampler
+from engine import QuizEngine, HINT_PENALTY
+from timer import CountdownTimer
+from render import WidgetRenderer
+from answer_log import AnswerLogWriter, AnswerLogger, DEFAULT_LOG_DIR
+from image_cache import ImagePrefetcher, PREFETCH_AHEAD, pil_available
+from tracing import instrument
+from hot_reload import BankReloader, FileChanged, FileWatcher, POLL_INTERVAL_MS
+from overlay import Overlay, LoopLagMonitor, PROMPT_TIMEOUT_MS
+from replay import SessionRecorder, DEFAULT_RECORD_DIR
+from leaderboard import LeaderboardWriter, ScoreRecorder, ScoreRow, DEFAULT_DB, format_row
+from applog import RingLogger, LogViewer
+from assets import AssetPack, pack_path_for
+from kiosk import attach_bank
+from latency import LatencyRecorder, DEFAULT_LATENCY_FILE, combined, format_summary, percentiles
+
+
+QUESTION_FILES = ("questions.jsonl", "questions.json")
+TOP_SCORES_SHOWN = 5
+IMAGE_POLL_MS = 20
+
 
 
 class QuizGame:
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None, rebuild_cache: bool = False,
+                 trace_file: Optional[str] = None, adaptive: bool = False,
+                 hot_reload: bool = False, record_dir: Optional[str] = None,
+                 shared_bank: Optional[str] = None):
+        self.seed = seed
+        self.shared_bank = shared_bank
+        self.record_dir = record_dir
+        self.rebuild_cache = rebuild_cache
+        self.adaptive = adaptive
+        self.hot_reload = hot_reload
+        self.trace_file = trace_file
+        self.tracer = None
+        # Поток Tk не пишет в stdout сам: записи выводит фоновый поток журнала
+        self.log = RingLogger()
         try:
             self.root = tk.Tk()
             self.setup_window()
             self.load_questions()
             self.setup_variables()
+            # До создания виджетов: кнопки запоминают уже обернутые методы
+            if trace_file:
+                self.tracer = instrument(self)
             self.setup_styles()
             self.create_widgets()
             self.start_new_game()
@@ -36,42 +77,34 @@ class QuizGame:
 
     def load_questions(self):
         self.questions_file = "questions.json"
+        for candidate in QUESTION_FILES:
+            if os.path.exists(candidate):
+                self.questions_file = candidate
+                break
+
         self.all_questions = []
 
         try:
-            if not os.path.exists(self.questions_file):
-                raise FileNotFoundError(f"Файл '{self.questions_file}' не найден!")
-
-            with open(self.questions_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            if not isinstance(data, list):
-                raise ValueError("Файл должен содержать список вопросов")
-
-            required_fields = {"question", "answers", "correct"}
-            for i, q in enumerate(data):
-                if not isinstance(q, dict):
-                    raise ValueError(f"Вопрос {i + 1} должен быть словарем")
-
-                missing = required_fields - set(q.keys())
-                if missing:
-                    raise ValueError(f"Вопрос {i + 1}: отсутствуют поля {missing}")
-
-                if not isinstance(q["question"], str):
-                    raise ValueError(f"Вопрос {i + 1}: поле 'question' должно быть строкой")
-
-                if not isinstance(q["answers"], list) or len(q["answers"]) != 4:
-                    raise ValueError(f"Вопрос {i + 1}: должно быть 4 варианта ответа")
-
-                if not isinstance(q["correct"], int) or not (0 <= q["correct"] <= 3):
-                    raise ValueError(f"Вопрос {i + 1}: 'correct' должен быть числом от 0 до 3")
-
-            self.all_questions = data
+            if self.shared_bank:
+                # Экран киоска: банк уже загружен хостом (kiosk.py), только подключаемся
+                self.all_questions = attach_bank(self.shared_bank)
+                self.questions_file = self.all_questions.path or self.questions_file
+            else:
+                self.all_questions = open_bank(self.questions_file, self.rebuild_cache)
 
             if len(self.all_questions) < 5:
                 raise ValueError(f"Слишком мало вопросов ({len(self.all_questions)}). Нужно минимум 5")
 
-            print(f"Успешно загружено {len(self.all_questions)} вопросов")
+            self.log.info("bank", f"Успешно загружено {len(self.all_questions)} вопросов")
+            self.log.info("bank", format_timings(self.all_questions))
+
+            self.asset_pack = None
+            try:
+                self.asset_pack = AssetPack.open_if_exists(pack_path_for(self.questions_file))
+            except (OSError, ValueError) as e:
+                self.log.warning("image", f"Пакет изображений не открыт: {e}")
+            if self.asset_pack is not None:
+                self.log.info("image", f"Пакет изображений: {len(self.asset_pack)} миниатюр")
 
         except FileNotFoundError as e:
             self.show_critical_error(str(e) + "\n\nСоздайте файл questions.json с вопросами.")
@@ -83,14 +116,43 @@ class QuizGame:
             self.show_critical_error(f"Неизвестная ошибка при загрузке вопросов:\n{str(e)}")
 
     def setup_variables(self):
-        self.score = 0
-        self.current_question_index = 0
-        self.total_questions = 10
-        self.used_questions_indices = set()
-        self.current_question = None
-        self.time_left = 30
-        self.timer_running = False
-        self.game_active = False
+        if self.adaptive:
+            self.sampler = AdaptiveSampler(self.all_questions, self.seed)
+        else:
+            self.sampler = QuestionSampler(self.all_questions, self.seed)
+        self.used_questions_indices = self.sampler.used
+        self.engine = QuizEngine(self.all_questions, self.sampler, seed=self.seed)
+        if self.adaptive:
+            self.sampler.attach(self.engine)
+        # Каждая игра получает свое зерно: по нему и записанным входам игра повторяется
+        self.session_rng = random.Random(self.seed)
+        self.recorder = None
+        if self.record_dir:
+            self.recorder = SessionRecorder(self.record_dir, self.questions_file,
+                                            self.adaptive).attach(self.engine)
+        self.image_prefetcher = ImagePrefetcher() if pil_available() else None
+        self.image_request = None
+        self.image_poll = None
+        self.timer = CountdownTimer(self.root, self.update_timer)
+        self.pending_load = None
+        self.renderer = WidgetRenderer(self.root)
+        self.answer_log = AnswerLogWriter(DEFAULT_LOG_DIR)
+        AnswerLogger(self.answer_log).attach(self.engine)
+        self.leaderboard_writer = LeaderboardWriter(DEFAULT_DB, top_k=TOP_SCORES_SHOWN)
+        self.score_recorder = ScoreRecorder(self.leaderboard_writer).attach(self.engine)
+        self.latency = LatencyRecorder()
+        self.overlay = Overlay(self.root)
+        self.loop_monitor = LoopLagMonitor(self.root)
+        self.loop_monitor.start()
+
+        self.bank_watcher = None
+        self.bank_reloader = None
+        self.reload_thread = None
+        self.pending_reload = None
+        if self.hot_reload:
+            self.bank_watcher = FileWatcher(self.questions_file)
+            self.bank_reloader = BankReloader(self.questions_file, self.all_questions)
+            self.root.after(POLL_INTERVAL_MS, self.poll_bank_file)
 
         self.colors = {
             "correct": "#4CAF50",
@@ -129,6 +191,9 @@ class QuizGame:
 
             self.create_status_bar()
 
+            self.log_viewer = LogViewer(self.root, self.log)
+            self.root.bind("<F12>", self.log_viewer.toggle)
+
         except Exception as e:
             self.show_error("Ошибка создания интерфейса", str(e))
 
@@ -279,19 +344,7 @@ class QuizGame:
 
     def get_random_question(self) -> Optional[Dict]:
         try:
-            if len(self.used_questions_indices) >= len(self.all_questions):
-                return None
-
-            available = [i for i in range(len(self.all_questions))
-                         if i not in self.used_questions_indices]
-
-            if not available:
-                return None
-
-            idx = random.choice(available)
-            self.used_questions_indices.add(idx)
-
-            return self.all_questions[idx]
+            return self.engine.get_random_question()
 
         except Exception as e:
             self.show_error("Ошибка выбора вопроса", str(e))
@@ -299,151 +352,244 @@ class QuizGame:
 
     def load_question(self):
         try:
-            self.current_question = self.get_random_question()
+            transition = self.engine.load_question()
+        except Exception as e:
+            self.show_error("Ошибка загрузки вопроса", str(e))
+            return
 
-            if not self.current_question:
-                self.end_game("Все вопросы закончились!")
+        self.show_question(transition)
+
+    def load_first_question(self):
+        self.pending_load = None
+        self.load_question()
+
+    def show_question(self, transition):
+        self.renderer.begin("load_question")
+        try:
+            if transition.kind == "finished":
+                self.end_game(transition.message)
                 return
 
-            self.question_text.config(state="normal")
-            self.question_text.delete(1.0, tk.END)
-            self.question_text.insert(1.0, self.current_question["question"])
-            self.question_text.config(state="disabled")
+            question = transition.question
 
-            category = self.current_question.get("category", "Общее")
-            difficulty = self.current_question.get("difficulty", 1)
+            self.renderer.set_text(self.question_text, question["question"])
+
+            category = question.get("category", "Общее")
+            difficulty = question.get("difficulty", 1)
             stars = "★" * difficulty
-            self.category_label.config(
+            self.renderer.update(
+                self.category_label,
                 text=f"Категория: {category} | Сложность: {stars}"
             )
 
-            answers = self.current_question["answers"]
+            answers = question["answers"]
             for i, btn in enumerate(self.answer_buttons):
-                btn.config(text=answers[i],
-                           bg=self.colors["button_bg"],
-                           state="normal")
+                self.renderer.update(btn,
+                                     text=answers[i],
+                                     bg=self.colors["button_bg"],
+                                     state="normal")
 
             self.show_question_image()
+            self.prefetch_images()
 
-            self.skip_button.config(state="normal")
-            self.hint_button.config(state="normal")
-            self.next_button.config(state="disabled")
+            self.renderer.update(self.skip_button, state="normal")
+            self.renderer.update(self.hint_button, state="normal")
+            self.renderer.update(self.next_button, state="disabled")
 
-            self.progress_label.config(
-                text=f"Вопрос {self.current_question_index + 1}/{self.total_questions}"
+            self.renderer.update(
+                self.progress_label,
+                text=f"Вопрос {self.engine.current_question_index + 1}/{self.engine.total_questions}"
             )
 
             self.start_timer()
 
-            self.update_status(f"Вопрос загружен. У вас {self.time_left} секунд!")
+            self.update_status(f"Вопрос загружен. У вас {self.engine.time_left} секунд!")
+            # after_idle встает в очередь за отрисовкой кадра: отсчет идет с момента,
+            # когда вопрос уже на экране
+            self.root.after_idle(self.latency.question_shown, category)
 
         except Exception as e:
             self.show_error("Ошибка загрузки вопроса", str(e))
             self.next_question()
 
     def show_question_image(self):
+        self.cancel_image_poll()
         try:
-            image_path = self.current_question.get("image")
-            self.image_label.config(image="")
-
-            if image_path and os.path.exists(image_path):
-                try:
-                    from PIL import Image, ImageTk
-                    img = Image.open(image_path)
-                    img.thumbnail((400, 300))
-                    photo = ImageTk.PhotoImage(img)
-                    self.image_label.config(image=photo)
-                    self.image_label.image = photo
-
-                except ImportError:
-                    if image_path.lower().endswith(('.gif', '.ppm', '.pgm')):
-                        photo = tk.PhotoImage(file=image_path)
-                        self.image_label.config(image=photo)
-                        self.image_label.image = photo
+            image_path = self.engine.current_question.get("image")
+            self.renderer.update(self.image_label, image="", text="")
+
+            if image_path and self.asset_pack is not None and image_path in self.asset_pack:
+                photo = self.asset_pack.photo(image_path)
+                self.renderer.update(self.image_label, image=photo)
+                self.image_label.image = photo
+
+            elif image_path and os.path.exists(image_path):
+                if self.image_prefetcher is not None:
+                    img = self.image_prefetcher.get(image_path)
+                    if img is not None:
+                        self.apply_question_image(img)
                     else:
-                        self.image_label.config(
-                            text="[Формат не поддерживается. \nУстановите Pillow для PNG/JPG]",
-                            fg="red"
-                        )
+                        # Картинку разбирает рабочий поток; поток Tk ее не ждет
+                        self.renderer.update(self.image_label, text="[Загрузка изображения...]",
+                                             fg="gray")
+                        self.image_request = image_path
+                        self.image_poll = self.root.after(IMAGE_POLL_MS, self.poll_question_image)
+
+                elif image_path.lower().endswith(('.gif', '.ppm', '.pgm')):
+                    photo = tk.PhotoImage(file=image_path)
+                    self.renderer.update(self.image_label, image=photo)
+                    self.image_label.image = photo
+                else:
+                    self.renderer.update(
+                        self.image_label,
+                        text="[Формат не поддерживается. \nУстановите Pillow для PNG/JPG]",
+                        fg="red"
+                    )
 
         except Exception as e:
-            print(f"Ошибка загрузки изображения: {e}")
-            self.image_label.config(
+            self.log.error("image", f"Ошибка загрузки изображения: {e}")
+            self.renderer.update(
+                self.image_label,
                 text=f"[Ошибка: {str(e)[:50]}...]",
                 fg="red"
             )
 
-    def start_timer(self):
-        self.time_left = 30
-        self.timer_running = True
-        self.update_timer()
+    def apply_question_image(self, img):
+        from PIL import ImageTk
+        photo = ImageTk.PhotoImage(img)
+        self.renderer.update(self.image_label, image=photo, text="")
+        self.image_label.image = photo
+
+    def poll_question_image(self):
+        self.image_poll = None
+        image_path = self.image_request
+        if image_path is None:
+            return
+        try:
+            img = self.image_prefetcher.ready(image_path)
+            if img is not None:
+                self.image_request = None
+                self.apply_question_image(img)
+                return
+
+            error = self.image_prefetcher.error(image_path)
+            if error is not None:
+                self.image_request = None
+                self.log.error("image", f"Ошибка загрузки изображения: {error}")
+                self.renderer.update(self.image_label, text=f"[Ошибка: {error[:50]}...]", fg="red")
+                return
 
-    def update_timer(self):
-        if not self.timer_running or not self.game_active:
+            # Вытеснена из кэша до показа - ставим в очередь снова
+            if not self.image_prefetcher.pending(image_path):
+                self.image_prefetcher.prefetch([image_path])
+        except Exception as e:
+            self.image_request = None
+            self.log.error("image", f"Ошибка загрузки изображения: {e}")
             return
+        self.image_poll = self.root.after(IMAGE_POLL_MS, self.poll_question_image)
+
+    def cancel_image_poll(self):
+        self.image_request = None
+        if self.image_poll is not None:
+            self.root.after_cancel(self.image_poll)
+            self.image_poll = None
 
-        self.time_left -= 1
+    def prefetch_images(self):
+        if self.image_prefetcher is None:
+            return
+
+        try:
+            upcoming = self.sampler.peek(PREFETCH_AHEAD)
+            images = (self.all_questions[idx].get("image") for idx in upcoming)
+            # Картинки из пакета уже уменьшены и лежат в памяти
+            if self.asset_pack is not None:
+                images = [image for image in images if image and image not in self.asset_pack]
+            self.image_prefetcher.prefetch(images)
+        except Exception as e:
+            self.log.warning("image", f"Ошибка предзагрузки изображений: {e}")
 
-        if self.time_left > 10:
+    def start_timer(self):
+        self.timer.start(self.engine.time_left)
+
+    def stop_timer(self):
+        self.timer.cancel()
+        if self.pending_load is not None:
+            self.root.after_cancel(self.pending_load)
+            self.pending_load = None
+
+    def update_timer(self, seconds_left: int):
+        self.renderer.begin("update_timer")
+        transition = self.engine.tick(self.engine.time_left - seconds_left)
+        self.show_time_left(seconds_left)
+
+        if transition.kind == "timeout":
+            stats = self.timer.stats()
+            self.log.info("timer", f"дрейф {stats['last_drift_ms']:.1f} мс, "
+                                   f"среднее опоздание {stats['mean_lateness_ms']:.1f} мс, "
+                                   f"максимум {stats['max_lateness_ms']:.1f} мс")
+            self.time_up(transition)
+
+    def show_time_left(self, time_left: int):
+        if time_left > 10:
             color = "darkred"
-        elif self.time_left > 5:
+        elif time_left > 5:
             color = self.colors["timer_warning"]
         else:
             color = self.colors["timer_danger"]
 
-        self.timer_label.config(text=f"⏱ {self.time_left} сек", fg=color)
+        self.renderer.update(self.timer_label, text=f"⏱ {time_left} сек", fg=color)
 
-        if self.time_left <= 0:
-            self.time_up()
-        else:
-            self.root.after(1000, self.update_timer)
-
-    def time_up(self):
-        self.timer_running = False
+    def time_up(self, transition):
+        self.renderer.begin("time_up")
+        self.stop_timer()
         self.update_status("Время вышло!")
 
         for btn in self.answer_buttons:
-            btn.config(state="disabled")
+            self.renderer.update(btn, state="disabled")
 
-        correct_idx = self.current_question["correct"]
-        self.answer_buttons[correct_idx].config(bg=self.colors["correct"])
+        correct_idx = transition.correct_index
+        self.renderer.update(self.answer_buttons[correct_idx], bg=self.colors["correct"])
 
-        self.skip_button.config(state="disabled")
-        self.hint_button.config(state="disabled")
-        self.next_button.config(state="normal")
+        self.renderer.update(self.skip_button, state="disabled")
+        self.renderer.update(self.hint_button, state="disabled")
+        self.renderer.update(self.next_button, state="normal")
 
-        messagebox.showwarning("Время вышло!",
-                               f"Правильный ответ: {self.current_question['answers'][correct_idx]}")
+        self.overlay.show("Время вышло!",
+                          f"Правильный ответ: {transition.question['answers'][correct_idx]}",
+                          "warning", tag="time_up")
 
     def check_answer(self, answer_index):
-        if not self.timer_running:
-            return
-
+        started = self.latency.clock()
         try:
-            self.timer_running = False
-            correct_index = self.current_question["correct"]
+            transition = self.engine.answer(answer_index)
+            if transition.kind == "ignored":
+                return
+
+            self.latency.answer_started(started)
+            self.renderer.begin("check_answer")
+            self.stop_timer()
+            correct_index = transition.correct_index
 
             for btn in self.answer_buttons:
-                btn.config(state="disabled")
+                self.renderer.update(btn, state="disabled")
 
-            if answer_index == correct_index:
-                self.answer_buttons[answer_index].config(bg=self.colors["correct"])
-                self.score += 10 * self.current_question.get("difficulty", 1)
-                self.update_status("Правильно! +{} очков".format(
-                    10 * self.current_question.get("difficulty", 1)))
+            if transition.kind == "correct":
+                self.renderer.update(self.answer_buttons[answer_index], bg=self.colors["correct"])
+                self.update_status("Правильно! +{} очков".format(transition.points))
 
                 self.animate_correct_answer(answer_index)
 
-                self.score_label.config(text=f"Счет: {self.score}")
+                self.renderer.update(self.score_label, text=f"Счет: {transition.score}")
 
             else:
-                self.answer_buttons[answer_index].config(bg=self.colors["incorrect"])
-                self.answer_buttons[correct_index].config(bg=self.colors["correct"])
-                self.update_status(f"Неправильно! Правильный ответ: {self.current_question['answers'][correct_index]}")
+                self.renderer.update(self.answer_buttons[answer_index], bg=self.colors["incorrect"])
+                self.renderer.update(self.answer_buttons[correct_index], bg=self.colors["correct"])
+                self.update_status(f"Неправильно! Правильный ответ: {transition.question['answers'][correct_index]}")
 
-            self.skip_button.config(state="disabled")
-            self.hint_button.config(state="disabled")
-            self.next_button.config(state="normal")
+            self.renderer.update(self.skip_button, state="disabled")
+            self.renderer.update(self.hint_button, state="disabled")
+            self.renderer.update(self.next_button, state="normal")
+            self.root.after_idle(self.latency.answer_done, started)
 
         except Exception as e:
             self.show_error("Ошибка проверки ответа", str(e))
@@ -455,9 +601,9 @@ class QuizGame:
 
             def flash(count=0):
                 if count < 3:
-                    current_color = btn.cget("bg")
+                    current_color = self.renderer.get(btn, "bg")
                     new_color = "yellow" if current_color == original_bg else original_bg
-                    btn.config(bg=new_color)
+                    self.renderer.update(btn, bg=new_color)
                     self.root.after(200, flash, count + 1)
 
             flash()
@@ -465,108 +611,176 @@ class QuizGame:
             pass
 
     def skip_question(self):
-        self.timer_running = False
-        self.time_up()
+        transition = self.engine.skip()
+        if transition.kind != "ignored":
+            self.latency.input()
+            self.time_up(transition)
 
     def show_hint(self):
         try:
-            if not self.current_question:
+            transition = self.engine.hint()
+            if transition.kind == "ignored":
                 return
+            self.latency.input()
 
-            correct_idx = self.current_question["correct"]
-            answers = self.current_question["answers"]
+            self.renderer.begin("show_hint")
 
-            wrong_indices = [i for i in range(4) if i != correct_idx]
-            to_remove = random.sample(wrong_indices, 2)
-
-            for idx in to_remove:
-                self.answer_buttons[idx].config(
+            for idx in transition.removed:
+                self.renderer.update(
+                    self.answer_buttons[idx],
                     text="???",
                     state="disabled",
                     bg="lightgray"
                 )
 
-            self.hint_button.config(state="disabled")
-            self.score = max(0, self.score - 5)
-            self.score_label.config(text=f"Счет: {self.score}")
+            self.renderer.update(self.hint_button, state="disabled")
+            self.renderer.update(self.score_label, text=f"Счет: {transition.score}")
 
-            self.update_status("Использована подсказка! -5 очков")
+            self.update_status(f"Использована подсказка! -{HINT_PENALTY} очков")
 
         except Exception as e:
             self.show_error("Ошибка подсказки", str(e))
 
+    def poll_bank_file(self):
+        if self.reload_thread is None and self.pending_reload is None and self.bank_watcher.changed():
+            self.reload_thread = threading.Thread(target=self.reload_bank, name="bank-reload",
+                                                  daemon=True)
+            self.reload_thread.start()
+
+        # Банк меняется только между вопросами: текущий вопрос доигрывается из старого
+        if self.engine.phase != "question":
+            self.apply_bank_reload()
+        self.root.after(POLL_INTERVAL_MS, self.poll_bank_file)
+
+    def reload_bank(self):
+        try:
+            result = self.bank_reloader.reload()
+        except FileChanged:
+            # Файл еще пишется: следующий опрос увидит новую подпись и повторит
+            result = None
+        except Exception as e:
+            result = e
+        self.pending_reload = result
+        self.reload_thread = None
+
+    def apply_bank_reload(self):
+        result, self.pending_reload = self.pending_reload, None
+        if result is None:
+            return
+
+        if isinstance(result, Exception):
+            self.log.error("reload", f"Банк не обновлен: {result}")
+            self.update_status("Ошибка в обновленном файле вопросов, используется прежний банк")
+            return
+
+        old_bank = self.all_questions
+        self.all_questions = result.bank
+        self.engine.rebind(result.bank, result.remap, result.runs)
+        self.used_questions_indices = self.sampler.used
+        old_bank.close()
+
+        self.log.info("reload", f"{len(result.bank)} вопросов: разобрано {result.parsed}, "
+                                f"без изменений {result.reused}, удалено {result.removed} "
+                                f"за {result.elapsed * 1000:.1f} мс")
+        self.update_status(f"Банк вопросов обновлен: {len(result.bank)} вопросов")
+
     def next_question(self):
-        self.current_question_index += 1
+        self.stop_timer()
+        self.overlay.dismiss("time_up")
+        self.apply_bank_reload()
+        try:
+            transition = self.engine.next_question()
+        except Exception as e:
+            self.show_error("Ошибка загрузки вопроса", str(e))
+            return
 
-        if self.current_question_index >= self.total_questions:
-            self.end_game()
-        else:
-            self.load_question()
+        self.show_question(transition)
 
     def start_new_game(self):
         try:
-            self.score = 0
-            self.current_question_index = 0
-            self.used_questions_indices.clear()
-            self.game_active = True
+            self.renderer.begin("start_new_game")
+            self.stop_timer()
+            self.overlay.dismiss()
+            self.cancel_image_poll()
+            self.engine.start(self.session_rng.getrandbits(32))
+            self.latency.start_game()
 
-            self.score_label.config(text="Счет: 0")
-            self.progress_label.config(text="Вопрос 0/10")
-            self.timer_label.config(text="⏱ 30 сек", fg="darkred")
-            self.category_label.config(text="")
+            self.renderer.update(self.score_label, text="Счет: 0")
+            self.renderer.update(self.progress_label, text=f"Вопрос 0/{self.engine.total_questions}")
+            self.renderer.update(self.timer_label, text=f"⏱ {self.engine.question_time} сек", fg="darkred")
+            self.renderer.update(self.category_label, text="")
 
-            self.question_text.config(state="normal")
-            self.question_text.delete(1.0, tk.END)
-            self.question_text.insert(1.0, "Готовьтесь к первому вопросу...")
-            self.question_text.config(state="disabled")
+            self.renderer.set_text(self.question_text, "Готовьтесь к первому вопросу...")
 
             for btn in self.answer_buttons:
-                btn.config(text="", bg=self.colors["button_bg"], state="disabled")
+                self.renderer.update(btn, text="", bg=self.colors["button_bg"], state="disabled")
 
-            self.image_label.config(image="")
+            self.renderer.update(self.image_label, image="")
 
-            self.skip_button.config(state="disabled")
-            self.hint_button.config(state="disabled")
-            self.next_button.config(state="disabled")
+            self.renderer.update(self.skip_button, state="disabled")
+            self.renderer.update(self.hint_button, state="disabled")
+            self.renderer.update(self.next_button, state="disabled")
 
             self.update_status("Новая игра началась! Первый вопрос через 3 секунды...")
+            self.prefetch_images()
 
-            self.root.after(3000, self.load_question)
+            self.pending_load = self.root.after(3000, self.load_first_question)
 
         except Exception as e:
             self.show_error("Ошибка начала новой игры", str(e))
 
     def end_game(self, message=None):
-        self.game_active = False
-        self.timer_running = False
-
-        if not message:
-            message = f"Игра завершена!\nВаш итоговый счет: {self.score}"
-
-        result_text = f"""
-        {message}
-
-        Правильных ответов: {self.score // 10}
-        Всего вопросов: {self.total_questions}
-
-        Спасибо за игру!
-        """
-
-        messagebox.showinfo("Игра завершена", result_text)
-
-        if messagebox.askyesno("Новая игра?", "Хотите сыграть еще раз?"):
-            self.start_new_game()
+        self.stop_timer()
+        if self.engine.phase != "finished":
+            message = self.engine.finish(message).message
+        self.latency.end_game()
+
+        result_text = (f"{message}\n\n"
+                       f"Правильных ответов: {self.engine.correct_count}\n"
+                       f"Всего вопросов: {self.engine.total_questions}\n\n"
+                       f"{self.format_latency()}"
+                       f"{self.format_top_scores()}"
+                       f"Спасибо за игру!\n\n")
+
+        # Без ответа панель закрывается сама, кнопка новой игры остается в окне
+        self.overlay.show("Игра завершена", result_text + "Хотите сыграть еще раз?",
+                          tag="end_game", buttons=[("Новая игра", self.start_new_game),
+                                                   ("Закрыть", None)],
+                          timeout_ms=PROMPT_TIMEOUT_MS)
+
+    def format_latency(self) -> str:
+        text = format_summary({metric: percentiles(hist)
+                               for metric, hist in combined(self.latency.game).items()})
+        if not text:
+            return ""
+        return "Время реакции:\n" + text + "\n\n"
+
+    def format_top_scores(self) -> str:
+        # Лучшие результаты читает поток записи; результат этой игры может быть
+        # еще в очереди, поэтому добавляем его сами
+        rows = list(self.leaderboard_writer.top_scores)
+        result = self.score_recorder.last_result
+        if result is not None and all(row.played_at != result.played_at for row in rows):
+            rows.append(ScoreRow(result.player, result.score, result.correct,
+                                 result.questions, result.played_at))
+            rows.sort(key=lambda row: (-row.score, row.played_at))
+            rows = rows[:TOP_SCORES_SHOWN]
+        if not rows:
+            return ""
+        lines = [format_row(place, row) for place, row in enumerate(rows, 1)]
+        return "Лучшие результаты:\n" + "\n".join(lines) + "\n\n"
 
     def update_status(self, message: str):
-        self.status_label.config(text=message)
-        print(f"[STATUS] {message}")
+        self.renderer.update(self.status_label, text=message)
+        self.log.info("status", message)
 
     def show_error(self, title: str, message: str):
-        print(f"[ERROR] {title}: {message}")
-        messagebox.showerror(title, message)
+        self.log.error("ui", f"{title}: {message}")
+        self.overlay.show(title, message, "error", tag="error", timeout_ms=PROMPT_TIMEOUT_MS)
 
     def show_critical_error(self, message: str):
-        print(f"[CRITICAL ERROR] {message}")
+        self.log.critical("ui", message)
+        self.log.close()
         messagebox.showerror("Критическая ошибка",
                              f"{message}\n\nПрограмма будет закрыта.")
 
@@ -579,6 +793,30 @@ class QuizGame:
 
     def on_closing(self):
         if messagebox.askokcancel("Выход", "Вы уверены, что хотите выйти?"):
+            if self.image_prefetcher is not None:
+                self.image_prefetcher.close()
+                self.log.info("stats", f"Кэш изображений: {self.image_prefetcher.cache.stats()}")
+            if self.asset_pack is not None:
+                self.log.info("stats", f"Пакет изображений: показано {self.asset_pack.hits}")
+                self.asset_pack.close()
+            self.log.info("stats", f"Отрисовка: {self.renderer.stats()}")
+            self.log.info("stats", f"Цикл событий: {self.loop_monitor.stats()}")
+            self.answer_log.close()
+            self.leaderboard_writer.close()
+            try:
+                sessions = self.latency.save(DEFAULT_LATENCY_FILE)
+                self.log.info("stats", f"Задержки записаны в '{DEFAULT_LATENCY_FILE}' (сессий: {sessions})")
+            except (OSError, ValueError) as e:
+                self.log.error("stats", f"Задержки не записаны: {e}")
+            if self.recorder is not None:
+                self.recorder.close()
+                self.log.info("stats", f"Записано сессий: {self.recorder.sessions} в '{self.record_dir}'")
+            if self.tracer is not None:
+                self.tracer.save(self.trace_file)
+                self.log.info("stats", f"Трасса записана в '{self.trace_file}' "
+                                       f"({len(self.tracer.events)} событий)")
+            self.log.info("stats", f"Журнал: {self.log.stats()}")
+            self.log.close()
             self.root.destroy()
 
     def run(self):
@@ -588,11 +826,34 @@ class QuizGame:
             self.show_critical_error(f"Критическая ошибка во время выполнения:\n{str(e)}")
 
 
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Умный Квиз")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="зерно генератора для воспроизводимой игры")
+    parser.add_argument("--rebuild-cache", action="store_true",
+                        help="пересобрать скомпилированный кэш банка вопросов")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="записать трассу событий для chrome://tracing или Perfetto")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="подбирать сложность вопросов под уровень игрока")
+    parser.add_argument("--hot-reload", action="store_true",
+                        help="подхватывать изменения файла вопросов без перезапуска")
+    parser.add_argument("--shared-bank", metavar="NAME", default=None,
+                        help="подключиться к банку в разделяемой памяти (запускается из kiosk.py)")
+    parser.add_argument("--record", metavar="DIR", nargs="?", const=DEFAULT_RECORD_DIR, default=None,
+                        help="записывать сессии для воспроизведения (replay.py)")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
     print("Запуск Квиз-игры")
+    args = parse_args()
 
     try:
-        app = QuizGame()
+        app = QuizGame(seed=args.seed, rebuild_cache=args.rebuild_cache,
+                       trace_file=args.trace, adaptive=args.adaptive,
+                       hot_reload=args.hot_reload and not args.shared_bank,
+                       record_dir=args.record, shared_bank=args.shared_bank)
         app.run()
 
     except Exception as e:
@@ -0,0 +1,208 @@
+import math
+import random
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from hot_reload import OLD, shifted
+from sampler import LazyPermutation, QuestionSampler
+
+
+RATING_BASE = 1500.0
+RATING_PER_LEVEL = 200.0
+K_MAX = 160.0
+TARGET_SUCCESS = 0.7
+
+
+def expected_score(ability: float, rating: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((rating - ability) / 400.0))
+
+
+class AbilityEstimate:
+    # Рейтинг игрока по Эло: вопрос уровня d - "соперник" с рейтингом
+    # RATING_BASE + (d - средний уровень) * RATING_PER_LEVEL. Шаг K уменьшается
+    # с числом ответов, чтобы первые вопросы быстро находили уровень игрока
+    def __init__(self, ability: float = RATING_BASE):
+        self.initial = ability
+        self.ability = ability
+        self.answered = 0
+
+    def reset(self):
+        self.ability = self.initial
+        self.answered = 0
+
+    def update(self, rating: float, correct: bool):
+        k = K_MAX / math.sqrt(1 + self.answered)
+        self.ability += k * (float(correct) - expected_score(self.ability, rating))
+        self.answered += 1
+
+    def target_rating(self, success: float = TARGET_SUCCESS) -> float:
+        # Рейтинг вопроса, на который игрок отвечает верно с вероятностью success
+        return self.ability - 400.0 * math.log10(success / (1.0 - success))
+
+
+class AdaptiveSampler(QuestionSampler):
+    # Вопросы разложены по уровням сложности один раз при создании; выбор -
+    # bisect по отсортированным рейтингам уровней и O(1) вытягивание из пула уровня.
+    # Общее множество used по-прежнему гарантирует отсутствие повторов
+    def __init__(self, bank, seed: Optional[int] = None,
+                 estimate: Optional[AbilityEstimate] = None):
+        self.estimate = estimate or AbilityEstimate()
+        self._index_levels(bank)
+        super().__init__(bank, seed)
+
+    def _index_levels(self, bank):
+        self._level_items: Dict[int, array] = {}
+        for idx in range(len(bank)):
+            self._add_to_level(bank, idx)
+        self._rate_levels()
+
+    def _add_to_level(self, bank, idx: int):
+        difficulty = bank.difficulty(idx)
+        if not isinstance(difficulty, int):
+            difficulty = 1
+        items = self._level_items.get(difficulty)
+        if items is None:
+            items = self._level_items[difficulty] = array("I")
+        items.append(idx)
+
+    def _remap_levels(self, bank, runs):
+        # Номера в уровнях отсортированы, поэтому перенесенный отрезок старого банка -
+        # срез каждого уровня со сдвигом; уровень смотрится только у новых вопросов
+        old_items = self._level_items
+        self._level_items = {}
+        for source, start, stop, position in runs:
+            if source != OLD:
+                for idx in range(position, position + stop - start):
+                    self._add_to_level(bank, idx)
+                continue
+            for level, items in old_items.items():
+                lo = bisect_left(items, start)
+                hi = bisect_left(items, stop, lo)
+                if lo < hi:
+                    self._level_items.setdefault(level, array("I")).extend(
+                        shifted(items[lo:hi], position - start))
+        self._rate_levels()
+
+    def _rate_levels(self):
+        self.levels: List[int] = sorted(self._level_items)
+        middle = (self.levels[0] + self.levels[-1]) / 2 if self.levels else 0
+        self.ratings: List[float] = [RATING_BASE + (level - middle) * RATING_PER_LEVEL
+                                     for level in self.levels]
+
+    def reset(self, seed: Optional[int] = None):
+        super().reset(seed)
+        self.estimate.reset()
+        # У каждого уровня свой ГПСЧ: peek() тянет вопросы только из пула
+        # целевого уровня и не сдвигает порядок остальных, поэтому игра
+        # с предзагрузкой и ее повтор без peek() выбирают одни и те же вопросы
+        self._level_seed = self.rng.getrandbits(64)
+        self._level_rngs: Dict[int, random.Random] = {}
+        self._level_pools: Dict[int, LazyPermutation] = {}
+        self._level_lookahead: Dict[int, Deque[int]] = {}
+
+    def rebind(self, bank, remap, runs=None):
+        if runs is None:
+            self._index_levels(bank)
+        else:
+            self._remap_levels(bank, runs)
+        super().rebind(bank, remap, runs)
+        self._level_pools = {}
+        self._level_lookahead = {}
+
+    def rating(self, difficulty: int) -> float:
+        pos = bisect_left(self.levels, difficulty)
+        if pos < len(self.levels) and self.levels[pos] == difficulty:
+            return self.ratings[pos]
+        return RATING_BASE
+
+    def record(self, question_id: Optional[int], correct: bool):
+        if question_id is None:
+            return
+        difficulty = self.bank.difficulty(question_id)
+        self.estimate.update(self.rating(difficulty if isinstance(difficulty, int) else 1), correct)
+
+    def target_level(self) -> int:
+        # Ближайший к целевому рейтингу уровень; при равенстве - более легкий
+        target = self.estimate.target_rating()
+        pos = bisect_left(self.ratings, target)
+        if pos == len(self.ratings) or (pos > 0 and target - self.ratings[pos - 1]
+                                        <= self.ratings[pos] - target):
+            pos -= 1
+        return pos
+
+    def _level_order(self):
+        # Целевой уровень, затем соседние попеременно вниз и вверх
+        pos = self.target_level()
+        yield pos
+        for step in range(1, len(self.levels)):
+            if pos - step >= 0:
+                yield pos - step
+            if pos + step < len(self.levels):
+                yield pos + step
+
+    def _level_pool(self, level: int) -> LazyPermutation:
+        pool = self._level_pools.get(level)
+        if pool is None:
+            items = self._level_items[level]
+            rng = self._level_rngs.get(level)
+            if rng is None:
+                rng = self._level_rngs[level] = random.Random(self._level_seed + level)
+            pool = self._level_pools[level] = LazyPermutation(len(items), rng, items)
+        return pool
+
+    def _draw_level(self, pos: int) -> Optional[int]:
+        level = self.levels[pos]
+        lookahead = self._level_lookahead.get(level)
+        while lookahead:
+            idx = lookahead.popleft()
+            if idx not in self.used:
+                return idx
+
+        pool = self._level_pool(level)
+        while True:
+            idx = pool.draw()
+            if idx is None or idx not in self.used:
+                return idx
+
+    def draw(self, category: Optional[str] = None,
+             difficulty: Optional[int] = None) -> Optional[int]:
+        if category is not None or difficulty is not None:
+            return super().draw(category, difficulty)
+        if not self.levels:
+            return None
+
+        for pos in self._level_order():
+            idx = self._draw_level(pos)
+            if idx is not None:
+                self.used.add(idx)
+                return idx
+        return None
+
+    def peek(self, count: int):
+        # Предсказание по текущему рейтингу: после ответа уровень может смениться,
+        # тогда заглянутые вопросы просто дождутся своей очереди в этом уровне
+        if not self.levels:
+            return []
+        level = self.levels[self.target_level()]
+        lookahead = self._level_lookahead.setdefault(level, deque())
+        pool = self._level_pool(level)
+        while len(lookahead) < count:
+            idx = pool.draw()
+            if idx is None:
+                break
+            if idx not in self.used:
+                lookahead.append(idx)
+        return [idx for idx in lookahead if idx not in self.used][:count]
+
+    def attach(self, engine):
+        engine.listeners.append(self.on_transition)
+        return self
+
+    def on_transition(self, transition):
+        kind = transition.kind
+        if kind in ("correct", "incorrect"):
+            self.record(transition.question_id, kind == "correct")
+        elif kind in ("timeout", "skip"):
+            self.record(transition.question_id, False)
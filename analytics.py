@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+from answer_log import (LOG_HEADER, LOG_MAGIC, LOG_VERSION, RECORD, EVENT_ANSWER, EVENT_SKIP,
+                        EVENT_HINT, EVENT_TIMEOUT, question_key, segment_paths)
+from question_bank import CompiledQuestionBank, open_bank, read_json_questions, write_jsonl
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+MIN_ATTEMPTS = 20
+CHUNK_RECORDS = 4 * 1024 * 1024
+
+
+def record_dtype():
+    dtype = np.dtype([
+        ("session", "V16"),
+        ("question", "<u4"),
+        ("key", "<u8"),
+        ("event", "u1"),
+        ("choice", "i1"),
+        ("correct", "u1"),
+        ("pad", "u1"),
+        ("response_us", "<u4"),
+        ("timestamp", "<f8"),
+    ])
+    assert dtype.itemsize == RECORD.size
+    return dtype
+
+
+def bank_keys(bank):
+    return np.fromiter((question_key(bank[i]) for i in range(len(bank))),
+                       dtype=np.uint64, count=len(bank))
+
+
+class KeyIndex:
+    # Ключ содержимого -> номер вопроса в текущем банке через бинарный поиск
+    def __init__(self, keys):
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted = keys[self.order]
+
+    def lookup(self, keys):
+        if not len(self.sorted):
+            return np.zeros(len(keys), dtype=np.intp), np.zeros(len(keys), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.sorted, keys), len(self.sorted) - 1)
+        return self.order[pos], self.sorted[pos] == keys
+
+
+class QuestionStats:
+    def __init__(self, n_questions: int):
+        self.n = n_questions
+        self.answers = np.zeros(n_questions, dtype=np.int64)
+        self.correct = np.zeros(n_questions, dtype=np.int64)
+        self.skips = np.zeros(n_questions, dtype=np.int64)
+        self.hints = np.zeros(n_questions, dtype=np.int64)
+        self.timeouts = np.zeros(n_questions, dtype=np.int64)
+        self.response_us = np.zeros(n_questions, dtype=np.float64)
+        self.choices = np.zeros((n_questions, 4), dtype=np.int64)
+        self.records = 0
+
+    def add(self, records, question):
+        # question - номер вопроса в банке для каждой записи
+        self.records += len(records)
+        question = question.astype(np.intp)
+        event = records["event"]
+        n = self.n
+
+        answered = event == EVENT_ANSWER
+        q_answered = question[answered]
+        self.answers += np.bincount(q_answered, minlength=n)
+        self.correct += np.bincount(q_answered, weights=records["correct"][answered] == 1,
+                                    minlength=n).astype(np.int64)
+        self.response_us += np.bincount(q_answered, weights=records["response_us"][answered],
+                                        minlength=n)
+
+        choice = records["choice"][answered].astype(np.intp)
+        valid = (choice >= 0) & (choice < 4)
+        self.choices += np.bincount(q_answered[valid] * 4 + choice[valid],
+                                    minlength=4 * n).reshape(n, 4)
+
+        self.skips += np.bincount(question[event == EVENT_SKIP], minlength=n)
+        self.hints += np.bincount(question[event == EVENT_HINT], minlength=n)
+        self.timeouts += np.bincount(question[event == EVENT_TIMEOUT], minlength=n)
+
+    @property
+    def attempts(self):
+        return self.answers + self.skips + self.timeouts
+
+    def accuracy(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.answers > 0, self.correct / self.answers, np.nan)
+
+    def mean_response_ms(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.answers > 0, self.response_us / self.answers / 1000, np.nan)
+
+    def failure_rate(self):
+        attempts = self.attempts
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(attempts > 0, (attempts - self.correct) / attempts, np.nan)
+
+    def pick_rates(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.choices / self.answers[:, None]
+
+
+def read_stats(directory: str, keys) -> QuestionStats:
+    # Записи сопоставляются с банком по ключу содержимого, поэтому вставки и
+    # удаления вопросов не сдвигают статистику; удаленные и измененные вопросы
+    # отбрасываются
+    dtype = record_dtype()
+    stats = QuestionStats(len(keys))
+    index = KeyIndex(keys)
+
+    for path in segment_paths(directory):
+        size = os.path.getsize(path)
+        if size < LOG_HEADER.size:
+            continue
+        with open(path, "rb") as f:
+            magic, version, record_size = LOG_HEADER.unpack(f.read(LOG_HEADER.size))
+        if magic != LOG_MAGIC or version != LOG_VERSION or record_size != RECORD.size:
+            raise ValueError(f"Файл '{path}' не является журналом ответов")
+
+        count = (size - LOG_HEADER.size) // RECORD.size
+        if not count:
+            continue
+        records = np.memmap(path, dtype=dtype, mode="r", offset=LOG_HEADER.size, shape=(count,))
+        for start in range(0, count, CHUNK_RECORDS):
+            chunk = records[start:start + CHUNK_RECORDS]
+            question, found = index.lookup(chunk["key"])
+            stats.add(chunk[found], question[found])
+        del records
+
+    return stats
+
+
+def recalibrate(stats: QuestionStats, current, levels: int, min_attempts: int = MIN_ATTEMPTS):
+    # Доля неудач (ошибка, пропуск, тайм-аут) делится на равные интервалы по числу уровней
+    failure = np.nan_to_num(stats.failure_rate(), nan=0.0)
+    proposed = np.clip(1 + np.floor(failure * levels), 1, levels).astype(np.int64)
+    return np.where(stats.attempts >= min_attempts, proposed, current)
+
+
+def write_report(path: str, stats: QuestionStats, current, proposed):
+    pick = stats.pick_rates()
+    columns = np.column_stack([
+        np.arange(stats.n), stats.attempts, stats.answers, stats.accuracy(),
+        stats.mean_response_ms(), stats.skips, stats.hints, stats.timeouts,
+        pick, current, proposed,
+    ])
+    header = ("question_id,attempts,answers,accuracy,mean_response_ms,skips,hints,timeouts,"
+              "pick_a,pick_b,pick_c,pick_d,difficulty,proposed_difficulty")
+    np.savetxt(path, columns, delimiter=",", header=header, comments="",
+               fmt=["%d", "%d", "%d", "%.4f", "%.1f", "%d", "%d", "%d",
+                    "%.4f", "%.4f", "%.4f", "%.4f", "%d", "%d"])
+
+
+def source_questions(bank):
+    # Скомпилированный банк дописывает в словарь поля по умолчанию (image, category);
+    # для записи берем вопросы в том виде, в каком они лежат в файле
+    if isinstance(bank, CompiledQuestionBank) and bank.path:
+        return read_json_questions(bank.path)
+    return bank
+
+
+def recalibrated(bank, proposed):
+    source = source_questions(bank)
+    for i in range(len(bank)):
+        q = source[i]
+        difficulty = int(proposed[i])
+        # Без изменений вопрос остается байт в байт, в том числе без поля difficulty
+        if q.get("difficulty", 1) == difficulty:
+            yield q
+        else:
+            yield dict(q, difficulty=difficulty)
+
+
+def write_bank(bank, proposed, path: str):
+    questions = recalibrated(bank, proposed)
+    if path.lower().endswith(".jsonl"):
+        write_jsonl(questions, path)
+    else:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(questions), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Аналитика ответов и пересчет сложности вопросов")
+    parser.add_argument("questions", help="банк вопросов (.json или .jsonl)")
+    parser.add_argument("logs", help="каталог журнала ответов")
+    parser.add_argument("--output", help="куда записать банк с новой сложностью")
+    parser.add_argument("--report", help="CSV-отчет по каждому вопросу")
+    parser.add_argument("--levels", type=int, default=0,
+                        help="число уровней сложности (по умолчанию - максимум в банке)")
+    parser.add_argument("--min-attempts", type=int, default=MIN_ATTEMPTS,
+                        help="меньше попыток - сложность не меняется")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    if np is None:
+        print("Для аналитики нужен NumPy: pip install numpy")
+        return 1
+
+    args = parse_args(argv)
+    bank = open_bank(args.questions)
+    current = np.array([bank.difficulty(i) for i in range(len(bank))], dtype=np.int64)
+    levels = args.levels or max(3, int(current.max(initial=1)))
+
+    start = time.perf_counter()
+    stats = read_stats(args.logs, bank_keys(bank))
+    proposed = recalibrate(stats, current, levels, args.min_attempts)
+    elapsed = time.perf_counter() - start
+
+    changed = int(np.count_nonzero(proposed != current))
+    print(f"Обработано {stats.records:,} событий за {elapsed:.2f} с, "
+          f"вопросов с достаточной статистикой: {int(np.count_nonzero(stats.attempts >= args.min_attempts))}, "
+          f"сложность изменится у {changed}")
+
+    if args.report:
+        write_report(args.report, stats, current, proposed)
+        print(f"Отчет записан в '{args.report}'")
+    if args.output:
+        write_bank(bank, proposed, args.output)
+        print(f"Банк с новой сложностью записан в '{args.output}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,225 @@
+import glob
+import hashlib
+import os
+import queue
+import struct
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+
+LOG_MAGIC = b"QLOG"
+LOG_VERSION = 1
+LOG_HEADER = struct.Struct("<4sHH")
+# Кроме номера в банке пишется ключ содержимого вопроса: номер меняется при
+# горячей перезагрузке, а ключ - только при правке самого вопроса
+RECORD = struct.Struct("<16sIQBbBxId")
+
+EVENT_ANSWER = 0
+EVENT_SKIP = 1
+EVENT_HINT = 2
+EVENT_TIMEOUT = 3
+EVENT_NAMES = {EVENT_ANSWER: "answer", EVENT_SKIP: "skip", EVENT_HINT: "hint", EVENT_TIMEOUT: "timeout"}
+
+NO_QUESTION = 0xFFFFFFFF
+NO_QUESTION_KEY = 0
+NO_CHOICE = -1
+MAX_CHOICE = 127
+CORRECT_UNKNOWN = 255
+
+DEFAULT_LOG_DIR = "answer_logs"
+FSYNC_INTERVAL = 1.0
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+BATCH_RECORDS = 4096
+
+
+class AnswerRecord(NamedTuple):
+    session_id: bytes
+    question_id: int
+    question_key: int
+    event: int
+    choice: int
+    correct: int
+    response_time_us: int
+    timestamp: float
+
+
+def question_key(question: Dict) -> int:
+    # 64 бита хеша текста вопроса и ответов; 0 зарезервирован под "неизвестно"
+    h = hashlib.blake2b(digest_size=8)
+    h.update(str(question.get("question", "")).encode("utf-8", "surrogatepass"))
+    for answer in question.get("answers", ()):
+        h.update(b"\x1f")
+        h.update(str(answer).encode("utf-8", "surrogatepass"))
+    return int.from_bytes(h.digest(), "little") or 1
+
+
+def segment_paths(directory: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(directory, "answers-*.log")))
+
+
+class AnswerLogWriter:
+    def __init__(self, directory: str = DEFAULT_LOG_DIR, fsync_interval: float = FSYNC_INTERVAL,
+                 max_segment_bytes: int = MAX_SEGMENT_BYTES):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.max_segment_bytes = max_segment_bytes
+        self.records_written = 0
+        self.invalid_choices = 0
+        self.fsyncs = 0
+
+        os.makedirs(directory, exist_ok=True)
+        existing = segment_paths(directory)
+        # Каждый запуск пишет в новый сегмент, чтобы оборванный хвост старого не сбил выравнивание
+        self._segment_no = int(os.path.basename(existing[-1])[8:-4]) + 1 if existing else 0
+        self._file = None
+        self._open_segment()
+
+        self._queue: "queue.SimpleQueue[Optional[bytes]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._worker, name="answer-log", daemon=True)
+        self._thread.start()
+
+    def log(self, session_id: bytes, question_id: Optional[int], event: int,
+            choice: int = NO_CHOICE, correct: int = CORRECT_UNKNOWN,
+            response_time: float = 0.0, timestamp: Optional[float] = None,
+            key: int = NO_QUESTION_KEY):
+        # Номер ответа вне диапазона поля пишется как "нет ответа", а не роняет игру
+        if not isinstance(choice, int) or not NO_CHOICE <= choice <= MAX_CHOICE:
+            self.invalid_choices += 1
+            choice = NO_CHOICE
+        self._queue.put(RECORD.pack(
+            session_id,
+            NO_QUESTION if question_id is None else question_id,
+            key,
+            event,
+            choice,
+            correct,
+            min(0xFFFFFFFF, max(0, int(response_time * 1_000_000))),
+            time.time() if timestamp is None else timestamp,
+        ))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+        while True:
+            path = os.path.join(self.directory, f"answers-{self._segment_no:06d}.log")
+            try:
+                self._file = open(path, "xb")
+                break
+            except FileExistsError:
+                # Номер уже занял другой процесс с тем же каталогом (экран киоска)
+                self._segment_no += 1
+        self._file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, RECORD.size))
+
+    def _worker(self):
+        batch = bytearray()
+        last_fsync = time.monotonic()
+        dirty = False
+        running = True
+
+        while running:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                item = b""
+
+            while item is not None:
+                batch += item
+                if len(batch) >= BATCH_RECORDS * RECORD.size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if item is None:
+                running = False
+
+            if batch:
+                self._write(batch)
+                batch.clear()
+                dirty = True
+
+            now = time.monotonic()
+            if dirty and (not running or now - last_fsync >= self.fsync_interval):
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self.fsyncs += 1
+                last_fsync = now
+                dirty = False
+
+        self._file.close()
+
+    def _write(self, batch: bytearray):
+        if self._file.tell() + len(batch) > self.max_segment_bytes:
+            self._segment_no += 1
+            self._open_segment()
+        self._file.write(batch)
+        self.records_written += len(batch) // RECORD.size
+
+
+class AnswerLogger:
+    # Переводит переходы QuizEngine в записи журнала ответов
+    def __init__(self, writer: AnswerLogWriter):
+        self.writer = writer
+        self.session_id = uuid.uuid4().bytes
+
+    def attach(self, engine):
+        engine.listeners.append(self.on_transition)
+        return self
+
+    def on_transition(self, transition):
+        kind = transition.kind
+        if kind == "start":
+            self.session_id = uuid.uuid4().bytes
+        elif kind in ("correct", "incorrect"):
+            self.writer.log(self.session_id, transition.question_id, EVENT_ANSWER,
+                            transition.answer_index, int(kind == "correct"), transition.response_time,
+                            key=self._key(transition))
+        elif kind == "skip":
+            self.writer.log(self.session_id, transition.question_id, EVENT_SKIP,
+                            response_time=transition.response_time, key=self._key(transition))
+        elif kind == "hint":
+            self.writer.log(self.session_id, transition.question_id, EVENT_HINT,
+                            response_time=transition.response_time, key=self._key(transition))
+        elif kind == "timeout":
+            self.writer.log(self.session_id, transition.question_id, EVENT_TIMEOUT, correct=0,
+                            response_time=transition.response_time, key=self._key(transition))
+
+    def _key(self, transition) -> int:
+        question = transition.question
+        return question_key(question) if question is not None else NO_QUESTION_KEY
+
+
+def read_segment_bytes(path: str, chunk_records: int = BATCH_RECORDS * 16) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        header = f.read(LOG_HEADER.size)
+        if len(header) < LOG_HEADER.size:
+            return
+        magic, version, record_size = LOG_HEADER.unpack(header)
+        if magic != LOG_MAGIC or version != LOG_VERSION or record_size != RECORD.size:
+            raise ValueError(f"Файл '{path}' не является журналом ответов")
+
+        chunk_size = chunk_records * RECORD.size
+        while True:
+            chunk = f.read(chunk_size)
+            # Недописанная при сбое последняя запись отбрасывается
+            usable = len(chunk) - len(chunk) % RECORD.size
+            if usable:
+                yield chunk[:usable]
+            if len(chunk) < chunk_size:
+                return
+
+
+def read_records(directory: str) -> Iterator[AnswerRecord]:
+    for path in segment_paths(directory):
+        for chunk in read_segment_bytes(path):
+            for fields in RECORD.iter_unpack(chunk):
+                yield AnswerRecord(*fields)
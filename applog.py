@@ -0,0 +1,218 @@
+import sys
+import threading
+import time
+import tkinter as tk
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, TextIO
+
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+CRITICAL = 50
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR", CRITICAL: "CRITICAL"}
+
+RING_CAPACITY = 2_000
+MAX_PENDING = 10_000
+FLUSH_INTERVAL = 0.25
+VIEWER_REFRESH_MS = 500
+
+
+class LogRecord(NamedTuple):
+    timestamp: float
+    level: int
+    source: str
+    message: str
+
+
+def format_record(record: LogRecord) -> str:
+    clock = time.strftime("%H:%M:%S", time.localtime(record.timestamp))
+    millis = int(record.timestamp % 1 * 1000)
+    return f"{clock}.{millis:03d} {LEVEL_NAMES.get(record.level, record.level):<8} [{record.source}] {record.message}"
+
+
+class RingLogger:
+    # log() только добавляет запись в две очереди и возвращается: кольцо последних
+    # записей для просмотра в окне и очередь на вывод, которую разбирает фоновый поток.
+    # Если поток не успевает (медленный stdout), очередь не растет дальше max_pending:
+    # новые записи ниже ERROR отбрасываются, а ERROR и выше вытесняют самую старую;
+    # число потерянных записей по уровням выводится, как только поток догонит
+    def __init__(self, stream: Optional[TextIO] = None, min_level: int = INFO,
+                 capacity: int = RING_CAPACITY, max_pending: int = MAX_PENDING,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.stream = stream if stream is not None else sys.stdout
+        self.min_level = min_level
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.recent: Deque[LogRecord] = deque(maxlen=capacity)
+        self.logged = 0
+        self.written = 0
+        self.dropped: Dict[int, int] = {}
+        self._reported_drops: Dict[int, int] = {}
+        self._pending: Deque[LogRecord] = deque()
+        self._wakeup = threading.Event()
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="log-flusher", daemon=True)
+        self._thread.start()
+
+    def log(self, level: int, source: str, message: str):
+        record = LogRecord(time.time(), level, source, message)
+        self.recent.append(record)
+        self.logged += 1
+        if level < self.min_level:
+            return
+
+        pending = self._pending
+        if len(pending) >= self.max_pending:
+            if level < ERROR:
+                self.dropped[level] = self.dropped.get(level, 0) + 1
+                return
+            # Поток вывода мог успеть разобрать очередь между проверкой длины и popleft
+            try:
+                lost = pending.popleft()
+            except IndexError:
+                lost = None
+            if lost is not None:
+                self.dropped[lost.level] = self.dropped.get(lost.level, 0) + 1
+        pending.append(record)
+        if level >= ERROR:
+            self._wakeup.set()
+
+    def debug(self, source: str, message: str):
+        self.log(DEBUG, source, message)
+
+    def info(self, source: str, message: str):
+        self.log(INFO, source, message)
+
+    def warning(self, source: str, message: str):
+        self.log(WARNING, source, message)
+
+    def error(self, source: str, message: str):
+        self.log(ERROR, source, message)
+
+    def critical(self, source: str, message: str):
+        self.log(CRITICAL, source, message)
+
+    def close(self):
+        # Дописывает все, что осталось в очереди
+        self._running = False
+        self._wakeup.set()
+        self._thread.join()
+
+    def _worker(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._flush()
+            if not self._running:
+                self._flush()
+                return
+
+    def _flush(self):
+        lines: List[str] = []
+        pending = self._pending
+        while True:
+            # log() может вытеснить запись из очереди одновременно с нами
+            try:
+                record = pending.popleft()
+            except IndexError:
+                break
+            lines.append(format_record(record))
+
+        for level, count in list(self.dropped.items()):
+            new = count - self._reported_drops.get(level, 0)
+            if new:
+                self._reported_drops[level] = count
+                lines.append(f"[LOG] пропущено записей {LEVEL_NAMES.get(level, level)}: {new}")
+
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except (OSError, ValueError):
+            # Закрытый или сломанный stdout не должен ронять игру: записи остаются в кольце
+            return
+        self.written += len(lines)
+
+    def stats(self) -> Dict:
+        return {
+            "logged": self.logged,
+            "written": self.written,
+            "pending": len(self._pending),
+            "dropped": {LEVEL_NAMES.get(level, level): count for level, count in self.dropped.items()},
+        }
+
+
+class LogViewer:
+    # Окно с последними записями кольца; обновляется по таймеру, только если
+    # появились новые записи, и ничего не делает, пока закрыто
+    def __init__(self, root, logger: RingLogger, refresh_ms: int = VIEWER_REFRESH_MS):
+        self.root = root
+        self.logger = logger
+        self.refresh_ms = refresh_ms
+        self.min_level = DEBUG
+        self.window = None
+        self.text = None
+        self._shown = -1
+        self._after_id = None
+
+    def toggle(self, event=None):
+        if self.window is not None:
+            self.close()
+        else:
+            self.open()
+
+    def open(self):
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Журнал событий")
+        self.window.geometry("900x400")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.level_var = tk.StringVar(value=LEVEL_NAMES[self.min_level])
+        top = tk.Frame(self.window)
+        top.pack(fill="x")
+        tk.Label(top, text="Уровень:").pack(side="left", padx=5)
+        tk.OptionMenu(top, self.level_var, *LEVEL_NAMES.values(),
+                      command=self._set_level).pack(side="left")
+        self.stats_label = tk.Label(top, fg="gray")
+        self.stats_label.pack(side="right", padx=5)
+
+        self.text = tk.Text(self.window, font=("Courier", 10), state="disabled", wrap="none")
+        self.text.pack(fill="both", expand=True)
+        self._shown = -1
+        self._refresh()
+
+    def close(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self.window is not None:
+            self.window.destroy()
+        self.window = None
+        self.text = None
+
+    def _set_level(self, name: str):
+        self.min_level = next(level for level, level_name in LEVEL_NAMES.items() if level_name == name)
+        self._shown = -1
+        self._refresh()
+
+    def _refresh(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.refresh_ms, self._refresh)
+        if self.logger.logged == self._shown:
+            return
+        self._shown = self.logger.logged
+
+        lines = [format_record(record) for record in list(self.logger.recent)
+                 if record.level >= self.min_level]
+        self.text.config(state="normal")
+        self.text.delete(1.0, tk.END)
+        self.text.insert(1.0, "\n".join(lines))
+        self.text.config(state="disabled")
+        self.text.see(tk.END)
+        stats = self.logger.stats()
+        self.stats_label.config(text=f"записей {stats['logged']}, выведено {stats['written']}, "
+                                     f"потеряно {sum(self.logger.dropped.values())}")
@@ -0,0 +1,245 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from image_cache import THUMBNAIL_SIZE
+
+
+PACK_MAGIC = b"QPAK"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct("<4sHHQQ")
+PACK_EXTENSION = ".assets"
+CHUNK_BYTES = 1 << 20
+
+
+class AssetEntry(NamedTuple):
+    digest: str
+    offset: int
+    length: int
+    width: int
+    height: int
+
+
+def pack_path_for(questions_path: str) -> str:
+    return os.path.splitext(questions_path)[0] + PACK_EXTENSION
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def render_thumbnail(path: str, size: Tuple[int, int] = THUMBNAIL_SIZE) -> Tuple[bytes, int, int]:
+    # Уменьшенная копия в PPM (P6): Tk показывает ее сам, без Pillow и без декодирования
+    from PIL import Image
+    from image_cache import load_thumbnail
+
+    img = load_thumbnail(path, size)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, "white")
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    width, height = img.size
+    return b"P6\n%d %d\n255\n" % (width, height) + img.tobytes(), width, height
+
+
+def read_pack_index(mm) -> Tuple[Dict[str, AssetEntry], Dict]:
+    magic, version, _, index_offset, index_length = PACK_HEADER.unpack_from(mm, 0)
+    if magic != PACK_MAGIC or version != PACK_VERSION:
+        raise ValueError("Файл не является пакетом изображений квиза")
+    index = json.loads(bytes(mm[index_offset:index_offset + index_length]))
+    entries = {path: AssetEntry(*fields) for path, fields in index["entries"].items()}
+    return entries, index.get("meta", {})
+
+
+class AssetPack:
+    # Пакет уменьшенных изображений, отображенный в память: показ картинки -
+    # срез по смещению из индекса и создание PhotoImage, без чтения исходников.
+    # get() и raw() возвращают memoryview прямо в отображение, без копирования;
+    # такой срез держит отображение, пока жив, даже после close()
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.entries, self.meta = read_pack_index(self._mm)
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._mm)
+        self.hits = 0
+
+    @classmethod
+    def open_if_exists(cls, path: str) -> Optional["AssetPack"]:
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def __contains__(self, image_path: str) -> bool:
+        return os.path.normpath(image_path) in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, image_path: str) -> Optional[memoryview]:
+        entry = self.entries.get(os.path.normpath(image_path))
+        if entry is None:
+            return None
+        self.hits += 1
+        return self.raw(entry)
+
+    def photo(self, image_path: str):
+        data = self.get(image_path)
+        if data is None:
+            return None
+        import tkinter as tk
+        # Tcl принимает картинку только как bytes: здесь единственная копия
+        with data:
+            return tk.PhotoImage(data=bytes(data), format="PPM")
+
+    def raw(self, entry: AssetEntry) -> memoryview:
+        return self._view[entry.offset:entry.offset + entry.length]
+
+    def close(self):
+        self._view.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            # Снаружи еще жив срез из get()/raw(): отображение закроется вместе с ним
+            pass
+        self._file.close()
+
+
+class BuildStats(NamedTuple):
+    built: int
+    reused: int
+    missing: List[str]
+    failed: List[str]
+    removed: int
+    elapsed: float
+
+
+def referenced_images(bank) -> List[str]:
+    seen = {}
+    for idx in range(len(bank)):
+        image = bank[idx].get("image")
+        if image:
+            seen.setdefault(os.path.normpath(image), None)
+    return list(seen)
+
+
+def build_pack(pack_path: str, images: Iterable[str],
+               size: Tuple[int, int] = THUMBNAIL_SIZE) -> BuildStats:
+    # Инкрементальная сборка: изображение с тем же хешом содержимого и тем же
+    # размером миниатюры копируется из старого пакета, остальные уменьшаются заново
+    start = time.perf_counter()
+    old: Optional[AssetPack] = None
+    try:
+        old = AssetPack.open_if_exists(pack_path)
+    except (OSError, ValueError, struct.error):
+        old = None
+    if old is not None and old.meta.get("size") != list(size):
+        old.close()
+        old = None
+
+    built = reused = 0
+    missing: List[str] = []
+    failed: List[str] = []
+    entries: Dict[str, list] = {}
+    tmp_path = pack_path + ".tmp"
+
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, 0, 0))
+            for image in images:
+                if not os.path.exists(image):
+                    missing.append(image)
+                    continue
+
+                digest = file_digest(image)
+                previous = old.entries.get(image) if old is not None else None
+                if previous is not None and previous.digest == digest:
+                    data, width, height = old.raw(previous), previous.width, previous.height
+                    reused += 1
+                else:
+                    try:
+                        data, width, height = render_thumbnail(image, size)
+                    except Exception as e:
+                        failed.append(f"{image}: {e}")
+                        continue
+                    built += 1
+
+                entries[image] = [digest, f.tell(), len(data), width, height]
+                f.write(data)
+
+            index = json.dumps({"meta": {"size": list(size)}, "entries": entries},
+                               ensure_ascii=False).encode("utf-8")
+            index_offset = f.tell()
+            f.write(index)
+            f.seek(0)
+            f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, index_offset, len(index)))
+    finally:
+        # Последний срез из old.raw() держит отображение старого пакета
+        data = None
+        removed = len(set(old.entries) - set(entries)) if old is not None else 0
+        if old is not None:
+            old.close()
+
+    # Уже открытые пакеты продолжают читать старый файл до закрытия
+    os.replace(tmp_path, pack_path)
+    return BuildStats(built, reused, missing, failed, removed, time.perf_counter() - start)
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Сборка пакета миниатюр для изображений вопросов")
+    parser.add_argument("questions", help="банк вопросов (.json или .jsonl)")
+    parser.add_argument("--pack", default=None, help="файл пакета (по умолчанию рядом с банком)")
+    parser.add_argument("--size", type=parse_size, default=THUMBNAIL_SIZE,
+                        help="размер миниатюр, например 400x300")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    from image_cache import pil_available
+    from question_bank import open_bank
+
+    args = parse_args(argv)
+    if not pil_available():
+        print("Для сборки пакета нужен Pillow: pip install pillow")
+        return 1
+
+    bank = open_bank(args.questions)
+    images = referenced_images(bank)
+    bank.close()
+
+    pack_path = args.pack or pack_path_for(args.questions)
+    stats = build_pack(pack_path, images, args.size)
+    for image in stats.missing:
+        print(f"Нет файла: {image}")
+    for error in stats.failed:
+        print(f"Ошибка: {error}")
+    print(f"Пакет '{pack_path}': собрано {stats.built}, без изменений {stats.reused}, "
+          f"удалено {stats.removed}, нет файлов {len(stats.missing)}, ошибок {len(stats.failed)} "
+          f"за {stats.elapsed:.2f} с")
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
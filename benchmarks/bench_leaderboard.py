@@ -0,0 +1,62 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import GameResult, Leaderboard, LeaderboardWriter
+
+
+SIZES = [10_000, 1_000_000, 2_000_000]
+CATEGORIES = ["География", "История", "Наука", "Искусство", "Спорт"]
+PERIOD_SECONDS = 90 * 86400
+QUERIES = 1_000
+
+
+def fill(writer: LeaderboardWriter, count: int, rng: random.Random):
+    now = time.time()
+    for _ in range(count):
+        categories = {name: (rng.randrange(4), rng.randrange(0, 120, 10))
+                      for name in rng.sample(CATEGORIES, 3)}
+        writer.submit(GameResult("bot", sum(points for _, points in categories.values()),
+                                 sum(correct for correct, _ in categories.values()), 10,
+                                 now - rng.random() * PERIOD_SECONDS, categories))
+
+
+def bench_query(board: Leaderboard, **kwargs) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(QUERIES):
+        board.top(10, **kwargs)
+    return (time.perf_counter_ns() - start) / QUERIES / 1000
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix="quiz-leaderboard-")
+    path = os.path.join(workdir, "leaderboard.sqlite3")
+    rng = random.Random(1)
+    written = 0
+    print(f"{'игр':>10} {'запись, игр/с':>14} {'топ-10, мкс':>12} {'за день':>9} "
+          f"{'за месяц':>9} {'категория':>10}")
+    try:
+        for size in SIZES:
+            writer = LeaderboardWriter(path)
+            start = time.perf_counter()
+            fill(writer, size - written, rng)
+            writer.close()
+            rate = (size - written) / (time.perf_counter() - start)
+            written = size
+
+            board = Leaderboard(path)
+            print(f"{size:>10} {rate:>14,.0f} {bench_query(board):>12.1f} "
+                  f"{bench_query(board, period='day'):>9.1f} {bench_query(board, period='month'):>9.1f} "
+                  f"{bench_query(board, category='Наука'):>10.1f}")
+            board.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_sampler import synthetic_question
+from question_bank import CompiledQuestionBank, ListQuestionBank, compile_questions
+
+
+SIZES = [1_000, 100_000, 1_000_000]
+ACCESSES = 100_000
+
+
+def traced_size(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def bench_access(bank) -> float:
+    n = len(bank)
+    start = time.perf_counter_ns()
+    for i in range(ACCESSES):
+        q = bank[i * 7919 % n]
+        q["question"], q["answers"], q["correct"]
+    return (time.perf_counter_ns() - start) / ACCESSES
+
+
+def main():
+    print(f"{'вопросов':>10} {'dict, байт/вопр':>16} {'колонки, байт/вопр':>20} "
+          f"{'экономия':>9} {'dict, нс':>9} {'колонки, нс':>12}")
+    for size in SIZES:
+        dicts, dict_bytes = traced_size(lambda: [synthetic_question(i) for i in range(size)])
+        # Словари уже созданы, поэтому в замер попадают только буферы колонок
+        compact, compact_bytes = traced_size(lambda: CompiledQuestionBank(compile_questions(dicts)))
+
+        list_ns = bench_access(ListQuestionBank(dicts))
+        compact_ns = bench_access(compact)
+        print(f"{size:>10} {dict_bytes / size:>16.0f} {compact_bytes / size:>20.0f} "
+              f"{dict_bytes / compact_bytes:>8.1f}x {list_ns:>9.0f} {compact_ns:>12.0f}")
+        del dicts, compact
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import heapq
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import overlay
+from overlay import LoopLagMonitor, Overlay
+from stubs import StubRoot, StubWidget
+
+
+DIALOGS = 20
+# Через сколько игрок нажимает OK и сколько идет игра между окнами
+REACTION_S = 2.0
+PLAY_S = 10.0
+
+
+class StubTkWidget(StubWidget):
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+
+class VirtualRoot(StubRoot):
+    # Цикл событий на виртуальных часах: after() срабатывает в свой момент,
+    # block() - вложенный модальный цикл, который не обслуживает очередь after
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+        self._timers = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def after(self, ms, func=None, *args):
+        after_id = super().after(ms, func, *args)
+        heapq.heappush(self._timers, (self.now + ms / 1000, self._next_id, after_id))
+        return after_id
+
+    def block(self, seconds: float):
+        self.now += seconds
+
+    def run(self, seconds: float):
+        until = self.now + seconds
+        while self._timers and self._timers[0][0] <= until:
+            due, _, after_id = heapq.heappop(self._timers)
+            item = self.scheduled.pop(after_id, None)
+            if item is None:
+                continue
+            self.now = max(self.now, due)
+            _, func, args = item
+            func(*args)
+        self.now = max(self.now, until)
+
+
+def simulate(path: str, dialogs: int = DIALOGS, reaction: float = REACTION_S,
+             play: float = PLAY_S):
+    # Симуляция, а не замер: окна Tk здесь нет. Модальный messagebox изображен
+    # остановкой цикла на заданное время реакции игрока, поэтому его цифры -
+    # следствие модели. Для панели Overlay работают настоящие Overlay и
+    # LoopLagMonitor, заглушки только у виджетов и часов
+    tk, overlay.tk = overlay.tk, SimpleNamespace(Frame=StubTkWidget, Label=StubTkWidget,
+                                                 Button=StubTkWidget)
+    try:
+        root = VirtualRoot()
+        monitor = LoopLagMonitor(root, clock=root.clock)
+        panels = Overlay(root)
+        monitor.start()
+
+        for _ in range(dialogs):
+            root.run(play)
+            if path == "modal":
+                root.block(reaction)
+            else:
+                panels.show("Время вышло!", "Правильный ответ: ...", "warning", tag="time_up")
+                root.after(int(reaction * 1000), panels.dismiss, "time_up")
+        root.run(play)
+        monitor.stop()
+    finally:
+        overlay.tk = tk
+    return monitor.stats()
+
+
+def main():
+    print(f"Симуляция: {DIALOGS} окон, игрок отвечает через {REACTION_S:.0f} с; "
+          f"задержки модального пути заданы моделью")
+    print(f"{'путь':>8} {'замеров':>8} {'зависаний':>10} {'стоял, мс':>10} {'макс. задержка, мс':>19}")
+    for path in ("modal", "overlay"):
+        stats = simulate(path)
+        print(f"{path:>8} {stats['samples']:>8} {stats['stalls']:>10} "
+              f"{stats['blocked_ms']:>10.0f} {stats['max_lag_ms']:>19.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sampler import QuestionSampler
+
+
+SIZES = [10, 1_000, 100_000, 10_000_000]
+DRAWS = 10
+GAMES = 2_000
+CATEGORIES = ["Астрономия", "Физика", "География", "Химия", "История"]
+
+
+def synthetic_question(idx: int) -> dict:
+    return {
+        "question": f"Синтетический вопрос №{idx}?",
+        "answers": [f"Ответ {idx}-{k}" for k in range(4)],
+        "correct": idx % 4,
+        "category": CATEGORIES[idx % len(CATEGORIES)],
+        "difficulty": idx % 3 + 1,
+    }
+
+
+class SyntheticBank:
+    def __init__(self, size: int):
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, idx: int) -> dict:
+        return synthetic_question(idx)
+
+    def category(self, idx: int) -> str:
+        return CATEGORIES[idx % len(CATEGORIES)]
+
+    def difficulty(self, idx: int) -> int:
+        return idx % 3 + 1
+
+
+def bench_draws(size: int, **bucket) -> float:
+    sampler = QuestionSampler(SyntheticBank(size), seed=42)
+    draws = min(DRAWS, sampler.bucket_size(**bucket))
+
+    start = time.perf_counter_ns()
+    for _ in range(GAMES):
+        sampler.reset()
+        for _ in range(draws):
+            sampler.draw(**bucket)
+    elapsed = time.perf_counter_ns() - start
+
+    return elapsed / (GAMES * draws)
+
+
+def main():
+    print(f"{'вопросов':>12} {'нс/вытягивание':>16} {'нс (категория+сложность)':>26}")
+    for size in SIZES:
+        plain = bench_draws(size)
+        # Стратифицированный пул требует разового O(n) построения корзин,
+        # поэтому на 10 млн замеряем только обычное вытягивание
+        if size <= 100_000:
+            stratified = f"{bench_draws(size, category='Физика', difficulty=2):.0f}"
+        else:
+            stratified = "-"
+        print(f"{size:>12} {plain:>16.0f} {stratified:>26}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from stubs import make_headless_game
+from bench_sampler import SyntheticBank, synthetic_question
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+SIZES = [10, 1_000, 100_000, 1_000_000, 10_000_000]
+# Банк .json на 10 млн вопросов занимает гигабайты, загрузку меряем до этого предела
+MAX_LOAD_SIZE = 100_000
+OPS = 2_000
+REPEATS = 9
+TOLERANCE = 1.5
+CALIBRATION_OPS = 200_000
+# Сколько раз перепроверять регрессию в новом процессе: на общей машине скорость
+# памяти плавает от процесса к процессу сильнее, чем внутри одного
+CONFIRM_RUNS = 2
+
+
+def measure(func, ops: int, repeats: int = REPEATS) -> float:
+    # Минимум по повторам, в наносекундах на операцию: шум (другие процессы,
+    # частота процессора, сборщик мусора) только замедляет, поэтому минимум
+    # устойчивее медианы. Сборщик, как в timeit, на время замера выключен
+    samples = []
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        try:
+            samples.append(func(ops) / ops)
+        finally:
+            gc.enable()
+    return min(samples)
+
+
+def calibration_loop(ops: int) -> int:
+    # Типичная для квиза работа интерпретатора: словари, строки, вызовы.
+    # Результаты делятся на ее время, чтобы база с другой машины была сравнима
+    start = time.perf_counter_ns()
+    counts: Dict[str, int] = {}
+    for i in range(ops):
+        key = str(i & 1023)
+        counts[key] = counts.get(key, 0) + len(key)
+    return time.perf_counter_ns() - start
+
+
+def calibrate() -> float:
+    return measure(calibration_loop, CALIBRATION_OPS)
+
+
+def write_bank_file(path: str, size: int):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(size):
+            if i:
+                f.write(",\n")
+            json.dump(synthetic_question(i), f, ensure_ascii=False)
+        f.write("\n]\n")
+
+
+def bench_load_questions(workdir: str, size: int) -> Dict[str, float]:
+    write_bank_file(os.path.join(workdir, "questions.json"), size)
+    game = make_headless_game(bank=[synthetic_question(i) for i in range(5)])
+
+    def load(rebuild: bool):
+        game.rebuild_cache = rebuild
+        start = time.perf_counter_ns()
+        game.load_questions()
+        return time.perf_counter_ns() - start
+
+    cold = measure(lambda ops: load(True), 1)
+    warm = measure(lambda ops: load(False), 1)
+    game.answer_log.close()
+    game.leaderboard_writer.close()
+    return {"load_questions_cold": cold, "load_questions_warm": warm}
+
+
+def bench_game(size: int, seed: int) -> Dict[str, float]:
+    game = make_headless_game(bank=SyntheticBank(size), seed=seed)
+    root = game.root
+    engine = game.engine
+
+    def restart():
+        root.scheduled.clear()
+        engine.start()
+
+    def random_question(ops: int) -> int:
+        start = time.perf_counter_ns()
+        for i in range(ops):
+            if i % engine.total_questions == 0:
+                game.sampler.reset()
+            game.get_random_question()
+        return time.perf_counter_ns() - start
+
+    def hint(ops: int) -> int:
+        elapsed = 0
+        for _ in range(ops):
+            if engine.phase == "finished":
+                restart()
+            game.next_question()
+            if engine.phase != "question":
+                continue
+            start = time.perf_counter_ns()
+            game.show_hint()
+            root.run_idle()
+            elapsed += time.perf_counter_ns() - start
+            game.skip_question()
+            root.run_idle()
+        return elapsed
+
+    def cycle(ops: int) -> int:
+        start = time.perf_counter_ns()
+        for i in range(ops):
+            if engine.phase == "finished":
+                restart()
+            game.next_question()
+            game.check_answer(i % 4)
+            root.run_idle()
+            # Отложенные вызовы анимации не выполняются, но не должны копиться
+            if len(root.scheduled) > 64:
+                root.scheduled.clear()
+        return time.perf_counter_ns() - start
+
+    restart()
+    results = {
+        "get_random_question": measure(random_question, OPS),
+        "show_hint": measure(hint, OPS),
+        "question_cycle": measure(cycle, OPS),
+    }
+    game.stop_timer()
+    game.answer_log.close()
+    game.leaderboard_writer.close()
+    return results
+
+
+def run(sizes: List[int], seed: int) -> Tuple[Dict[str, float], float]:
+    # Калибровка перед каждым размером и в конце; берется лучшая за весь прогон
+    results: Dict[str, float] = {}
+    calibrations = [calibrate()]
+    workdir = tempfile.mkdtemp(prefix="quiz-bench-")
+    cwd = os.getcwd()
+    # Журнал ответов и кэш банка пишутся во временный каталог
+    os.chdir(workdir)
+    try:
+        for size in sizes:
+            if size <= MAX_LOAD_SIZE:
+                for name, value in bench_load_questions(workdir, size).items():
+                    results[f"{name}[{size}]"] = value
+            for name, value in bench_game(size, seed).items():
+                results[f"{name}[{size}]"] = value
+            calibrations.append(calibrate())
+            print(f"  {size:>10} вопросов: готово", file=sys.stderr)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results, min(calibrations)
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float,
+            scale: float = 1.0) -> List[str]:
+    # scale - во сколько раз эта машина медленнее той, где снята база
+    regressions = []
+    print(f"{'бенчмарк':<40} {'база, нс':>14} {'сейчас, нс':>14} {'x':>7}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<40} {'-':>14} {value:>14.0f} {'новый':>7}")
+            continue
+        base *= scale
+        ratio = value / base if base else float("inf")
+        mark = "  <-- регрессия" if ratio > tolerance else ""
+        print(f"{name:<40} {base:>14.0f} {value:>14.0f} {ratio:>7.2f}{mark}")
+        if ratio > tolerance:
+            regressions.append(f"{name}: {base:.0f} нс -> {value:.0f} нс (x{ratio:.2f}, "
+                               f"допустимо x{tolerance:.2f})")
+    return regressions
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Бенчмарки горячих путей квиза (без окна)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="размеры синтетических банков")
+    parser.add_argument("--output", default=None, help="куда записать результаты в JSON")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="файл с базовыми результатами")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="записать текущие результаты как базовые")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="во сколько раз можно быть медленнее базы")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--measure-only", action="store_true",
+                        help="только записать результаты в --output, без сравнения с базой")
+    return parser.parse_args(argv)
+
+
+def confirm(names: List[str], seed: int, results: Dict[str, float], calibration: float):
+    # Перемеряет размеры с регрессиями в отдельных процессах; результат каждого
+    # прогона приводится к калибровке первого, по каждому бенчмарку берется лучший
+    sizes = sorted({int(name[name.index("[") + 1:-1]) for name in names})
+    for attempt in range(CONFIRM_RUNS):
+        print(f"Перепроверка {attempt + 1}/{CONFIRM_RUNS}: размеры {sizes}", file=sys.stderr)
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--measure-only",
+                            "--output", path, "--seed", str(seed), "--sizes", *map(str, sizes)],
+                           check=True, stdout=subprocess.DEVNULL)
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        finally:
+            os.remove(path)
+        scale = calibration / report["calibration"]
+        for name in names:
+            if name in report["results"]:
+                results[name] = min(results[name], report["results"][name] * scale)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    results, calibration = run(args.sizes, args.seed)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "unit": "ns/op",
+        "calibration": calibration,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.measure_only:
+        return 0
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Базовые результаты записаны в '{args.baseline}'")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        compare(results, {}, args.tolerance)
+        print("Базовых результатов нет, запустите с --update-baseline")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    scale = calibration / baseline["calibration"] if baseline.get("calibration") else 1.0
+    print(f"Калибровка: {calibration:.1f} нс/оп, машина x{scale:.2f} относительно базы")
+    slow = [name for name, value in results.items()
+            if name in baseline["results"] and value > baseline["results"][name] * scale * args.tolerance]
+    if slow:
+        confirm(slow, args.seed, results, calibration)
+    regressions = compare(results, baseline["results"], args.tolerance, scale)
+    if regressions:
+        print("\nРегрессии производительности:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nРегрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,107 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Main
+from applog import RingLogger
+
+
+class StubWidget:
+    def __init__(self):
+        self.options = {}
+        self.text = ""
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, key):
+        return self.options.get(key)
+
+    def delete(self, *args):
+        self.text = ""
+
+    def insert(self, index, text):
+        self.text += text
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class StubRoot(StubWidget):
+    def __init__(self):
+        super().__init__()
+        self.scheduled = {}
+        self._next_id = 0
+
+    def after(self, ms, func=None, *args):
+        self._next_id += 1
+        after_id = f"after#{self._next_id}"
+        self.scheduled[after_id] = (ms, func, args)
+        return after_id
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, after_id):
+        self.scheduled.pop(after_id, None)
+
+    def run_idle(self):
+        idle = [after_id for after_id, (ms, _, _) in self.scheduled.items() if ms == 0]
+        for after_id in idle:
+            _, func, args = self.scheduled.pop(after_id)
+            func(*args)
+
+
+class StubMessagebox:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: False
+
+
+class StubOverlay:
+    def __init__(self):
+        self.panels = []
+
+    def show(self, title, message, *args, **kwargs):
+        self.panels.append((title, message))
+
+    def dismiss(self, tag=None):
+        pass
+
+
+WIDGET_NAMES = ("score_label", "progress_label", "timer_label", "category_label", "question_text",
+                "image_label", "skip_button", "hint_button", "next_button", "status_label",
+                "start_button")
+
+
+def make_headless_game(bank=None, seed=None):
+    # Собираем QuizGame без Tk: окно и виджеты заменены заглушками
+    Main.messagebox = StubMessagebox()
+    Main.print = lambda *args, **kwargs: None
+
+    game = Main.QuizGame.__new__(Main.QuizGame)
+    game.seed = seed
+    game.rebuild_cache = False
+    game.trace_file = None
+    game.tracer = None
+    game.adaptive = False
+    game.hot_reload = False
+    game.record_dir = None
+    game.shared_bank = None
+    game.root = StubRoot()
+    game.log = RingLogger(stream=open(os.devnull, "w"))
+
+    if bank is None:
+        game.load_questions()
+    else:
+        game.all_questions = bank
+        game.asset_pack = None
+    game.setup_variables()
+    game.overlay = StubOverlay()
+
+    for name in WIDGET_NAMES:
+        setattr(game, name, StubWidget())
+    game.answer_buttons = [StubWidget() for _ in range(4)]
+    return game
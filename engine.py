@@ -0,0 +1,277 @@
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from sampler import QuestionSampler
+
+
+TOTAL_QUESTIONS = 10
+QUESTION_TIME = 30
+HINT_PENALTY = 5
+POINTS_PER_DIFFICULTY = 10
+
+
+@dataclass
+class Transition:
+    kind: str
+    question: Optional[Dict] = None
+    question_id: Optional[int] = None
+    answer_index: Optional[int] = None
+    correct_index: Optional[int] = None
+    points: int = 0
+    score: int = 0
+    time_left: int = 0
+    removed: List[int] = field(default_factory=list)
+    response_time: float = 0.0
+    message: str = ""
+
+
+class QuizEngine:
+    def __init__(self, bank, sampler: Optional[QuestionSampler] = None,
+                 total_questions: int = TOTAL_QUESTIONS,
+                 question_time: int = QUESTION_TIME,
+                 seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.bank = bank
+        self.sampler = sampler if sampler is not None else QuestionSampler(bank, seed)
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.total_questions = total_questions
+        self.question_time = question_time
+        self.listeners: List[Callable[[Transition], None]] = []
+
+        self.phase = "idle"
+        self.score = 0
+        self.correct_count = 0
+        self.current_question_index = 0
+        self.current_question: Optional[Dict] = None
+        self.current_question_id: Optional[int] = None
+        self.time_left = question_time
+        self.hint_used = False
+        self.shown_at = 0.0
+
+    @property
+    def game_active(self) -> bool:
+        return self.phase in ("waiting", "question", "answered")
+
+    @property
+    def timer_running(self) -> bool:
+        return self.phase == "question"
+
+    def start(self, seed: Optional[int] = None) -> Transition:
+        # С seed игра полностью определяется им и последовательностью входов
+        if seed is not None:
+            self.rng.seed(seed)
+        self.score = 0
+        self.correct_count = 0
+        self.current_question_index = 0
+        self.current_question = None
+        self.current_question_id = None
+        self.time_left = self.question_time
+        self.sampler.reset(seed)
+        self.phase = "waiting"
+        return self._emit(Transition("start"))
+
+    def rebind(self, bank, remap, runs=None):
+        # Горячая замена банка между вопросами; текущий вопрос уже загружен в память
+        self.bank = bank
+        self.sampler.rebind(bank, remap, runs)
+        if self.current_question_id is not None:
+            new_id = remap[self.current_question_id] if self.current_question_id < len(remap) else -1
+            self.current_question_id = new_id if new_id >= 0 else None
+
+    def get_random_question(self) -> Optional[Dict]:
+        idx = self.sampler.draw()
+        if idx is None:
+            return None
+        self.current_question_id = idx
+        return self.bank[idx]
+
+    def load_question(self) -> Transition:
+        question = self.get_random_question()
+        if not question:
+            return self.finish("Все вопросы закончились!")
+        return self.show(question, self.current_question_id)
+
+    def show(self, question: Dict, question_id: Optional[int] = None) -> Transition:
+        self.current_question = question
+        self.current_question_id = question_id
+        self.time_left = self.question_time
+        self.hint_used = False
+        self.shown_at = self.clock()
+        self.phase = "question"
+        return self._emit(Transition("question", question=question, question_id=question_id,
+                                     correct_index=question["correct"],
+                                     score=self.score, time_left=self.time_left))
+
+    def answer(self, answer_index: int) -> Transition:
+        if self.phase != "question":
+            return Transition("ignored")
+
+        self.phase = "answered"
+        correct_index = self.current_question["correct"]
+
+        if answer_index == correct_index:
+            points = POINTS_PER_DIFFICULTY * self.current_question.get("difficulty", 1)
+            self.score += points
+            self.correct_count += 1
+            kind = "correct"
+        else:
+            points = 0
+            kind = "incorrect"
+
+        return self._emit(self._result(kind, answer_index=answer_index, points=points))
+
+    def skip(self) -> Transition:
+        if self.phase != "question":
+            return Transition("ignored")
+        self.phase = "answered"
+        return self._emit(self._result("skip"))
+
+    def hint(self) -> Transition:
+        if self.phase != "question" or self.hint_used:
+            return Transition("ignored")
+
+        self.hint_used = True
+        correct_index = self.current_question["correct"]
+        wrong_indices = [i for i in range(4) if i != correct_index]
+        removed = self.rng.sample(wrong_indices, 2)
+        self.score = max(0, self.score - HINT_PENALTY)
+
+        return self._emit(self._result("hint", removed=removed, points=-HINT_PENALTY))
+
+    def tick(self, seconds: int = 1) -> Transition:
+        if self.phase != "question":
+            return Transition("ignored")
+
+        self.time_left = max(0, self.time_left - seconds)
+        if self.time_left <= 0:
+            self.phase = "answered"
+            return self._emit(self._result("timeout"))
+
+        return Transition("tick", score=self.score, time_left=self.time_left)
+
+    def next_question(self) -> Transition:
+        self.current_question_index += 1
+
+        if self.current_question_index >= self.total_questions:
+            return self.finish()
+        return self.load_question()
+
+    def finish(self, message: Optional[str] = None) -> Transition:
+        self.phase = "finished"
+        if not message:
+            message = f"Игра завершена!\nВаш итоговый счет: {self.score}"
+        return self._emit(Transition("finished", score=self.score, message=message))
+
+    def dispatch(self, event: str, arg=None) -> Transition:
+        if event == "answer":
+            return self.answer(arg)
+        if event == "skip":
+            return self.skip()
+        if event == "hint":
+            return self.hint()
+        if event == "tick":
+            return self.tick(arg if arg is not None else 1)
+        if event == "next":
+            return self.next_question()
+        if event == "load":
+            return self.load_question()
+        if event == "start":
+            return self.start(arg)
+        if event == "finish":
+            return self.finish(arg)
+        raise ValueError(f"Неизвестное событие: {event}")
+
+    def _result(self, kind: str, **kwargs) -> Transition:
+        return Transition(kind,
+                          question=self.current_question,
+                          question_id=self.current_question_id,
+                          correct_index=self.current_question["correct"],
+                          score=self.score,
+                          time_left=self.time_left,
+                          response_time=self.clock() - self.shown_at,
+                          **kwargs)
+
+    def _emit(self, transition: Transition) -> Transition:
+        for listener in self.listeners:
+            listener(transition)
+        return transition
+
+
+def simulate(bank, games: int, seed: Optional[int] = None,
+             hint_rate: float = 0.1, skip_rate: float = 0.05) -> Dict:
+    rng = random.Random(seed)
+    engine = QuizEngine(bank, seed=seed, clock=lambda: 0.0)
+    scores = []
+
+    for _ in range(games):
+        engine.start()
+        t = engine.load_question()
+        while t.kind != "finished":
+            roll = rng.random()
+            if roll < hint_rate:
+                engine.hint()
+            if roll > 1.0 - skip_rate:
+                engine.skip()
+            else:
+                engine.answer(rng.randrange(4))
+            t = engine.next_question()
+        scores.append(engine.score)
+
+    return {
+        "games": games,
+        "mean_score": sum(scores) / games if games else 0.0,
+        "max_score": max(scores, default=0),
+    }
+
+
+def _simulate_file(path: str, games: int, seed: Optional[int]) -> Dict:
+    from question_bank import open_bank
+    return simulate(open_bank(path), games, seed)
+
+
+def simulate_parallel(path: str, games: int, workers: int, seed: Optional[int] = None) -> Dict:
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = [games // workers + (1 if i < games % workers else 0) for i in range(workers)]
+    seeds = [None if seed is None else seed + i for i in range(workers)]
+
+    with ProcessPoolExecutor(workers) as pool:
+        results = list(pool.map(_simulate_file, [path] * workers, chunks, seeds))
+
+    return {
+        "games": games,
+        "mean_score": sum(r["mean_score"] * r["games"] for r in results) / games if games else 0.0,
+        "max_score": max(r["max_score"] for r in results),
+    }
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print("Использование: python engine.py questions.json [игр] [seed] [процессов]")
+        return 2
+
+    path = argv[0]
+    games = int(argv[1]) if len(argv) > 1 else 100_000
+    seed = int(argv[2]) if len(argv) > 2 else None
+    workers = int(argv[3]) if len(argv) > 3 else os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers > 1:
+        stats = simulate_parallel(path, games, workers, seed)
+    else:
+        stats = _simulate_file(path, games, seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"Сыграно {stats['games']} игр за {elapsed:.2f} с "
+          f"({stats['games'] / elapsed * 60:,.0f} игр/мин)")
+    print(f"Средний счет: {stats['mean_score']:.1f}, максимальный: {stats['max_score']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,450 @@
+import hashlib
+import json
+import os
+import re
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from question_bank import (CompiledQuestionBank, JsonlQuestionBank, TEXT_FIELDS, cache_path_for,
+                           compile_questions, index_difficulty, question_errors,
+                           write_bank_cache, write_jsonl_index)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+POLL_INTERVAL_MS = 1000
+CHUNK_BYTES = 4096
+DIGEST_SIZE = 16
+OLD = 0
+NEW = 1
+JSON_STRING = rb'"(?:[^"\\]|\\.)*"'
+JSON_TOKEN = re.compile(JSON_STRING + rb"|[\[\]{}]")
+JSON_FLAT_OBJECT = re.compile(rb'\{(?:[^{}\[\]"]|' + JSON_STRING +
+                              rb'|\[(?:[^{}\[\]"]|' + JSON_STRING + rb')*\])*\}')
+JSON_SEPARATOR = re.compile(rb"\s*,\s*")
+JSON_SPACE = re.compile(rb"\s*")
+
+
+class FileWatcher:
+    # Опрос mtime и размера: работает везде, где есть os.stat, и стоит микросекунды
+    def __init__(self, path: str):
+        self.path = path
+        self.signature = self._stat()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self) -> bool:
+        signature = self._stat()
+        if signature is None or signature == self.signature:
+            return False
+        self.signature = signature
+        return True
+
+
+def _scan_nested(raw: bytes, pos: int) -> int:
+    # Конец элемента с глубокой вложенностью: считаем скобки, пропуская строки
+    depth = 0
+    for match in JSON_TOKEN.finditer(raw, pos):
+        token = raw[match.start()]
+        if token == 0x22:
+            continue
+        depth += 1 if token in (0x5B, 0x7B) else -1
+        if depth == 0:
+            return match.end()
+    raise ValueError("Несбалансированные скобки в файле вопросов")
+
+
+class RegionMismatch(Exception):
+    pass
+
+
+class FileChanged(Exception):
+    # Файл переписали, пока шла перезагрузка: FileWatcher заметит новую версию
+    pass
+
+
+def json_header_end(raw: bytes) -> int:
+    pos = JSON_SPACE.match(raw).end()
+    if raw[pos:pos + 1] != b"[":
+        raise ValueError("Файл должен содержать список вопросов")
+    return pos + 1
+
+
+def json_entry_spans(raw: bytes, pos: int, stop: int, after_entry: bool,
+                     first_number: int = 1) -> List[Tuple[int, int]]:
+    # Границы элементов массива на участке [pos, stop) без разбора их содержимого.
+    # Обычный вопрос (значения - строки, числа и плоские списки) целиком
+    # совпадает с JSON_FLAT_OBJECT, так что цикл идет по вопросам, а не по токенам.
+    # stop == len(raw) означает, что участок заканчивается закрывающей скобкой массива
+    spans = []
+    expect_entry = not after_entry
+    length = len(raw)
+    while True:
+        pos = JSON_SPACE.match(raw, pos).end()
+        if pos >= stop:
+            if stop >= length:
+                raise ValueError("Файл должен содержать список вопросов")
+            if not expect_entry:
+                raise RegionMismatch()
+            return spans
+
+        if raw[pos] == 0x5D:
+            if stop < length or raw[pos + 1:].strip() or \
+                    (expect_entry and (after_entry or spans)):
+                raise ValueError("Ошибка в формате JSON файла вопросов")
+            return spans
+
+        number = first_number + len(spans)
+        if not expect_entry:
+            if raw[pos] != 0x2C:
+                raise ValueError(f"Ошибка в формате JSON после вопроса {number - 1}")
+            pos += 1
+            expect_entry = True
+            continue
+
+        if raw[pos] != 0x7B:
+            raise ValueError(f"Вопрос {number} должен быть словарем")
+        match = JSON_FLAT_OBJECT.match(raw, pos)
+        end = match.end() if match is not None else _scan_nested(raw, pos)
+        if end > stop:
+            raise RegionMismatch()
+        spans.append((pos, end))
+        pos = end
+        expect_entry = False
+
+
+def jsonl_entry_spans(raw: bytes, pos: int, stop: int) -> List[Tuple[int, int]]:
+    spans = []
+    while pos < stop:
+        end = raw.find(b"\n", pos)
+        end = len(raw) if end < 0 else end + 1
+        if end > stop:
+            raise RegionMismatch()
+        if raw[pos:end].strip():
+            spans.append((pos, end))
+        pos = end
+    return spans
+
+
+def chunk_digests(raw: bytes, from_end: bool = False) -> List[bytes]:
+    # Хеши полных блоков от начала (или от конца) файла: по ним за один проход
+    # на скорости C находятся неизменные начало и конец файла
+    view = memoryview(raw)
+    size = len(raw)
+    if from_end:
+        bounds = ((size - i - CHUNK_BYTES, size - i) for i in range(0, size - CHUNK_BYTES + 1, CHUNK_BYTES))
+    else:
+        bounds = ((i, i + CHUNK_BYTES) for i in range(0, size - CHUNK_BYTES + 1, CHUNK_BYTES))
+    return [hashlib.blake2b(view[start:end], digest_size=16).digest() for start, end in bounds]
+
+
+def shifted(values: array, shift: int) -> array:
+    # Копия массива номеров или смещений, сдвинутых на константу. С NumPy сдвиг
+    # идет на скорости C, без него - циклом Python
+    if shift == 0:
+        return array(values.typecode, values)
+    if np is not None:
+        dtype = np.dtype(values.typecode)
+        moved = np.frombuffer(values, dtype=dtype).astype(np.int64) + shift
+        return array(values.typecode, moved.astype(dtype).tobytes())
+    return array(values.typecode, (value + shift for value in values))
+
+
+def index_range(start: int, stop: int) -> array:
+    if np is not None:
+        return array("i", np.arange(start, stop, dtype=np.int32).tobytes())
+    return array("i", range(start, stop))
+
+
+def common_chunks(a: List[bytes], b: List[bytes]) -> int:
+    count = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        count += 1
+    return count
+
+
+def entry_digests(raw: bytes, spans: List[Tuple[int, int]]) -> bytes:
+    view = memoryview(raw)
+    return b"".join(hashlib.blake2b(view[start:end], digest_size=DIGEST_SIZE).digest()
+                    for start, end in spans)
+
+
+class ReloadResult(NamedTuple):
+    bank: object
+    remap: array
+    # (источник, начало, конец, первый номер в новом банке) по порядку нового банка
+    runs: List[Tuple[int, int, int, int]]
+    reused: int
+    parsed: int
+    removed: int
+    elapsed: float
+
+
+class ColumnBuilder:
+    # Собирает колонки CompiledQuestionBank из отрезков старого банка и банка
+    # с измененными вопросами, копируя отрезки целиком
+    def __init__(self, categories: List[str]):
+        self.text = bytearray()
+        self.text_offsets = array("Q", [0])
+        self.correct = array("B")
+        self.difficulties = array("B")
+        self.category_ids = array("H")
+        self.categories = list(categories)
+        self.category_lookup = {name: i for i, name in enumerate(self.categories)}
+        self.images: Dict[int, str] = {}
+        self.extras: Dict[int, Dict] = {}
+        self._sorted_keys: Dict[int, Tuple[List[int], List[int]]] = {}
+
+    def add_run(self, bank: CompiledQuestionBank, start: int, stop: int):
+        position = len(self.correct)
+        offsets = bank.text_offsets
+        text_start = offsets[TEXT_FIELDS * start]
+        shift = len(self.text) - text_start
+        self.text += bank.text[text_start:offsets[TEXT_FIELDS * stop]]
+        run_offsets = offsets[TEXT_FIELDS * start + 1:TEXT_FIELDS * stop + 1]
+        if run_offsets.typecode != "Q":
+            run_offsets = array("Q", run_offsets)
+        self.text_offsets.extend(shifted(run_offsets, shift))
+        self.correct.extend(bank.correct[start:stop])
+        self.difficulties.extend(bank.difficulties[start:stop])
+
+        ids = bank.category_ids[start:stop]
+        if bank.categories != self.categories[:len(bank.categories)]:
+            remap = [self._category_id(name) for name in bank.categories]
+            ids = array("H", (remap[cat_id] for cat_id in ids))
+        self.category_ids.extend(ids)
+
+        image_keys, extra_keys = self._keys(bank)
+        for keys, source, target in ((image_keys, bank.images, self.images),
+                                     (extra_keys, bank.extras, self.extras)):
+            for pos in range(bisect_left(keys, start), bisect_left(keys, stop)):
+                idx = keys[pos]
+                target[idx - start + position] = source[idx]
+
+    def _keys(self, bank: CompiledQuestionBank):
+        keys = self._sorted_keys.get(id(bank))
+        if keys is None:
+            keys = self._sorted_keys[id(bank)] = (sorted(bank.images), sorted(bank.extras))
+        return keys
+
+    def _category_id(self, name: str) -> int:
+        cat_id = self.category_lookup.get(name)
+        if cat_id is None:
+            cat_id = self.category_lookup[name] = len(self.categories)
+            self.categories.append(name)
+        return cat_id
+
+    def columns(self) -> Dict:
+        offset_type = "I" if len(self.text) <= 0xFFFFFFFF else "Q"
+        if offset_type == "Q":
+            text_offsets = self.text_offsets.tobytes()
+        elif np is not None:
+            text_offsets = np.frombuffer(self.text_offsets, dtype=np.uint64).astype(np.uint32).tobytes()
+        else:
+            text_offsets = array(offset_type, self.text_offsets).tobytes()
+        return {
+            "text": bytes(self.text),
+            "text_offsets": text_offsets,
+            "offset_type": offset_type,
+            "correct": self.correct.tobytes(),
+            "difficulty": self.difficulties.tobytes(),
+            "category_ids": self.category_ids.tobytes(),
+            "categories": self.categories,
+            "images": self.images,
+            "extras": self.extras,
+        }
+
+
+class BankReloader:
+    # Неизменные начало и конец файла находятся по хешам блоков, вопросы в них
+    # переносятся из старого банка целыми отрезками. Разбираются, проверяются и
+    # хешируются только вопросы между ними; те, чей хеш совпал со старым вопросом
+    # этого участка, тоже переносятся. По всему файлу проходят хеширование блоков
+    # и копирование колонок срезами массивов (сдвиг смещений - через NumPy, если он
+    # есть); циклы Python по отдельным вопросам идут только по измененному участку
+    # и по вопросам с картинками или дополнительными полями. reload() вызывается
+    # из рабочего потока, потоку Tk остается подменить банк
+    def __init__(self, path: str, bank):
+        self.path = path
+        self.bank = bank
+        self.jsonl = path.lower().endswith(".jsonl")
+        with open(path, "rb") as f:
+            raw = f.read()
+        spans = self._scan(raw, self._header_end(raw), len(raw), False, 1)
+        if len(spans) != len(bank):
+            # Файл успел измениться после загрузки: первая перезагрузка будет полной
+            spans = []
+        self._remember(raw, spans, entry_digests(raw, spans))
+
+    def _remember(self, raw: bytes, spans, digests: bytes):
+        self.size = len(raw)
+        self.starts = array("q", (start for start, _ in spans))
+        self.ends = array("q", (end for _, end in spans))
+        self.digests = digests
+        self.head_chunks = chunk_digests(raw)
+        self.tail_chunks = chunk_digests(raw, from_end=True)
+
+    def _header_end(self, raw: bytes) -> int:
+        return 0 if self.jsonl else json_header_end(raw)
+
+    def _scan(self, raw: bytes, pos: int, stop: int, after_entry: bool, first_number: int):
+        if self.jsonl:
+            return jsonl_entry_spans(raw, pos, stop)
+        return json_entry_spans(raw, pos, stop, after_entry, first_number)
+
+    def _middle(self, raw: bytes, head_chunks, tail_chunks):
+        # Старые вопросы [0, k1) и [k2, n) лежат в неизменных байтах
+        n = len(self.starts)
+        if n == 0:
+            return 0, 0, self._scan(raw, self._header_end(raw), len(raw), False, 1)
+
+        limit = min(len(raw), self.size)
+        head = common_chunks(head_chunks, self.head_chunks) * CHUNK_BYTES
+        tail = min(common_chunks(tail_chunks, self.tail_chunks) * CHUNK_BYTES, limit - head)
+        k1 = bisect_right(self.ends, head)
+        k2 = max(k1, bisect_left(self.starts, self.size - tail))
+
+        start = self.ends[k1 - 1] if k1 else self._header_end(raw)
+        stop = self.starts[k2] + len(raw) - self.size if k2 < n else len(raw)
+        try:
+            return k1, k2, self._scan(raw, start, stop, k1 > 0, k1 + 1)
+        except RegionMismatch:
+            return 0, n, self._scan(raw, self._header_end(raw), len(raw), False, 1)
+
+    def reload(self) -> ReloadResult:
+        start_time = time.perf_counter()
+        with open(self.path, "rb") as f:
+            raw = f.read()
+            # Подпись того файла, из которого прочитан raw, а не того, что лежит по пути сейчас
+            stat = os.fstat(f.fileno())
+        head_chunks = chunk_digests(raw)
+        tail_chunks = chunk_digests(raw, from_end=True)
+        n = len(self.starts)
+        k1, k2, middle = self._middle(raw, head_chunks, tail_chunks)
+        middle_digests = entry_digests(raw, middle)
+
+        lookup: Dict[bytes, deque] = {}
+        for old_idx in range(k1, k2):
+            digest = self.digests[old_idx * DIGEST_SIZE:(old_idx + 1) * DIGEST_SIZE]
+            lookup.setdefault(digest, deque()).append(old_idx)
+
+        # Отрезки (источник, начало, конец): OLD - номера старого банка, NEW - измененных
+        runs: List[List[int]] = [[OLD, 0, k1]] if k1 else []
+        changed: List[Dict] = []
+        errors: List[str] = []
+        for number, (start, end) in enumerate(middle, k1 + 1):
+            digest = middle_digests[(number - k1 - 1) * DIGEST_SIZE:(number - k1) * DIGEST_SIZE]
+            old = lookup.get(digest)
+            if old:
+                _extend_runs(runs, OLD, old.popleft())
+                continue
+            try:
+                q = json.loads(raw[start:end])
+            except ValueError as e:
+                errors.append(f"Вопрос {number}: ошибка JSON: {e}")
+                continue
+            errors.extend(question_errors(q, number))
+            _extend_runs(runs, NEW, len(changed))
+            changed.append(q)
+        if k2 < n:
+            _extend_runs(runs, OLD, k2, n)
+
+        if errors:
+            raise ValueError("\n".join(errors[:10]))
+
+        remap = array("i", [-1]) * len(self.bank)
+        positioned = []
+        position = 0
+        for source, start, stop in runs:
+            if source == OLD:
+                remap[start:stop] = index_range(position, position + stop - start)
+            positioned.append((source, start, stop, position))
+            position += stop - start
+
+        delta = len(raw) - self.size
+        starts = (self.starts[:k1] + array("q", (start for start, _ in middle)) +
+                  shifted(self.starts[k2:], delta))
+        ends = (self.ends[:k1] + array("q", (end for _, end in middle)) +
+                shifted(self.ends[k2:], delta))
+
+        if self.jsonl:
+            bank = self._build_jsonl(runs, changed, starts, stat)
+        else:
+            bank = self._build_compiled(runs, changed, raw)
+
+        self.bank = bank
+        self._remember_reloaded(raw, starts, ends, self.digests[:k1 * DIGEST_SIZE] + middle_digests +
+                                self.digests[k2 * DIGEST_SIZE:], head_chunks, tail_chunks)
+        reused = len(starts) - len(changed)
+        return ReloadResult(bank, remap, positioned, reused, len(changed), len(remap) - reused,
+                            time.perf_counter() - start_time)
+
+    def _remember_reloaded(self, raw: bytes, starts: array, ends: array, digests: bytes,
+                           head_chunks, tail_chunks):
+        self.size = len(raw)
+        self.starts = starts
+        self.ends = ends
+        self.digests = digests
+        self.head_chunks = head_chunks
+        self.tail_chunks = tail_chunks
+
+    def _build_compiled(self, runs, changed: List[Dict], raw: bytes) -> CompiledQuestionBank:
+        patch = CompiledQuestionBank(compile_questions(changed)) if changed else None
+        builder = ColumnBuilder(self.bank.categories)
+        for source, start, stop in runs:
+            builder.add_run(self.bank if source == OLD else patch, start, stop)
+
+        columns = builder.columns()
+        write_bank_cache(cache_path_for(self.path), hashlib.sha256(raw).digest(), columns)
+        return CompiledQuestionBank(columns, self.path)
+
+    def _build_jsonl(self, runs, changed: List[Dict], offsets: array, stat) -> JsonlQuestionBank:
+        old = self.bank
+        categories = list(old.categories)
+        lookup = {name: i for i, name in enumerate(categories)}
+        category_ids = array("H")
+        difficulties = array("B")
+
+        for source, start, stop in runs:
+            if source == OLD:
+                category_ids.extend(old.category_ids[start:stop])
+                difficulties.extend(old.difficulties[start:stop])
+                continue
+            for q in changed[start:stop]:
+                category = q.get("category", "Общее")
+                cat_id = lookup.get(category)
+                if cat_id is None:
+                    cat_id = lookup[category] = len(categories)
+                    categories.append(category)
+                category_ids.append(cat_id)
+                difficulties.append(index_difficulty(q))
+
+        write_jsonl_index(self.path + ".idx", stat, categories,
+                          offsets, category_ids, difficulties)
+        bank = JsonlQuestionBank(self.path)
+        if not bank.warm_start:
+            # Индекс не подошел к файлу на диске - смещения посчитаны по старой версии
+            bank.close()
+            raise FileChanged()
+        return bank
+
+
+def _extend_runs(runs: List[List[int]], source: int, start: int, stop: Optional[int] = None):
+    stop = start + 1 if stop is None else stop
+    if runs and runs[-1][0] == source and runs[-1][2] == start:
+        runs[-1][2] = stop
+    else:
+        runs.append([source, start, stop])
@@ -0,0 +1,164 @@
+import importlib.util
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+THUMBNAIL_SIZE = (400, 300)
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+PREFETCH_AHEAD = 3
+
+
+def pil_available() -> bool:
+    return importlib.util.find_spec("PIL") is not None
+
+
+def load_thumbnail(path: str, size: Tuple[int, int] = THUMBNAIL_SIZE):
+    from PIL import Image
+
+    img = Image.open(path)
+    img.thumbnail(size)
+    # Декодируем здесь полностью, чтобы в потоке Tk осталось только создание PhotoImage
+    img.load()
+    return img
+
+
+def image_size_bytes(img) -> int:
+    width, height = img.size
+    return width * height * len(img.getbands())
+
+
+class ImageCache:
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, Tuple[object, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            return path in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, path: str):
+        with self._lock:
+            item = self._items.get(path)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(path)
+            self.hits += 1
+            return item[0]
+
+    def peek(self, path: str):
+        with self._lock:
+            item = self._items.get(path)
+            return item[0] if item is not None else None
+
+    def put(self, path: str, img, size: int):
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._items.pop(path, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+
+            self._items[path] = (img, size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "items": len(self._items),
+                "bytes": self.current_bytes,
+            }
+
+
+class ImagePrefetcher:
+    # Весь разбор картинок идет в рабочем потоке; поток Tk только спрашивает
+    # кэш и, пока картинки нет, опрашивает его по таймеру
+    def __init__(self, cache: Optional[ImageCache] = None, loader=load_thumbnail):
+        self.cache = cache if cache is not None else ImageCache()
+        self.loader = loader
+        self.errors = 0
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._pending: Set[str] = set()
+        self._failed: Dict[str, str] = {}
+        # Картинки крупнее всего кэша не кэшируются, а отдаются один раз
+        self._oversized: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, name="image-prefetch", daemon=True)
+        self._thread.start()
+
+    def prefetch(self, paths: Iterable[str]):
+        for path in paths:
+            if not path or path in self.cache:
+                continue
+            with self._lock:
+                if path in self._pending:
+                    continue
+                self._pending.add(path)
+                self._failed.pop(path, None)
+            self._queue.put(path)
+
+    def get(self, path: str):
+        # Не блокирует: при промахе ставит картинку в очередь и возвращает None
+        img = self.cache.get(path)
+        if img is None:
+            self.prefetch([path])
+        return img
+
+    def ready(self, path: str):
+        img = self.cache.peek(path)
+        if img is None:
+            with self._lock:
+                img = self._oversized.pop(path, None)
+        return img
+
+    def pending(self, path: str) -> bool:
+        with self._lock:
+            return path in self._pending
+
+    def error(self, path: str) -> Optional[str]:
+        with self._lock:
+            return self._failed.pop(path, None)
+
+    def close(self):
+        self._queue.put(None)
+
+    def _worker(self):
+        while True:
+            path = self._queue.get()
+            if path is None:
+                return
+
+            error = None
+            try:
+                img = self.loader(path)
+                size = image_size_bytes(img)
+                if size > self.cache.max_bytes:
+                    with self._lock:
+                        self._oversized[path] = img
+                else:
+                    self.cache.put(path, img, size)
+            except Exception as e:
+                self.errors += 1
+                error = str(e)
+            finally:
+                with self._lock:
+                    self._pending.discard(path)
+                    if error is not None:
+                        self._failed[path] = error
@@ -0,0 +1,405 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from question_bank import (JsonlQuestionBank, index_difficulty, question_problems,
+                           write_jsonl_index)
+
+
+SHARD_BYTES = 64 * 1024 * 1024
+READ_BYTES = 1024 * 1024
+CSV_ANSWER_COLUMNS = ("answer_a", "answer_b", "answer_c", "answer_d")
+CSV_LETTERS = {"A": 0, "B": 1, "C": 2, "D": 3}
+
+
+class ShardResult:
+    def __init__(self):
+        self.lines = 0
+        self.errors: List[Tuple[int, str]] = []
+        self.payload = bytearray()
+        self.lengths = array("I")
+        self.categories: List[str] = []
+        self.category_ids = array("H")
+        self.difficulties = array("B")
+        self._category_lookup: Dict[str, int] = {}
+
+    def add(self, q: Dict, line_no: int):
+        if not isinstance(q, dict):
+            self.errors.append((line_no, "вопрос должен быть словарем"))
+            return
+        problems = question_problems(q)
+        if problems:
+            self.errors.extend((line_no, problem) for problem in problems)
+            return
+
+        category = q.get("category", "Общее")
+        if not isinstance(category, str):
+            category = "Общее"
+        cat_id = self._category_lookup.get(category)
+        if cat_id is None:
+            cat_id = self._category_lookup[category] = len(self.categories)
+            self.categories.append(category)
+
+        line = (json.dumps(q, ensure_ascii=False) + "\n").encode("utf-8")
+        self.payload += line
+        self.lengths.append(len(line))
+        self.category_ids.append(cat_id)
+        self.difficulties.append(index_difficulty(q))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_category_lookup"]
+        return state
+
+
+def csv_row_to_question(row: Dict[str, str]) -> Dict:
+    q = {"question": row.get("question")}
+
+    if all(column in row for column in CSV_ANSWER_COLUMNS):
+        q["answers"] = [row[column] for column in CSV_ANSWER_COLUMNS]
+
+    correct = (row.get("correct") or "").strip()
+    if correct.upper() in CSV_LETTERS:
+        q["correct"] = CSV_LETTERS[correct.upper()]
+    elif correct.lstrip("-").isdigit():
+        q["correct"] = int(correct)
+    elif correct:
+        q["correct"] = correct
+
+    if row.get("category"):
+        q["category"] = row["category"]
+    difficulty = (row.get("difficulty") or "").strip()
+    if difficulty:
+        q["difficulty"] = int(difficulty) if difficulty.isdigit() else difficulty
+    if row.get("image"):
+        q["image"] = row["image"]
+
+    return {key: value for key, value in q.items() if value is not None}
+
+
+def iter_shard_lines(path: str, start: int, end: int):
+    # Строка принадлежит шарду, в котором она начинается
+    with open(path, "rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line
+
+
+def process_shard(path: str, fmt: str, start: int, end: int,
+                  csv_header: Optional[List[str]]) -> ShardResult:
+    if fmt == "csv":
+        return process_csv_shard(path, start, end, csv_header)
+
+    result = ShardResult()
+    for line in iter_shard_lines(path, start, end):
+        result.lines += 1
+        line_no = result.lines
+        if not line.strip():
+            continue
+
+        try:
+            q = json.loads(line)
+        except ValueError as e:
+            result.errors.append((line_no, f"ошибка разбора: {e}"))
+            continue
+
+        result.add(q, line_no)
+
+    return result
+
+
+def process_csv_shard(path: str, start: int, end: int, csv_header: List[str]) -> ShardResult:
+    # Шард начинается с начала записи (csv_shard_ranges), поэтому один csv.reader
+    # на весь шард собирает и записи с переводами строк внутри кавычек
+    result = ShardResult()
+
+    def lines():
+        for line in iter_shard_lines(path, start, end):
+            result.lines += 1
+            try:
+                yield line.decode("utf-8-sig")
+            except UnicodeDecodeError as e:
+                result.errors.append((result.lines, f"ошибка разбора: {e}"))
+                yield "\n"
+
+    reader = csv.reader(lines(), strict=True)
+    skip_header = start == 0
+    while True:
+        line_no = result.lines + 1
+        try:
+            values = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            # Шард кончается вне кавычек, так что конец данных внутри поля -
+            # кавычка, не закрытая до конца файла
+            message = "кавычка не закрыта до конца файла" \
+                if str(e) == "unexpected end of data" else f"ошибка разбора: {e}"
+            result.errors.append((line_no, message))
+            continue
+        if skip_header:
+            skip_header = False
+            continue
+        if not values:
+            continue
+        result.add(csv_row_to_question(dict(zip(csv_header, values))), line_no)
+
+    return result
+
+
+def process_items(items: List[Tuple[int, object]]) -> ShardResult:
+    result = ShardResult()
+    for line_no, q in items:
+        result.add(q, line_no)
+    return result
+
+
+def shard_ranges(size: int, workers: int) -> List[Tuple[int, int]]:
+    count = max(workers * 4, -(-size // SHARD_BYTES), 1)
+    step = max(1, -(-size // count))
+    return [(start, min(size, start + step)) for start in range(0, size, step)]
+
+
+def count_quotes(f, start: int, stop: int) -> int:
+    f.seek(start)
+    count = 0
+    while start < stop:
+        chunk = f.read(min(READ_BYTES, stop - start))
+        if not chunk:
+            break
+        count += chunk.count(b'"')
+        start += len(chunk)
+    return count
+
+
+def csv_shard_ranges(path: str, workers: int) -> List[Tuple[int, int]]:
+    # Граница шарда переносится на ближайший конец строки вне кавычек: поле
+    # в кавычках (RFC 4180) может содержать перевод строки. Внутри такого поля
+    # число кавычек от начала файла нечетно - экранированная "" добавляет две
+    size = os.path.getsize(path)
+    bounds = [0]
+    quotes = 0
+    pos = 0
+    with open(path, "rb") as f:
+        for start, _ in shard_ranges(size, workers)[1:]:
+            if start <= pos:
+                continue
+            quotes += count_quotes(f, pos, start)
+            pos = start
+            f.seek(pos)
+            while pos < size:
+                line = f.readline()
+                quotes += line.count(b'"')
+                pos += len(line)
+                if line.endswith(b"\n") and quotes % 2 == 0:
+                    break
+            if pos >= size:
+                break
+            bounds.append(pos)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def iter_json_array_items(path: str):
+    # Разбираем массив по элементам, чтобы знать строку каждого вопроса.
+    # Ошибка в самом массиве неисправима и сообщается как файл:строка
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            text = f.read()
+    except UnicodeDecodeError as e:
+        raise ValueError(f"{path}:1: файл не в UTF-8: {e}")
+
+    decoder = json.JSONDecoder()
+    pos = len(text) - len(text.lstrip())
+    line_no = 1 + text.count("\n", 0, pos)
+    if text[pos:pos + 1] != "[":
+        raise ValueError(f"{path}:{line_no}: файл должен содержать список вопросов")
+    pos += 1
+    length = len(text)
+
+    while True:
+        while pos < length and text[pos] in " \t\r\n,":
+            if text[pos] == "\n":
+                line_no += 1
+            pos += 1
+        if pos < length and text[pos] == "]":
+            return
+        if pos >= length:
+            raise ValueError(f"{path}:{line_no}: список вопросов не закрыт")
+        try:
+            item, end = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError as e:
+            error_line = line_no + text.count("\n", pos, e.pos)
+            raise ValueError(f"{path}:{error_line}: ошибка разбора: {e.msg}")
+        yield line_no, item
+        line_no += text.count("\n", pos, end)
+        pos = end
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".csv", ".jsonl", ".json"):
+        return ext[1:]
+    raise ValueError(f"Неизвестный формат файла: '{path}'")
+
+
+def run_shards(path: str, workers: int, pool: ProcessPoolExecutor):
+    fmt = detect_format(path)
+
+    if fmt == "json":
+        # Массив JSON разбирается целиком в этом процессе, в пул уходит только
+        # проверка вопросов: с --workers масштабируются CSV и JSONL
+        items = list(iter_json_array_items(path))
+        step = max(1, -(-len(items) // (workers * 4)))
+        chunks = [items[i:i + step] for i in range(0, len(items), step)]
+        for result in pool.map(process_items, chunks):
+            yield result, 0
+        return
+
+    csv_header = None
+    if fmt == "csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            csv_header = [name.strip() for name in next(csv.reader([f.readline()]))]
+
+    if fmt == "csv":
+        ranges = csv_shard_ranges(path, workers)
+    else:
+        ranges = shard_ranges(os.path.getsize(path), workers)
+    results = pool.map(process_shard, [path] * len(ranges), [fmt] * len(ranges),
+                       [start for start, _ in ranges], [end for _, end in ranges],
+                       [csv_header] * len(ranges))
+    lines_before = 0
+    for result in results:
+        yield result, lines_before
+        lines_before += result.lines
+
+
+class BankBuilder:
+    # Банк собирается во временном файле и подменяет выходной только в finish():
+    # прерванный импорт не портит существующий банк и не оставляет обрезанный
+    def __init__(self, output: str, append: bool):
+        self.output = output
+        self.tmp_path = output + ".tmp"
+        self.offsets = array("q")
+        self.category_ids = array("H")
+        self.difficulties = array("B")
+        self.categories: List[str] = []
+        self._category_lookup: Dict[str, int] = {}
+
+        if append and os.path.exists(output):
+            existing = JsonlQuestionBank(output)
+            existing.close()
+            self.offsets.extend(existing.offsets)
+            self.category_ids.extend(existing.category_ids)
+            self.difficulties.extend(existing.difficulties)
+            self.categories = list(existing.categories)
+            self._category_lookup = {name: i for i, name in enumerate(self.categories)}
+            shutil.copyfile(output, self.tmp_path)
+            self._file = open(self.tmp_path, "ab")
+        else:
+            self._file = open(self.tmp_path, "wb")
+        self._position = self._file.tell()
+
+    def add(self, result: ShardResult):
+        remap = array("H", (self._category_id(name) for name in result.categories))
+        position = self._position
+        for length, cat_id in zip(result.lengths, result.category_ids):
+            self.offsets.append(position)
+            self.category_ids.append(remap[cat_id])
+            position += length
+        self.difficulties.extend(result.difficulties)
+        self._file.write(result.payload)
+        self._position = position
+
+    def finish(self) -> int:
+        self._file.close()
+        os.replace(self.tmp_path, self.output)
+        write_jsonl_index(self.output + ".idx", os.stat(self.output), self.categories,
+                          self.offsets, self.category_ids, self.difficulties)
+        return len(self.offsets)
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+    def _category_id(self, name: str) -> int:
+        cat_id = self._category_lookup.get(name)
+        if cat_id is None:
+            cat_id = self._category_lookup[name] = len(self.categories)
+            self.categories.append(name)
+        return cat_id
+
+
+def import_files(paths: List[str], output: str, workers: int,
+                 append: bool = False) -> Tuple[int, List[str]]:
+    errors: List[str] = []
+    builder = BankBuilder(output, append)
+    imported = 0
+
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            for path in paths:
+                for result, lines_before in run_shards(path, workers, pool):
+                    for line_no, message in result.errors:
+                        errors.append(f"{path}:{lines_before + line_no}: {message}")
+                    builder.add(result)
+                    imported += len(result.lengths)
+    except BaseException:
+        builder.abort()
+        raise
+    builder.finish()
+
+    return imported, errors
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Параллельный импорт вопросов в банк (.jsonl)")
+    parser.add_argument("inputs", nargs="+", help="файлы .csv, .jsonl или .json")
+    parser.add_argument("--output", required=True, help="файл банка .jsonl")
+    parser.add_argument("--append", action="store_true", help="дописать в существующий банк")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="число процессов; разбор .json идет в одном процессе, "
+                             "параллельно разбираются .csv и .jsonl")
+    parser.add_argument("--max-errors", type=int, default=0,
+                        help="сколько ошибок показать (0 - все)")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        imported, errors = import_files(args.inputs, args.output, args.workers, args.append)
+    except (OSError, ValueError) as e:
+        print(f"Импорт прерван, '{args.output}' не изменен: {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+
+    shown = errors[:args.max_errors] if args.max_errors else errors
+    for error in shown:
+        print(error)
+    if len(shown) < len(errors):
+        print(f"... и еще {len(errors) - len(shown)} ошибок")
+    print(f"Импортировано {imported} вопросов в '{args.output}' за {elapsed:.2f} с "
+          f"({args.workers} процессов), ошибок: {len(errors)}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,158 @@
+import argparse
+import marshal
+import os
+import struct
+import subprocess
+import sys
+import time
+import uuid
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+from question_bank import CompiledQuestionBank, compile_questions, format_timings, open_bank
+
+
+SHARED_MAGIC = b"QSHM"
+SHARED_VERSION = 1
+SEGMENTS = ("text", "text_offsets", "correct", "difficulty", "category_ids", "meta")
+SHARED_HEADER = struct.Struct("<4sHHQ" + "QQ" * len(SEGMENTS))
+ALIGN = 8
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Main.py")
+
+
+def _aligned(size: int) -> int:
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+def compiled_bank(bank) -> CompiledQuestionBank:
+    if isinstance(bank, CompiledQuestionBank):
+        return bank
+    return CompiledQuestionBank(compile_questions([bank[idx] for idx in range(len(bank))]), bank.path)
+
+
+def publish_bank(bank: CompiledQuestionBank, name: Optional[str] = None) -> shared_memory.SharedMemory:
+    # Колонки банка одним блоком разделяемой памяти: заголовок со смещениями,
+    # затем буферы колонок и marshal с редкими полями (категории, картинки, extras)
+    meta = marshal.dumps({
+        "offset_type": bank.text_offsets.typecode,
+        "categories": bank.categories,
+        "images": bank.images,
+        "extras": bank.extras,
+        "path": bank.path,
+    })
+    buffers = [bank.text, bank.text_offsets, bank.correct, bank.difficulties, bank.category_ids, meta]
+    sizes = [memoryview(buffer).nbytes for buffer in buffers]
+
+    offsets = []
+    position = _aligned(SHARED_HEADER.size)
+    for size in sizes:
+        offsets.append(position)
+        position = _aligned(position + size)
+
+    shm = shared_memory.SharedMemory(name=name or f"quiz-{uuid.uuid4().hex[:12]}",
+                                     create=True, size=position)
+    for buffer, offset, size in zip(buffers, offsets, sizes):
+        shm.buf[offset:offset + size] = memoryview(buffer).cast("B")
+    fields = [value for pair in zip(offsets, sizes) for value in pair]
+    SHARED_HEADER.pack_into(shm.buf, 0, SHARED_MAGIC, SHARED_VERSION, 0, len(bank), *fields)
+    return shm
+
+
+def _attach_memory(name: str) -> shared_memory.SharedMemory:
+    # Экраны только читают блок; удаляет его хост. До Python 3.13 трекер ресурсов
+    # удалил бы блок при выходе первого же экрана, поэтому снимаем его с учета
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedQuestionBank(CompiledQuestionBank):
+    # Те же колонки, что у CompiledQuestionBank, но как memoryview поверх
+    # разделяемой памяти хоста: подключение не копирует и не разбирает банк
+    def __init__(self, name: str):
+        self.shm = _attach_memory(name)
+        buf = self.shm.buf
+        magic, version, _, size, *fields = SHARED_HEADER.unpack_from(buf, 0)
+        if magic != SHARED_MAGIC or version != SHARED_VERSION:
+            self.shm.close()
+            raise ValueError(f"Блок '{name}' не содержит банк вопросов")
+
+        # Все колонки только для чтения: запись одного экрана в общий блок
+        # испортила бы банк всем остальным
+        views = {segment: buf[fields[2 * i]:fields[2 * i] + fields[2 * i + 1]].toreadonly()
+                 for i, segment in enumerate(SEGMENTS)}
+        meta_view = views.pop("meta")
+        meta = marshal.loads(meta_view)
+
+        self.path = meta["path"]
+        self.text = views["text"]
+        self.text_offsets = views["text_offsets"].cast(meta["offset_type"])
+        self.correct = views["correct"]
+        self.difficulties = views["difficulty"]
+        self.category_ids = views["category_ids"].cast("H")
+        self.categories = [sys.intern(name) for name in meta["categories"]]
+        self.images = meta["images"]
+        self.extras = meta["extras"]
+        self.size = size
+        self._views = [self.text_offsets, self.category_ids, meta_view, *views.values()]
+
+    def close(self):
+        # Пока живы memoryview на буфер, SharedMemory.close() бросает BufferError
+        for view in self._views:
+            view.release()
+        self._views = []
+        self.shm.close()
+
+
+def attach_bank(name: str) -> SharedQuestionBank:
+    start = time.perf_counter()
+    bank = SharedQuestionBank(name)
+    bank.warm_start = True
+    bank.load_timings = {"attach": time.perf_counter() - start}
+    return bank
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(
+        description="Несколько экранов квиза с одним банком вопросов в разделяемой памяти",
+        epilog="Остальные аргументы передаются каждому экрану (например, --adaptive)")
+    parser.add_argument("questions", help="банк вопросов (.json или .jsonl)")
+    parser.add_argument("--screens", type=int, default=2, help="сколько экранов запустить")
+    return parser.parse_known_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args, game_args = parse_args(argv)
+    if "--hot-reload" in game_args:
+        print("--hot-reload не поддерживается: экраны читают общий банк хоста")
+        return 2
+
+    bank = compiled_bank(open_bank(args.questions))
+    print(f"Загружено {len(bank)} вопросов ({format_timings(bank)})")
+    shm = publish_bank(bank, None)
+    bank.close()
+    print(f"Банк в разделяемой памяти '{shm.name}': {shm.size / 1024 / 1024:.1f} МБ")
+
+    screens = []
+    try:
+        for _ in range(args.screens):
+            screens.append(subprocess.Popen(
+                [sys.executable, MAIN_SCRIPT, "--shared-bank", shm.name, *game_args]))
+        print(f"Запущено экранов: {len(screens)}")
+        for screen in screens:
+            screen.wait()
+    except KeyboardInterrupt:
+        for screen in screens:
+            screen.terminate()
+    finally:
+        shm.close()
+        shm.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
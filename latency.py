@@ -0,0 +1,330 @@
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS
+LINEAR_LIMIT = 2 * SUB_BUCKETS
+MAX_BITS = 42
+BUCKET_COUNT = LINEAR_LIMIT + (MAX_BITS - SUB_BITS - 1) * SUB_BUCKETS
+MAX_VALUE = (1 << MAX_BITS) - 1
+PERCENTILES = (50, 90, 99)
+EXPORT_VERSION = 1
+DEFAULT_LATENCY_FILE = "latency.json"
+ALL_CATEGORIES = "*"
+
+# shown -> первый ввод (ответ, подсказка, пропуск), shown -> нажатие ответа,
+# нажатие ответа -> конец check_answer
+METRICS = ("first_input", "answer", "handler")
+METRIC_TITLES = {"first_input": "первое действие", "answer": "ответ", "handler": "отклик"}
+
+
+def bucket_index(value: int) -> int:
+    # Лог-линейные корзины как в HdrHistogram: до 2*SUB_BUCKETS - по одной на значение,
+    # дальше в каждой степени двойки SUB_BUCKETS корзин, ошибка не больше 1/SUB_BUCKETS
+    if value < LINEAR_LIMIT:
+        return max(0, value)
+    value = min(value, MAX_VALUE)
+    shift = value.bit_length() - SUB_BITS - 1
+    return LINEAR_LIMIT + (shift - 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+
+def bucket_range(index: int):
+    if index < LINEAR_LIMIT:
+        return index, index
+    shift = (index - LINEAR_LIMIT) // SUB_BUCKETS + 1
+    top = (index - LINEAR_LIMIT) % SUB_BUCKETS + SUB_BUCKETS
+    return top << shift, ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    # Счетчики по корзинам; корзин не больше BUCKET_COUNT (~1200), поэтому память
+    # ограничена независимо от числа замеров. Хранятся только непустые корзины:
+    # у гистограммы одной игры их единицы, и слияние с накопленной почти бесплатно
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value: int):
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        if not self.count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: "LatencyHistogram"):
+        if not other.count:
+            return
+        counts = self.counts
+        for index, count in other.counts.items():
+            counts[index] = counts.get(index, 0) + count
+        self.min = other.min if not self.count else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def percentiles(self, ps: Iterable[float]) -> List[int]:
+        # Середина корзины, в которую попал ранг; ошибка не больше полуширины корзины
+        ps = list(ps)
+        if not self.count:
+            return [0] * len(ps)
+        ranks = [max(1, -(-self.count * p // 100)) for p in ps]
+        result = [self.max] * len(ps)
+        pending = sorted(range(len(ps)), key=ranks.__getitem__)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            while pending and ranks[pending[0]] <= seen:
+                low, high = bucket_range(index)
+                result[pending.pop(0)] = min(self.max, max(self.min, (low + high) // 2))
+            if not pending:
+                break
+        return result
+
+    def percentile(self, p: float) -> int:
+        return self.percentiles((p,))[0]
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "buckets": {str(index): count for index, count in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        hist = cls()
+        hist.counts = {int(index): count for index, count in data.get("buckets", {}).items()
+                       if 0 <= int(index) < BUCKET_COUNT}
+        hist.count = data.get("count", 0)
+        hist.total = data.get("total", 0)
+        hist.min = data.get("min", 0)
+        hist.max = data.get("max", 0)
+        return hist
+
+
+def new_metrics() -> Dict[str, LatencyHistogram]:
+    return {metric: LatencyHistogram() for metric in METRICS}
+
+
+def merge_categories(target: Dict[str, Dict[str, LatencyHistogram]],
+                     source: Dict[str, Dict[str, LatencyHistogram]]):
+    for category, metrics in source.items():
+        into = target.get(category)
+        if into is None:
+            into = target[category] = new_metrics()
+        for metric, hist in metrics.items():
+            into.setdefault(metric, LatencyHistogram()).merge(hist)
+
+
+def combined(categories: Dict[str, Dict[str, LatencyHistogram]]) -> Dict[str, LatencyHistogram]:
+    total = new_metrics()
+    for metrics in categories.values():
+        for metric, hist in metrics.items():
+            total[metric].merge(hist)
+    return total
+
+
+def percentiles(hist: LatencyHistogram) -> Dict[str, float]:
+    # В миллисекундах
+    result = {f"p{p}": value / 1e6 for p, value in zip(PERCENTILES, hist.percentiles(PERCENTILES))}
+    result["count"] = hist.count
+    result["mean"] = hist.total / hist.count / 1e6 if hist.count else 0.0
+    result["max"] = hist.max / 1e6
+    return result
+
+
+class LatencyRecorder:
+    # Метки perf_counter_ns: вопрос показан, первое действие игрока, начало и конец
+    # обработки ответа. Гистограммы ведутся по категориям для текущей игры и для
+    # всей сессии; с прошлыми сессиями они сливаются только при сохранении
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.game: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.session: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._category: Optional[str] = None
+        self._shown_at = 0
+        self._first_input = True
+        self._game_merged = True
+
+    def start_game(self):
+        self.game = {}
+        self._game_merged = False
+        self._category = None
+
+    def end_game(self):
+        # Повторный вызов для той же игры не должен удваивать замеры сессии
+        if not self._game_merged:
+            merge_categories(self.session, self.game)
+            self._game_merged = True
+        self._category = None
+
+    def _metrics(self) -> Dict[str, LatencyHistogram]:
+        metrics = self.game.get(self._category)
+        if metrics is None:
+            metrics = self.game[self._category] = new_metrics()
+        return metrics
+
+    def question_shown(self, category: str):
+        self._category = category
+        self._shown_at = self.clock()
+        self._first_input = False
+
+    def input(self, now: Optional[int] = None):
+        if self._category is None or self._first_input:
+            return
+        now = self.clock() if now is None else now
+        self._first_input = True
+        self._metrics()["first_input"].record(now - self._shown_at)
+
+    def answer_started(self, now: int):
+        if self._category is not None:
+            self.input(now)
+            self._metrics()["answer"].record(now - self._shown_at)
+
+    def answer_done(self, started: int):
+        if self._category is not None:
+            self._metrics()["handler"].record(self.clock() - started)
+
+    def save(self, path: str) -> int:
+        # Файл перечитывается перед записью под блокировкой: несколько экранов
+        # киоска дописывают свои сессии в один файл, не затирая чужие
+        with export_lock(path):
+            categories: Dict[str, Dict[str, LatencyHistogram]] = {}
+            sessions = 1
+            if os.path.exists(path):
+                data = read_export(path)
+                categories = data["histograms"]
+                sessions += data.get("sessions", 0)
+            merge_categories(categories, self.session)
+            write_export(path, categories, sessions)
+        return sessions
+
+
+@contextmanager
+def export_lock(path: str):
+    # Блокируется отдельный файл: сам файл выгрузки подменяется через os.replace,
+    # и блокировка на нем осталась бы на старой версии
+    with open(path + ".lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def summary(categories: Dict[str, Dict[str, LatencyHistogram]]) -> Dict:
+    report = {category: {metric: percentiles(hist) for metric, hist in metrics.items()}
+              for category, metrics in categories.items()}
+    report[ALL_CATEGORIES] = {metric: percentiles(hist)
+                              for metric, hist in combined(categories).items()}
+    return report
+
+
+def read_export(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != EXPORT_VERSION:
+        raise ValueError(f"{path}: неподдерживаемая версия {data.get('version')}")
+    data["histograms"] = {category: {metric: LatencyHistogram.from_dict(hist)
+                                     for metric, hist in metrics.items()}
+                          for category, metrics in data.get("histograms", {}).items()}
+    return data
+
+
+def write_export(path: str, categories: Dict[str, Dict[str, LatencyHistogram]], sessions: int):
+    # summary - готовые перцентили в мс для чтения людьми и дашбордами,
+    # histograms - счетчики корзин для слияния с другими выгрузками
+    data = {
+        "version": EXPORT_VERSION,
+        "unit": "ms",
+        "sub_bucket_bits": SUB_BITS,
+        "sessions": sessions,
+        "summary": summary(categories),
+        "histograms": {category: {metric: hist.to_dict() for metric, hist in metrics.items()}
+                       for category, metrics in categories.items()},
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def format_summary(report: Dict[str, Dict[str, float]]) -> str:
+    lines = []
+    for metric in METRICS:
+        stats = report.get(metric)
+        if not stats or not stats["count"]:
+            continue
+        lines.append(f"{METRIC_TITLES[metric]}: " +
+                     ", ".join(f"p{p} {format_ms(stats[f'p{p}'])}" for p in PERCENTILES))
+    return "\n".join(lines)
+
+
+def format_ms(ms: float) -> str:
+    if ms >= 1000:
+        return f"{ms / 1000:.1f} с"
+    if ms >= 10:
+        return f"{ms:.0f} мс"
+    return f"{ms:.2f} мс"
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Отчет по задержкам ответов и слияние выгрузок")
+    parser.add_argument("files", nargs="+", help="выгрузки latency.json")
+    parser.add_argument("-o", "--output", default=None, help="записать слитую выгрузку")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    categories: Dict[str, Dict[str, LatencyHistogram]] = {}
+    sessions = 0
+    for path in args.files:
+        data = read_export(path)
+        merge_categories(categories, data["histograms"])
+        sessions += data.get("sessions", 0)
+
+    report = summary(categories)
+    print(f"Сессий: {sessions}")
+    for category in sorted(report, key=lambda name: (name != ALL_CATEGORIES, name)):
+        title = "все категории" if category == ALL_CATEGORIES else category
+        print(f"[{title}]")
+        for line in format_summary(report[category]).splitlines():
+            print(f"  {line}")
+
+    if args.output:
+        write_export(args.output, categories, sessions)
+        print(f"Слитая выгрузка записана в '{args.output}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,259 @@
+import argparse
+import datetime
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+
+DEFAULT_DB = "leaderboard.sqlite3"
+FLUSH_INTERVAL = 0.5
+BATCH_GAMES = 512
+TOP_K = 10
+PERIODS = ("day", "week", "month")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    questions INTEGER NOT NULL,
+    played_at REAL NOT NULL,
+    day INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    month INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_score ON games(score DESC, played_at);
+CREATE INDEX IF NOT EXISTS games_by_day ON games(day, score DESC, played_at);
+CREATE INDEX IF NOT EXISTS games_by_week ON games(week, score DESC, played_at);
+CREATE INDEX IF NOT EXISTS games_by_month ON games(month, score DESC, played_at);
+
+CREATE TABLE IF NOT EXISTS game_categories (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    category TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    PRIMARY KEY (game_id, category)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS categories_by_points ON game_categories(category, points DESC, game_id);
+"""
+
+
+class GameResult(NamedTuple):
+    player: str
+    score: int
+    correct: int
+    questions: int
+    played_at: float
+    # категория -> (верных ответов, очков)
+    categories: Dict[str, tuple]
+
+
+class ScoreRow(NamedTuple):
+    player: str
+    score: int
+    correct: int
+    questions: int
+    played_at: float
+
+
+def period_keys(played_at: float) -> Dict[str, int]:
+    # Календарные периоды по местному времени: каждый - отдельный индекс (период, очки),
+    # так что лучшие за день/неделю/месяц читаются с начала индекса, без сортировки
+    date = datetime.date.fromtimestamp(played_at)
+    ordinal = date.toordinal()
+    return {"day": ordinal, "week": (ordinal - 1) // 7, "month": date.year * 12 + date.month - 1}
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    # WAL: читатель в потоке Tk не ждет пишущий поток, а запись - только дописывание
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class LeaderboardWriter:
+    # Результаты копятся в очереди и пишутся пачками в одной транзакции
+    # из своего соединения в фоновом потоке; submit() только кладет в очередь.
+    # После каждой пачки поток сам перечитывает лучшие top_k результатов, так что
+    # потоку Tk для таблицы рекордов не нужно обращаться к базе
+    def __init__(self, path: str = DEFAULT_DB, flush_interval: float = FLUSH_INTERVAL,
+                 top_k: int = TOP_K):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.top_k = top_k
+        self.top_scores: List[ScoreRow] = []
+        self.games_written = 0
+        self.transactions = 0
+        connect(path).close()
+
+        self._queue: "queue.SimpleQueue[Optional[GameResult]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._worker, name="leaderboard", daemon=True)
+        self._thread.start()
+
+    def submit(self, result: GameResult):
+        self._queue.put(result)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _worker(self):
+        board = Leaderboard(self.path)
+        conn = board.conn
+        self.top_scores = board.top(self.top_k)
+        running = True
+
+        while running:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch: List[GameResult] = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= BATCH_GAMES:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if item is None:
+                running = False
+
+            if batch:
+                self._write(conn, batch)
+                self.top_scores = board.top(self.top_k)
+
+        board.close()
+
+    def _write(self, conn: sqlite3.Connection, batch: List[GameResult]):
+        with conn:
+            for result in batch:
+                periods = period_keys(result.played_at)
+                cursor = conn.execute(
+                    "INSERT INTO games (player, score, correct, questions, played_at, day, week, month) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (result.player, result.score, result.correct, result.questions,
+                     result.played_at, periods["day"], periods["week"], periods["month"]))
+                game_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT INTO game_categories (game_id, category, correct, points) VALUES (?, ?, ?, ?)",
+                    [(game_id, category, correct, points)
+                     for category, (correct, points) in result.categories.items()])
+        self.games_written += len(batch)
+        self.transactions += 1
+
+
+class Leaderboard:
+    # Чтение таблицы рекордов; каждый запрос - проход по началу одного индекса
+    def __init__(self, path: str = DEFAULT_DB):
+        self.conn = connect(path)
+
+    def top(self, k: int = TOP_K, category: Optional[str] = None,
+            period: Optional[str] = None, now: Optional[float] = None) -> List[ScoreRow]:
+        if category is not None:
+            # За категорию: очки и верные ответы только по ее вопросам
+            rows = self.conn.execute(
+                "SELECT g.player, c.points, c.correct, g.questions, g.played_at "
+                "FROM game_categories AS c JOIN games AS g ON g.id = c.game_id "
+                "WHERE c.category = ? ORDER BY c.points DESC, c.game_id LIMIT ?",
+                (category, k))
+        elif period is not None:
+            if period not in PERIODS:
+                raise ValueError(f"Неизвестный период: {period}")
+            key = period_keys(time.time() if now is None else now)[period]
+            rows = self.conn.execute(
+                f"SELECT player, score, correct, questions, played_at FROM games "
+                f"WHERE {period} = ? ORDER BY score DESC, played_at LIMIT ?", (key, k))
+        else:
+            rows = self.conn.execute(
+                "SELECT player, score, correct, questions, played_at FROM games "
+                "ORDER BY score DESC, played_at LIMIT ?", (k,))
+        return [ScoreRow(*row) for row in rows]
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class ScoreRecorder:
+    # Считает по переходам QuizEngine очки и верные ответы по категориям
+    # и по окончании игры отправляет результат в LeaderboardWriter
+    def __init__(self, writer: LeaderboardWriter, player: str = "Игрок"):
+        self.writer = writer
+        self.player = player
+        self.engine = None
+        self.last_result: Optional[GameResult] = None
+        self._categories: Dict[str, List[int]] = {}
+        self._questions = 0
+
+    def attach(self, engine):
+        self.engine = engine
+        engine.listeners.append(self.on_transition)
+        return self
+
+    def _category(self, transition) -> List[int]:
+        category = (transition.question or {}).get("category", "Общее")
+        totals = self._categories.get(category)
+        if totals is None:
+            totals = self._categories[category] = [0, 0]
+        return totals
+
+    def on_transition(self, transition):
+        kind = transition.kind
+        if kind == "start":
+            self._categories = {}
+            self._questions = 0
+        elif kind == "question":
+            self._questions += 1
+        elif kind in ("correct", "incorrect", "skip", "timeout", "hint"):
+            totals = self._category(transition)
+            totals[0] += kind == "correct"
+            totals[1] += transition.points
+        elif kind == "finished" and self._questions:
+            self.last_result = GameResult(
+                self.player, transition.score, self.engine.correct_count, self._questions,
+                time.time(), {name: tuple(totals) for name, totals in self._categories.items()})
+            self.writer.submit(self.last_result)
+
+
+def format_row(place: int, row: ScoreRow) -> str:
+    played = time.strftime("%d.%m.%Y %H:%M", time.localtime(row.played_at))
+    return f"{place:>3}. {row.player:<16} {row.score:>6} очков, верных {row.correct}/{row.questions}  {played}"
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Таблица рекордов квиза")
+    parser.add_argument("--db", default=DEFAULT_DB, help="файл базы SQLite")
+    parser.add_argument("-k", type=int, default=TOP_K, help="сколько мест показать")
+    parser.add_argument("--category", default=None, help="лучшие по одной категории")
+    parser.add_argument("--period", choices=PERIODS, default=None,
+                        help="лучшие за текущий день, неделю или месяц")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    board = Leaderboard(args.db)
+    start = time.perf_counter()
+    rows = board.top(args.k, args.category, args.period)
+    elapsed = time.perf_counter() - start
+
+    for place, row in enumerate(rows, 1):
+        print(format_row(place, row))
+    print(f"Всего игр: {board.count()}, запрос {elapsed * 1000:.3f} мс")
+    board.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
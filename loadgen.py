@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict, List
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+async def run_client(host: str, port: int, room: str, name: str, starter: bool,
+                     ready: asyncio.Event, latencies: List[float], stats: Dict,
+                     think_time: float, rng: random.Random):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((json.dumps({"type": "join", "room": room, "name": name}) + "\n").encode())
+
+    sent_at: Dict[int, float] = {}
+    seq = 0
+    loop = asyncio.get_running_loop()
+
+    def send_answer(answer_seq: int, data: bytes):
+        if not writer.is_closing():
+            sent_at[answer_seq] = time.perf_counter()
+            writer.write(data)
+
+    try:
+        await ready.wait()
+        if starter:
+            writer.write(b'{"type": "start"}\n')
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            kind = message.get("type")
+
+            if kind == "question":
+                seq += 1
+                data = (json.dumps({"type": "answer", "choice": rng.randrange(4),
+                                    "number": message["number"], "seq": seq}) + "\n").encode()
+                # Пауза "на раздумье" не должна задерживать чтение ответов сервера
+                loop.call_later(rng.random() * think_time, send_answer, seq, data)
+            elif kind == "answer_result":
+                started = sent_at.pop(message.get("seq"), None)
+                if started is not None:
+                    latencies.append(time.perf_counter() - started)
+                stats["answers"] += 1
+            elif kind == "finished":
+                stats["games"] += 1
+                break
+            elif kind == "error":
+                stats["errors"] += 1
+    finally:
+        writer.close()
+
+
+async def run(args) -> Dict:
+    rng = random.Random(args.seed)
+    latencies: List[float] = []
+    stats = {"answers": 0, "games": 0, "errors": 0}
+    ready = asyncio.Event()
+
+    tasks = []
+    for room_no in range(args.rooms):
+        for player_no in range(args.players):
+            tasks.append(asyncio.create_task(run_client(
+                args.host, args.port, f"load-{room_no}", f"bot{player_no}",
+                player_no == args.players - 1, ready, latencies, stats,
+                args.think_time, random.Random(rng.random()))))
+
+    # Даем всем подключиться, чтобы комнаты стартовали полными
+    await asyncio.sleep(args.connect_wait)
+    started = time.perf_counter()
+    ready.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "clients": len(tasks),
+        "games": stats["games"],
+        "answers": stats["answers"],
+        "errors": stats["errors"],
+        "elapsed_s": elapsed,
+        "answers_per_s": stats["answers"] / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Генератор нагрузки для server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--players", type=int, default=10, help="игроков в комнате")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="максимальная случайная пауза перед ответом, с")
+    parser.add_argument("--connect-wait", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    result = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"Клиентов: {result['clients']}, игр: {result['games']}, ответов: {result['answers']}, "
+              f"ошибок: {result['errors']}")
+        print(f"Время: {result['elapsed_s']:.2f} с, {result['answers_per_s']:.0f} ответов/с")
+        print(f"Задержка ответа: p50 {result['p50_ms']:.2f} мс, p99 {result['p99_ms']:.2f} мс")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,150 @@
+import time
+import tkinter as tk
+from collections import deque
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+
+INFO_TIMEOUT_MS = 5_000
+PROMPT_TIMEOUT_MS = 30_000
+LAG_INTERVAL_MS = 100
+STALL_THRESHOLD_MS = 50
+
+KIND_COLORS = {
+    "info": "#2196F3",
+    "warning": "#FF9800",
+    "error": "#F44336",
+}
+
+
+class Panel(NamedTuple):
+    tag: str
+    title: str
+    message: str
+    kind: str
+    buttons: List[Tuple[str, Optional[Callable[[], None]]]]
+    timeout_ms: Optional[int]
+    on_timeout: Optional[Callable[[], None]]
+
+
+class Overlay:
+    # Панель поверх окна вместо messagebox: цикл событий не останавливается,
+    # таймер и фоновые задачи продолжают работать. Панели показываются по очереди,
+    # каждая закрывается кнопкой или сама по истечении timeout_ms
+    def __init__(self, root):
+        self.root = root
+        self.queue: Deque[Panel] = deque()
+        self.current: Optional[Panel] = None
+        self.shown = 0
+        self.timed_out = 0
+        self._frame = None
+        self._timeout_id = None
+
+    def show(self, title: str, message: str, kind: str = "info", tag: str = "",
+             buttons: Optional[List[Tuple[str, Optional[Callable[[], None]]]]] = None,
+             timeout_ms: Optional[int] = INFO_TIMEOUT_MS,
+             on_timeout: Optional[Callable[[], None]] = None):
+        self.queue.append(Panel(tag, title, message, kind, buttons or [("OK", None)],
+                                timeout_ms, on_timeout))
+        if self.current is None:
+            self._show_next()
+
+    def dismiss(self, tag: Optional[str] = None):
+        # Убирает панели с тегом tag (или все): например, "время вышло" при переходе к вопросу
+        if tag is not None:
+            self.queue = deque(panel for panel in self.queue if panel.tag != tag)
+        else:
+            self.queue.clear()
+        if self.current is not None and (tag is None or self.current.tag == tag):
+            self._close(None)
+
+    def _show_next(self):
+        if not self.queue:
+            return
+        panel = self.current = self.queue.popleft()
+        self.shown += 1
+        color = KIND_COLORS.get(panel.kind, KIND_COLORS["info"])
+
+        frame = self._frame = tk.Frame(self.root, bg="white", bd=3, relief="ridge",
+                                       highlightthickness=3, highlightbackground=color)
+        tk.Label(frame, text=panel.title, font=("Arial", 16, "bold"),
+                 fg="white", bg=color, padx=20, pady=8).pack(fill="x")
+        tk.Label(frame, text=panel.message, font=("Arial", 13), bg="white",
+                 wraplength=600, justify="center", padx=20, pady=15).pack()
+
+        buttons = tk.Frame(frame, bg="white")
+        buttons.pack(pady=(0, 15))
+        for text, action in panel.buttons:
+            tk.Button(buttons, text=text, font=("Arial", 12, "bold"), padx=15,
+                      command=lambda action=action: self._close(action)).pack(side="left", padx=8)
+
+        frame.place(relx=0.5, rely=0.5, anchor="center")
+        frame.lift()
+        if panel.timeout_ms is not None:
+            self._timeout_id = self.root.after(panel.timeout_ms, self._on_timeout)
+
+    def _on_timeout(self):
+        self._timeout_id = None
+        self.timed_out += 1
+        self._close(self.current.on_timeout if self.current is not None else None)
+
+    def _close(self, action: Optional[Callable[[], None]]):
+        if self._timeout_id is not None:
+            self.root.after_cancel(self._timeout_id)
+            self._timeout_id = None
+        if self._frame is not None:
+            self._frame.destroy()
+            self._frame = None
+        self.current = None
+
+        if action is not None:
+            action()
+        if self.current is None:
+            self._show_next()
+
+
+class LoopLagMonitor:
+    # Раз в interval_ms ставит себе after и смотрит, насколько он опоздал:
+    # опоздание - время, когда цикл событий был занят (или стоял в модальном окне)
+    def __init__(self, root, interval_ms: int = LAG_INTERVAL_MS,
+                 stall_threshold_ms: int = STALL_THRESHOLD_MS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.root = root
+        self.interval = interval_ms / 1000
+        self.interval_ms = interval_ms
+        self.stall_threshold = stall_threshold_ms / 1000
+        self.clock = clock
+        self.samples = 0
+        self.blocked = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._expected_at = 0.0
+        self._after_id = None
+
+    def start(self):
+        self._schedule()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _schedule(self):
+        self._expected_at = self.clock() + self.interval
+        self._after_id = self.root.after(self.interval_ms, self._on_after)
+
+    def _on_after(self):
+        lag = max(0.0, self.clock() - self._expected_at)
+        self.samples += 1
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.stall_threshold:
+            self.stalls += 1
+            self.blocked += lag
+        self._schedule()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "samples": self.samples,
+            "stalls": self.stalls,
+            "blocked_ms": self.blocked * 1000,
+            "max_lag_ms": self.max_lag * 1000,
+        }
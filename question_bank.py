@@ -0,0 +1,480 @@
+import hashlib
+import json
+import os
+import marshal
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from array import array
+from typing import Dict, List, Optional
+
+
+REQUIRED_FIELDS = {"question", "answers", "correct"}
+
+INDEX_MAGIC = b"QIDX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sHQQII")
+
+CACHE_MAGIC = b"QBC1"
+CACHE_SCHEMA_VERSION = 2
+CACHE_HEADER = struct.Struct("<4sHBB32s")
+CORE_FIELDS = ("question", "answers", "correct", "category", "difficulty", "image")
+TEXT_FIELDS = 5
+
+
+def question_problems(q) -> List[str]:
+    missing = REQUIRED_FIELDS - set(q.keys())
+    if missing:
+        return [f"отсутствуют поля {missing}"]
+
+    problems = []
+    if not isinstance(q["question"], str):
+        problems.append("поле 'question' должно быть строкой")
+
+    if not isinstance(q["answers"], list) or len(q["answers"]) != 4:
+        problems.append("должно быть 4 варианта ответа")
+
+    if not isinstance(q["correct"], int) or not (0 <= q["correct"] <= 3):
+        problems.append("'correct' должен быть числом от 0 до 3")
+
+    return problems
+
+
+def question_errors(q, number: int) -> List[str]:
+    if not isinstance(q, dict):
+        return [f"Вопрос {number} должен быть словарем"]
+    return [f"Вопрос {number}: {problem}" for problem in question_problems(q)]
+
+
+def validate_question(q, number: int):
+    errors = question_errors(q, number)
+    if errors:
+        raise ValueError(errors[0])
+
+
+def index_difficulty(q: Dict) -> int:
+    difficulty = q.get("difficulty", 1)
+    if not isinstance(difficulty, int) or not (0 <= difficulty <= 255):
+        return 1
+    return difficulty
+
+
+def write_jsonl_index(index_path: str, stat, categories: List[str], offsets: array,
+                      category_ids: array, difficulties: array):
+    cat_bytes = json.dumps(categories, ensure_ascii=False).encode("utf-8")
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, stat.st_size,
+                                  stat.st_mtime_ns, len(offsets), len(cat_bytes)))
+        f.write(cat_bytes)
+        offsets.tofile(f)
+        category_ids.tofile(f)
+        difficulties.tofile(f)
+    os.replace(tmp_path, index_path)
+
+
+class QuestionBank(ABC):
+    # Бэкенд без любого из этих методов не создастся: ошибка при открытии банка,
+    # а не посреди игры
+    path = None
+    warm_start = False
+    load_timings: Dict[str, float] = {}
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def __getitem__(self, idx: int) -> Dict:
+        ...
+
+    @abstractmethod
+    def category(self, idx: int) -> str:
+        ...
+
+    @abstractmethod
+    def difficulty(self, idx: int) -> int:
+        ...
+
+    def close(self):
+        pass
+
+
+class ListQuestionBank(QuestionBank):
+    def __init__(self, questions: List[Dict], path: Optional[str] = None):
+        self.questions = questions
+        self.path = path
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def __getitem__(self, idx: int) -> Dict:
+        return self.questions[idx]
+
+    def category(self, idx: int) -> str:
+        return self.questions[idx].get("category", "Общее")
+
+    def difficulty(self, idx: int) -> int:
+        return self.questions[idx].get("difficulty", 1)
+
+
+class CompiledQuestionBank(QuestionBank):
+    # Колонки вместо списка словарей: тексты вопроса и ответов лежат в одном
+    # UTF-8 буфере со смещениями, correct/difficulty - по байту на вопрос,
+    # категория - номер в таблице интернированных строк. Словарь собирается
+    # только при обращении к вопросу
+    def __init__(self, columns: Dict, path: Optional[str] = None):
+        self.path = path
+        self.text = columns["text"]
+        self.text_offsets = array(columns["offset_type"])
+        self.text_offsets.frombytes(columns["text_offsets"])
+        self.correct = array("B", columns["correct"])
+        self.difficulties = array("B", columns["difficulty"])
+        self.category_ids = array("H", columns["category_ids"])
+        self.categories = [sys.intern(name) for name in columns["categories"]]
+        self.images = columns["images"]
+        self.extras = columns["extras"]
+        self.size = len(self.correct)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _text(self, field: int) -> str:
+        offsets = self.text_offsets
+        return str(self.text[offsets[field]:offsets[field + 1]], "utf-8", "surrogatepass")
+
+    def __getitem__(self, idx: int) -> Dict:
+        if idx < 0:
+            idx += self.size
+        if not 0 <= idx < self.size:
+            raise IndexError("номер вопроса вне диапазона")
+        base = TEXT_FIELDS * idx
+        q = {
+            "question": self._text(base),
+            "answers": [self._text(base + 1), self._text(base + 2),
+                        self._text(base + 3), self._text(base + 4)],
+            "correct": self.correct[idx],
+            "category": self.categories[self.category_ids[idx]],
+            "difficulty": self.difficulties[idx],
+            "image": self.images.get(idx),
+        }
+        extra = self.extras.get(idx)
+        if extra:
+            q.update(extra)
+        return q
+
+    def category(self, idx: int) -> str:
+        extra = self.extras.get(idx)
+        if extra and "category" in extra:
+            return extra["category"]
+        return self.categories[self.category_ids[idx]]
+
+    def difficulty(self, idx: int) -> int:
+        extra = self.extras.get(idx)
+        if extra and "difficulty" in extra:
+            return extra["difficulty"]
+        return self.difficulties[idx]
+
+
+def compile_questions(questions: List[Dict]) -> Dict:
+    text = bytearray()
+    text_offsets = [0]
+    correct = bytearray()
+    difficulties = bytearray()
+    category_ids = array("H")
+    categories = []
+    category_lookup = {}
+    images = {}
+    extras = {}
+
+    for i, q in enumerate(questions):
+        extra = {key: value for key, value in q.items() if key not in CORE_FIELDS}
+
+        category = q.get("category", "Общее")
+        if not isinstance(category, str):
+            extra["category"] = category
+            category = "Общее"
+        cat_id = category_lookup.get(category)
+        if cat_id is None:
+            cat_id = category_lookup[category] = len(categories)
+            categories.append(category)
+
+        difficulty = q.get("difficulty", 1)
+        if not isinstance(difficulty, int) or not (0 <= difficulty <= 255):
+            extra["difficulty"] = difficulty
+            difficulty = 1
+
+        answers = q["answers"]
+        if not all(isinstance(answer, str) for answer in answers):
+            # Нестроковые ответы в общий буфер не кладем, они остаются как есть
+            extra["answers"] = answers
+            answers = ("", "", "", "")
+
+        for field in (q["question"], *answers):
+            text += field.encode("utf-8", "surrogatepass")
+            text_offsets.append(len(text))
+        correct.append(q["correct"])
+        difficulties.append(difficulty)
+        category_ids.append(cat_id)
+        if q.get("image") is not None:
+            images[i] = q["image"]
+        if extra:
+            extras[i] = extra
+
+    offset_type = "I" if len(text) <= 0xFFFFFFFF else "Q"
+    return {
+        "text": bytes(text),
+        "text_offsets": array(offset_type, text_offsets).tobytes(),
+        "offset_type": offset_type,
+        "correct": bytes(correct),
+        "difficulty": bytes(difficulties),
+        "category_ids": category_ids.tobytes(),
+        "categories": categories,
+        "images": images,
+        "extras": extras,
+    }
+
+
+class JsonlQuestionBank(QuestionBank):
+    def __init__(self, path: str, rebuild: bool = False):
+        self.path = path
+        self.index_path = path + ".idx"
+
+        start = time.perf_counter()
+        stat = os.stat(path)
+        self.warm_start = not rebuild and self._read_index(stat)
+        if not self.warm_start:
+            self._build_index(stat)
+        self.load_timings = {"index": time.perf_counter() - start}
+
+        self._file = open(path, "rb")
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, idx: int) -> Dict:
+        if idx < 0:
+            idx += len(self.offsets)
+        self._file.seek(self.offsets[idx])
+        return json.loads(self._file.readline())
+
+    def category(self, idx: int) -> str:
+        return self.categories[self.category_ids[idx]]
+
+    def difficulty(self, idx: int) -> int:
+        return self.difficulties[idx]
+
+    def close(self):
+        self._file.close()
+
+    def _read_index(self, stat) -> bool:
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(INDEX_HEADER.size)
+                magic, version, size, mtime_ns, count, cat_len = INDEX_HEADER.unpack(header)
+                if (magic != INDEX_MAGIC or version != INDEX_VERSION
+                        or size != stat.st_size or mtime_ns != stat.st_mtime_ns):
+                    return False
+
+                categories = json.loads(f.read(cat_len).decode("utf-8"))
+                offsets = array("q")
+                offsets.fromfile(f, count)
+                category_ids = array("H")
+                category_ids.fromfile(f, count)
+                difficulties = array("B")
+                difficulties.fromfile(f, count)
+        except (OSError, struct.error, EOFError, ValueError):
+            return False
+
+        self.categories = categories
+        self.offsets = offsets
+        self.category_ids = category_ids
+        self.difficulties = difficulties
+        return True
+
+    def _build_index(self, stat):
+        self.categories = []
+        self.offsets = array("q")
+        self.category_ids = array("H")
+        self.difficulties = array("B")
+        category_lookup = {}
+
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line_no, line in enumerate(f, start=1):
+                line_offset = offset
+                offset += len(line)
+                if not line.strip():
+                    continue
+
+                try:
+                    q = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Строка {line_no}: ошибка JSON: {e}")
+                validate_question(q, len(self.offsets) + 1)
+
+                category = q.get("category", "Общее")
+                cat_id = category_lookup.get(category)
+                if cat_id is None:
+                    cat_id = category_lookup[category] = len(self.categories)
+                    self.categories.append(category)
+
+                self.offsets.append(line_offset)
+                self.category_ids.append(cat_id)
+                self.difficulties.append(index_difficulty(q))
+
+        self._write_index(stat)
+
+    def _write_index(self, stat):
+        try:
+            write_jsonl_index(self.index_path, stat, self.categories, self.offsets,
+                              self.category_ids, self.difficulties)
+        except OSError:
+            # Индекс - только ускорение, без него банк все равно работает
+            pass
+
+
+def parse_json_questions(raw: bytes) -> List[Dict]:
+    data = json.loads(raw)
+
+    if not isinstance(data, list):
+        raise ValueError("Файл должен содержать список вопросов")
+
+    for i, q in enumerate(data):
+        validate_question(q, i + 1)
+
+    return data
+
+
+def read_json_questions(path: str) -> List[Dict]:
+    with open(path, 'rb') as f:
+        return parse_json_questions(f.read())
+
+
+def cache_path_for(path: str) -> str:
+    return path + ".cache"
+
+
+def read_bank_cache(cache_path: str, digest: bytes) -> Optional[Dict]:
+    try:
+        with open(cache_path, "rb") as f:
+            header = f.read(CACHE_HEADER.size)
+            magic, version, py_major, py_minor, cached_digest = CACHE_HEADER.unpack(header)
+            if (magic != CACHE_MAGIC or version != CACHE_SCHEMA_VERSION
+                    or (py_major, py_minor) != sys.version_info[:2]
+                    or cached_digest != digest):
+                return None
+            return marshal.loads(f.read())
+    except (OSError, struct.error, EOFError, ValueError, TypeError):
+        return None
+
+
+def write_bank_cache(cache_path: str, digest: bytes, columns: Dict):
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_SCHEMA_VERSION,
+                                      sys.version_info[0], sys.version_info[1], digest))
+            marshal.dump(columns, f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, ValueError):
+        # Кэш - только ускорение, без него банк все равно работает
+        pass
+
+
+def load_json_bank(path: str, rebuild: bool = False) -> CompiledQuestionBank:
+    timings = {}
+
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).digest()
+    timings["hash"] = time.perf_counter() - start
+
+    cache_path = cache_path_for(path)
+    columns = None
+    if not rebuild:
+        start = time.perf_counter()
+        columns = read_bank_cache(cache_path, digest)
+        timings["cache"] = time.perf_counter() - start
+
+    warm_start = columns is not None
+    if not warm_start:
+        start = time.perf_counter()
+        columns = compile_questions(parse_json_questions(raw))
+        timings["parse"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        write_bank_cache(cache_path, digest, columns)
+        timings["write_cache"] = time.perf_counter() - start
+
+    bank = CompiledQuestionBank(columns, path)
+    bank.warm_start = warm_start
+    bank.load_timings = timings
+    return bank
+
+
+def format_timings(bank: QuestionBank) -> str:
+    kind = "теплый" if bank.warm_start else "холодный"
+    total = sum(bank.load_timings.values()) * 1000
+    parts = ", ".join(f"{name} {seconds * 1000:.1f} мс" for name, seconds in bank.load_timings.items())
+    return f"{kind} старт: {total:.1f} мс ({parts})"
+
+
+def write_jsonl(questions, dst_path: str):
+    tmp_path = dst_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        for q in questions:
+            f.write(json.dumps(q, ensure_ascii=False))
+            f.write("\n")
+    os.replace(tmp_path, dst_path)
+
+
+def import_json(src_path: str, dst_path: str) -> JsonlQuestionBank:
+    write_jsonl(read_json_questions(src_path), dst_path)
+    return JsonlQuestionBank(dst_path)
+
+
+BACKENDS = {
+    ".json": load_json_bank,
+    ".jsonl": JsonlQuestionBank,
+}
+
+
+def open_bank(path: str, rebuild: bool = False) -> QuestionBank:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Файл '{path}' не найден!")
+
+    ext = os.path.splitext(path)[1].lower()
+    backend = BACKENDS.get(ext)
+    if backend is None:
+        raise ValueError(f"Неизвестный формат банка вопросов: '{ext}'")
+
+    return backend(path, rebuild)
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) == 3 and argv[0] == "import":
+        bank = import_json(argv[1], argv[2])
+        print(f"Импортировано {len(bank)} вопросов в '{argv[2]}'")
+        bank.close()
+        return 0
+
+    if len(argv) == 2 and argv[0] == "compile":
+        cold = open_bank(argv[1], rebuild=True)
+        print(f"{len(cold)} вопросов, {format_timings(cold)}")
+        cold.close()
+        warm = open_bank(argv[1])
+        print(f"{len(warm)} вопросов, {format_timings(warm)}")
+        warm.close()
+        return 0
+
+    print("Использование:\n"
+          "  python question_bank.py import questions.json questions.jsonl\n"
+          "  python question_bank.py compile questions.json")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
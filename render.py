@@ -0,0 +1,110 @@
+import tkinter as tk
+from typing import Dict, Optional
+
+
+TEXT_CONTENT = "content"
+
+
+class WidgetRenderer:
+    # Хранит последнее отрисованное состояние каждого виджета и раз в кадр
+    # (через after_idle) отправляет в Tk только изменившиеся атрибуты
+    def __init__(self, root):
+        self.root = root
+        self.rendered: Dict[object, Dict] = {}
+        self.pending: Dict[object, Dict] = {}
+        self._flush_id = None
+
+        self.tk_calls = 0
+        self.frames = 0
+        self.transition_name: Optional[str] = None
+        self.transition_calls: Dict[str, int] = {}
+        self.transition_counts: Dict[str, int] = {}
+
+    def begin(self, name: str):
+        # Вложенные переходы (например, первый тик таймера внутри load_question)
+        # учитываются в том переходе, который открыл кадр
+        if self.transition_name is not None and self._flush_id is not None:
+            return
+        self.transition_name = name
+        self.transition_counts[name] = self.transition_counts.get(name, 0) + 1
+
+    def update(self, widget, **attrs):
+        rendered = self.rendered.get(widget, {})
+        pending = self.pending.get(widget)
+
+        for key, value in attrs.items():
+            if pending is not None and key in pending:
+                if rendered.get(key, _MISSING) == value:
+                    del pending[key]
+                else:
+                    pending[key] = value
+            elif rendered.get(key, _MISSING) != value:
+                if pending is None:
+                    pending = self.pending[widget] = {}
+                pending[key] = value
+
+        if self.pending and self._flush_id is None:
+            self._flush_id = self.root.after_idle(self.flush)
+
+    def set_text(self, widget, content: str):
+        self.update(widget, **{TEXT_CONTENT: content})
+
+    def get(self, widget, key: str, default=None):
+        pending = self.pending.get(widget)
+        if pending is not None and key in pending:
+            return pending[key]
+        return self.rendered.get(widget, {}).get(key, default)
+
+    def flush(self):
+        self._flush_id = None
+        pending, self.pending = self.pending, {}
+        calls = 0
+
+        for widget, changes in pending.items():
+            if not changes:
+                continue
+
+            rendered = self.rendered.setdefault(widget, {})
+            content = changes.pop(TEXT_CONTENT, _MISSING)
+
+            if changes:
+                widget.config(**changes)
+                calls += 1
+
+            if content is not _MISSING:
+                state = changes.get("state", rendered.get("state", "disabled"))
+                widget.config(state="normal")
+                widget.delete(1.0, tk.END)
+                widget.insert(1.0, content)
+                widget.config(state=state)
+                calls += 4
+                changes[TEXT_CONTENT] = content
+
+            rendered.update(changes)
+
+        if calls:
+            self.frames += 1
+            self.tk_calls += calls
+            if self.transition_name is not None:
+                self.transition_calls[self.transition_name] = (
+                    self.transition_calls.get(self.transition_name, 0) + calls)
+        self.transition_name = None
+
+    def stats(self) -> Dict:
+        per_transition = {
+            name: self.transition_calls.get(name, 0) / count
+            for name, count in self.transition_counts.items()
+        }
+        return {
+            "tk_calls": self.tk_calls,
+            "frames": self.frames,
+            "calls_per_transition": per_transition,
+        }
+
+
+class _Missing:
+    def __repr__(self):
+        return "<missing>"
+
+
+_MISSING = _Missing()
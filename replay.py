@@ -0,0 +1,240 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from adaptive import AdaptiveSampler
+from engine import QuizEngine, Transition
+from sampler import QuestionSampler
+
+
+RECORDING_VERSION = 1
+DEFAULT_RECORD_DIR = "recordings"
+RECORDED_METHODS = ("start", "load_question", "next_question", "answer", "skip", "hint",
+                    "tick", "finish")
+# Имя метода движка -> событие QuizEngine.dispatch
+METHOD_EVENTS = {"load_question": "load", "next_question": "next"}
+
+
+class SessionRecorder:
+    # Записывает входы движка (метод, аргумент, момент по часам движка) и их
+    # результат. Вместе с зерном сессии этого достаточно, чтобы повторить игру:
+    # весь случайный выбор идет через ГПСЧ движка и выборщика, засеянные этим зерном
+    def __init__(self, directory: str = DEFAULT_RECORD_DIR, bank_name: str = "",
+                 adaptive: bool = False):
+        self.directory = directory
+        self.bank_name = bank_name
+        self.adaptive = adaptive
+        self.sessions = 0
+        self.events = 0
+        self._file = None
+        self._origin = 0.0
+        self._depth = 0
+        self.engine: Optional[QuizEngine] = None
+
+    def attach(self, engine: QuizEngine) -> "SessionRecorder":
+        # Подменяем методы только у этого движка; вложенные вызовы
+        # (next_question -> load_question) пишутся одним событием
+        self.engine = engine
+        for name in RECORDED_METHODS:
+            setattr(engine, name, self._wrap(name, getattr(engine, name)))
+        return self
+
+    def _wrap(self, name: str, method):
+        event = METHOD_EVENTS.get(name, name)
+
+        def recorded(arg=None):
+            if self._depth:
+                return method() if arg is None else method(arg)
+            if name == "start":
+                self._open(arg)
+            self._depth += 1
+            try:
+                transition = method() if arg is None else method(arg)
+            finally:
+                self._depth -= 1
+            self._write(event, arg, transition)
+            return transition
+
+        return recorded
+
+    def _open(self, seed: Optional[int]):
+        self.close()
+        engine = self.engine
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"session-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl"
+        self._file = open(os.path.join(self.directory, name), "w", encoding="utf-8")
+        self._origin = engine.clock()
+        self.sessions += 1
+        header = {
+            "version": RECORDING_VERSION,
+            "seed": seed,
+            "bank": self.bank_name,
+            "bank_size": len(engine.bank),
+            "total_questions": engine.total_questions,
+            "question_time": engine.question_time,
+            "adaptive": self.adaptive,
+            "recorded_at": time.time(),
+        }
+        self._file.write(json.dumps(header, ensure_ascii=False) + "\n")
+
+    def _write(self, event: str, arg, transition: Transition):
+        if self._file is None or transition.kind == "ignored":
+            return
+        record = {"t": round(self.engine.clock() - self._origin, 6), "event": event,
+                  "kind": transition.kind, "score": transition.score}
+        if arg is not None:
+            record["arg"] = arg
+        if transition.question_id is not None:
+            record["question_id"] = transition.question_id
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.events += 1
+        if transition.kind == "finished":
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Recording(NamedTuple):
+    path: str
+    header: Dict
+    events: List[Dict]
+
+
+def load_recording(path: str) -> Recording:
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"{path}: неподдерживаемая версия записи {header.get('version')}")
+        events = [json.loads(line) for line in f if line.strip()]
+    return Recording(path, header, events)
+
+
+class ReplayResult(NamedTuple):
+    path: str
+    events: int
+    score: int
+    mismatches: List[str]
+
+
+class ReplayClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def replay(recording: Recording, bank, realtime: bool = False, speed: float = 1.0) -> ReplayResult:
+    # Прогоняет записанные входы через свежий движок с тем же зерном. Часы движка
+    # подставляются из записи, поэтому время ответа и очки совпадают побитно;
+    # с realtime события идут с записанными паузами (ускоренными в speed раз)
+    header = recording.header
+    seed = header["seed"]
+    sampler_class = AdaptiveSampler if header.get("adaptive") else QuestionSampler
+    sampler = sampler_class(bank, seed)
+    clock = ReplayClock()
+    engine = QuizEngine(bank, sampler, total_questions=header["total_questions"],
+                        question_time=header["question_time"], seed=seed, clock=clock)
+    if header.get("adaptive"):
+        sampler.attach(engine)
+
+    mismatches: List[str] = []
+    started = time.perf_counter()
+    for number, record in enumerate(recording.events, 1):
+        clock.now = record["t"]
+        if realtime:
+            delay = started + record["t"] / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        transition = engine.dispatch(record["event"], record.get("arg"))
+        if (transition.kind, transition.score, transition.question_id) != \
+                (record["kind"], record["score"], record.get("question_id")):
+            mismatches.append(
+                f"событие {number} ({record['event']}): записано {record['kind']}, "
+                f"счет {record['score']}, вопрос {record.get('question_id')}; "
+                f"получено {transition.kind}, счет {transition.score}, "
+                f"вопрос {transition.question_id}")
+            break
+
+    return ReplayResult(recording.path, len(recording.events), engine.score, mismatches)
+
+
+def recording_paths(patterns: Iterable[str]) -> List[str]:
+    paths: List[str] = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.jsonl")
+        paths.extend(sorted(glob.glob(pattern)))
+    return paths
+
+
+def _replay_files(bank_path: str, paths: List[str], realtime: bool, speed: float) -> List[ReplayResult]:
+    from question_bank import open_bank
+    bank = open_bank(bank_path)
+    try:
+        return [replay(load_recording(path), bank, realtime, speed) for path in paths]
+    finally:
+        bank.close()
+
+
+def replay_parallel(bank_path: str, paths: List[str], workers: int, realtime: bool = False,
+                    speed: float = 1.0) -> List[ReplayResult]:
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = [paths[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(workers) as pool:
+        results = pool.map(_replay_files, [bank_path] * workers, chunks,
+                           [realtime] * workers, [speed] * workers)
+    return [result for chunk in results for result in chunk]
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Воспроизведение записанных игровых сессий")
+    parser.add_argument("questions", help="банк вопросов, на котором записаны сессии")
+    parser.add_argument("recordings", nargs="+", help="файлы записей, маски или каталоги")
+    parser.add_argument("--realtime", action="store_true",
+                        help="выдерживать записанные паузы между событиями")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="ускорение для --realtime")
+    parser.add_argument("--workers", type=int, default=1, help="число процессов")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    paths = recording_paths(args.recordings)
+    if not paths:
+        print("Записи не найдены")
+        return 2
+
+    start = time.perf_counter()
+    if args.workers > 1:
+        results = replay_parallel(args.questions, paths, args.workers, args.realtime, args.speed)
+    else:
+        results = _replay_files(args.questions, paths, args.realtime, args.speed)
+    elapsed = time.perf_counter() - start
+
+    events = sum(result.events for result in results)
+    failed = [result for result in results if result.mismatches]
+    print(f"Воспроизведено {len(results)} сессий, {events} событий за {elapsed:.2f} с "
+          f"({len(results) / elapsed:,.0f} сессий/с, {events / elapsed:,.0f} событий/с)")
+    for result in failed[:10]:
+        print(f"  {result.path}: {result.mismatches[0]}")
+    if failed:
+        print(f"Расхождения в {len(failed)} сессиях")
+        return 1
+    print("Расхождений нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
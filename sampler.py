@@ -0,0 +1,132 @@
+import random
+from array import array
+from collections import deque
+from typing import Dict, Optional, Sequence, Tuple
+
+
+class LazyPermutation:
+    # Fisher-Yates, у которого хранятся только переставленные позиции:
+    # создание O(1), каждое вытягивание O(1), память растет только с числом вытянутых
+    def __init__(self, size: int, rng: random.Random, items: Optional[Sequence[int]] = None):
+        self.remaining = size
+        self.rng = rng
+        self.items = items
+        self.swaps: Dict[int, int] = {}
+
+    def draw(self) -> Optional[int]:
+        if self.remaining <= 0:
+            return None
+
+        j = self.rng.randrange(self.remaining)
+        self.remaining -= 1
+        last = self.remaining
+
+        pos = self.swaps.pop(j, j)
+        if j != last:
+            self.swaps[j] = self.swaps.pop(last, last)
+
+        return pos if self.items is None else self.items[pos]
+
+
+class QuestionSampler:
+    def __init__(self, bank, seed: Optional[int] = None):
+        self.bank = bank
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.used = set()
+        self._buckets: Optional[Dict[Tuple, array]] = None
+        self.reset()
+
+    def reset(self, seed: Optional[int] = None):
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed)
+        self.used.clear()
+        self._pool = LazyPermutation(len(self.bank), self.rng)
+        self._bucket_pools: Dict[Tuple, LazyPermutation] = {}
+        self._lookahead = deque()
+
+    def rebind(self, bank, remap: Sequence[int], runs=None):
+        # Банк заменен на новую версию: remap[старый номер] -> новый номер или -1,
+        # если вопрос удален; runs - отрезки из ReloadResult, если они известны.
+        # Множество used меняется на месте, на него есть ссылки
+        used = {remap[idx] for idx in self.used if idx < len(remap) and remap[idx] >= 0}
+        lookahead = [remap[idx] for idx in self._lookahead if idx < len(remap) and remap[idx] >= 0]
+        self.bank = bank
+        self._buckets = None
+        self.used.clear()
+        self.used.update(used)
+        # Новый пул снова содержит уже заданные вопросы, draw() пропустит их по used
+        self._pool = LazyPermutation(len(bank), self.rng)
+        self._bucket_pools = {}
+        self._lookahead = deque(lookahead)
+
+    @property
+    def remaining(self) -> int:
+        return len(self.bank) - len(self.used)
+
+    def draw(self, category: Optional[str] = None,
+             difficulty: Optional[int] = None) -> Optional[int]:
+        if category is None and difficulty is None:
+            while self._lookahead:
+                idx = self._lookahead.popleft()
+                if idx not in self.used:
+                    self.used.add(idx)
+                    return idx
+            pool = self._pool
+        else:
+            pool = self._bucket_pool((category, difficulty))
+            if pool is None:
+                return None
+
+        while True:
+            idx = pool.draw()
+            if idx is None:
+                return None
+            # Индекс мог уже выйти из другого пула (общего или соседней корзины)
+            if idx not in self.used:
+                self.used.add(idx)
+                return idx
+
+    def peek(self, count: int):
+        while len(self._lookahead) < count:
+            idx = self._pool.draw()
+            if idx is None:
+                break
+            if idx not in self.used:
+                self._lookahead.append(idx)
+        return [idx for idx in self._lookahead if idx not in self.used][:count]
+
+    def mark_used(self, idx: int):
+        self.used.add(idx)
+
+    def bucket_size(self, category: Optional[str] = None,
+                    difficulty: Optional[int] = None) -> int:
+        if category is None and difficulty is None:
+            return len(self.bank)
+        return len(self._get_buckets().get((category, difficulty), ()))
+
+    def _bucket_pool(self, key: Tuple) -> Optional[LazyPermutation]:
+        pool = self._bucket_pools.get(key)
+        if pool is None:
+            items = self._get_buckets().get(key)
+            if items is None:
+                return None
+            pool = self._bucket_pools[key] = LazyPermutation(len(items), self.rng, items)
+        return pool
+
+    def _get_buckets(self) -> Dict[Tuple, array]:
+        if self._buckets is None:
+            # Корзины строятся один раз на банк: (категория, сложность),
+            # а также только по категории и только по сложности
+            buckets: Dict[Tuple, array] = {}
+            for idx in range(len(self.bank)):
+                category = self.bank.category(idx)
+                difficulty = self.bank.difficulty(idx)
+                for key in ((category, difficulty), (category, None), (None, difficulty)):
+                    bucket = buckets.get(key)
+                    if bucket is None:
+                        bucket = buckets[key] = array("I")
+                    bucket.append(idx)
+            self._buckets = buckets
+        return self._buckets
@@ -0,0 +1,256 @@
+import argparse
+import functools
+import re
+import sys
+import time
+import zlib
+from array import array
+from typing import Dict, List, Optional, Set
+
+from question_bank import open_bank
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+TOKEN_RE = re.compile(r"\w+")
+STOP_WORDS = frozenset(
+    "в во на и или не ни по с со к ко о об от до из за для под над при у же ли а но "
+    "что как какой какая какое какие каким какого это этот эта эти тот та те был была было "
+    "были есть the a an of in on is are what which who".split()
+)
+# Падежные окончания от длинных к коротким: отрезаем одно, если от слова остается
+# хотя бы 3 буквы. Глагольные окончания не трогаем, иначе "планет" и "планеты" разойдутся
+SUFFIXES = frozenset(
+    "иями ями ами иях ией ого его ыми ими ой ей ий ый ая яя ое ее ые ие ов ев "
+    "ам ям ах ях ом ем ую юю а я о е ы и у ю ь й".split())
+SUFFIX_LENGTHS = sorted({len(suffix) for suffix in SUFFIXES}, reverse=True)
+MIN_STEM = 3
+STEM_CACHE_SIZE = 1 << 18
+
+NUM_PERM = 64
+BANDS = 16
+DUPLICATE_THRESHOLD = 0.6
+CHUNK_QUESTIONS = 20_000
+
+
+@functools.lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word: str) -> str:
+    if not ("а" <= word[0] <= "я"):
+        return word
+    for length in SUFFIX_LENGTHS:
+        if len(word) - length >= MIN_STEM and word[-length:] in SUFFIXES:
+            return word[:-length]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    text = text.lower().replace("ё", "е")
+    return [stem(word) for word in TOKEN_RE.findall(text) if word not in STOP_WORDS]
+
+
+def question_tokens(q: Dict) -> Set[str]:
+    return set(tokenize(q.get("question", "")))
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class InvertedIndex:
+    # Токен -> отсортированный массив номеров вопросов, где он встречается
+    # в тексте вопроса или в вариантах ответа
+    def __init__(self, bank):
+        self.bank = bank
+        self.postings: Dict[str, array] = {}
+        self.by_category: Dict[str, array] = {}
+
+        for idx in range(len(bank)):
+            q = bank[idx]
+            answers = q.get("answers")
+            text = q["question"]
+            if isinstance(answers, list):
+                text = " ".join([text, *(str(answer) for answer in answers)])
+            for token in set(tokenize(text)):
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = array("I")
+                postings.append(idx)
+
+            category = bank.category(idx)
+            ids = self.by_category.get(category)
+            if ids is None:
+                ids = self.by_category[category] = array("I")
+            ids.append(idx)
+
+    def search(self, query: str, category: Optional[str] = None,
+               limit: Optional[int] = None) -> List[int]:
+        # Все слова запроса должны встретиться; пересекаем начиная с самого редкого
+        lists = [self.postings.get(token) for token in set(tokenize(query))]
+        if category is not None:
+            lists.append(self.by_category.get(category))
+        if not lists or any(ids is None for ids in lists):
+            return []
+
+        lists.sort(key=len)
+        result = set(lists[0])
+        for ids in lists[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        result = sorted(result)
+        return result[:limit] if limit else result
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while x != root:
+            parent[x], x = root, parent.get(x, x)
+        return root
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent.setdefault(ra, ra)
+            self.parent.setdefault(rb, rb)
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def minhash_params(num_perm: int = NUM_PERM, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash_signatures(token_sets: List[Set[str]], a, b):
+    # Хеширование multiply-shift: (a * x + b) >> 32 по модулю 2^64, сразу для всех
+    # токенов пачки; минимум по каждому вопросу - через reduceat
+    lengths = np.fromiter((max(1, len(tokens)) for tokens in token_sets), dtype=np.int64,
+                          count=len(token_sets))
+    hashes = np.fromiter((zlib.crc32(token.encode("utf-8"))
+                          for tokens in token_sets for token in (tokens or ("",))),
+                         dtype=np.uint64, count=int(lengths.sum()))
+    starts = np.zeros(len(token_sets), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+
+    with np.errstate(over="ignore"):
+        values = (a[:, None] * hashes[None, :] + b[:, None]) >> np.uint64(32)
+    return np.minimum.reduceat(values, starts, axis=1).T.astype(np.uint32)
+
+
+def find_duplicates(bank, threshold: float = DUPLICATE_THRESHOLD,
+                    num_perm: int = NUM_PERM, bands: int = BANDS) -> List[List[int]]:
+    # MinHash + LSH: вопросы с похожими наборами слов попадают в общую корзину
+    # хотя бы в одной полосе сигнатуры; кандидаты проверяются точным Жаккаром
+    n = len(bank)
+    a, b = minhash_params(num_perm)
+    rows = num_perm // bands
+    signatures = np.empty((n, num_perm), dtype=np.uint32)
+    for start in range(0, n, CHUNK_QUESTIONS):
+        stop = min(n, start + CHUNK_QUESTIONS)
+        token_sets = [question_tokens(bank[idx]) for idx in range(start, stop)]
+        signatures[start:stop] = minhash_signatures(token_sets, a, b)
+
+    clusters = UnionFind()
+    # Токены нужны только кандидатам, а их обычно немного
+    token_cache: Dict[int, Set[str]] = {}
+
+    def tokens_of(idx: int) -> Set[str]:
+        tokens = token_cache.get(idx)
+        if tokens is None:
+            tokens = token_cache[idx] = question_tokens(bank[idx])
+        return tokens
+
+    mix = np.array([0x9E3779B97F4A7C15 * (2 * k + 1) % 2 ** 64 for k in range(rows)],
+                   dtype=np.uint64)
+    for band in range(bands):
+        # Строки полосы сворачиваем в один uint64; случайные совпадения отсеет проверка
+        band_rows = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        with np.errstate(over="ignore"):
+            keys = (band_rows * mix).sum(axis=1, dtype=np.uint64)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, n])
+        for start, size in zip(starts[sizes > 1].tolist(), sizes[sizes > 1].tolist()):
+            group = order[start:start + size].tolist()
+            # Каждого сравниваем с первым в корзине: линейно даже для больших корзин
+            first = group[0]
+            for idx in group[1:]:
+                if clusters.find(idx) != clusters.find(first) and \
+                        jaccard(tokens_of(first), tokens_of(idx)) >= threshold:
+                    clusters.union(first, idx)
+
+    groups: Dict[int, List[int]] = {}
+    for idx in list(clusters.parent):
+        groups.setdefault(clusters.find(idx), []).append(idx)
+    return sorted((sorted(members) for members in groups.values()), key=lambda g: (-len(g), g[0]))
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Поиск по банку вопросов и поиск дубликатов")
+    parser.add_argument("questions", help="банк вопросов (.json или .jsonl)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dupes = commands.add_parser("dupes", help="найти группы почти одинаковых вопросов")
+    dupes.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD,
+                       help="минимальное сходство Жаккара по словам вопроса")
+    dupes.add_argument("--limit", type=int, default=0, help="сколько групп показать (0 - все)")
+
+    find = commands.add_parser("find", help="найти вопросы по словам и/или категории")
+    find.add_argument("query", nargs="?", default="", help="слова запроса")
+    find.add_argument("--category", default=None)
+    find.add_argument("--limit", type=int, default=20)
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    bank = open_bank(args.questions)
+
+    start = time.perf_counter()
+    if args.command == "dupes":
+        if np is None:
+            print("Для поиска дубликатов нужен NumPy: pip install numpy")
+            return 1
+        groups = find_duplicates(bank, args.threshold)
+        elapsed = time.perf_counter() - start
+        shown = groups[:args.limit] if args.limit else groups
+        for number, group in enumerate(shown, 1):
+            print(f"Группа {number} ({len(group)} вопросов):")
+            for idx in group:
+                print(f"  [{idx}] {bank[idx]['question']}")
+        print(f"Найдено групп: {len(groups)}, вопросов в них: {sum(map(len, groups))} "
+              f"({len(bank)} вопросов за {elapsed:.2f} с)")
+        return 0
+
+    index = InvertedIndex(bank)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    if args.query:
+        ids = index.search(args.query, args.category)
+    else:
+        ids = list(index.by_category.get(args.category, ())) if args.category else []
+    elapsed = time.perf_counter() - start
+
+    for idx in ids[:args.limit]:
+        q = bank[idx]
+        print(f"[{idx}] ({bank.category(idx)}) {q['question']}")
+    print(f"Найдено: {len(ids)} (индекс {built:.2f} с, поиск {elapsed * 1000:.2f} мс)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,348 @@
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, List, Optional
+
+from answer_log import AnswerLogWriter, AnswerLogger
+from engine import QuizEngine, TOTAL_QUESTIONS, QUESTION_TIME
+from question_bank import open_bank
+from sampler import QuestionSampler
+
+
+RESULTS_PAUSE = 3.0
+MAX_WRITE_BUFFER = 1024 * 1024
+
+
+def encode(message: Dict) -> bytes:
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class Player:
+    def __init__(self, name: str, writer: asyncio.StreamWriter, engine: QuizEngine):
+        self.name = name
+        self.writer = writer
+        self.engine = engine
+        self.choice: Optional[int] = None
+
+    def send(self, message: Dict):
+        self.send_raw(encode(message))
+
+    def send_raw(self, data: bytes):
+        if self.writer.is_closing():
+            return
+        # Медленный клиент не должен раздувать память сервера
+        if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.writer.close()
+            return
+        self.writer.write(data)
+
+
+class Room:
+    def __init__(self, server: "QuizServer", name: str):
+        self.server = server
+        self.name = name
+        self.players: Dict[str, Player] = {}
+        self.sampler = QuestionSampler(server.bank, server.seed)
+        self.state = "lobby"
+        self.question_number = 0
+        self.question_id: Optional[int] = None
+        self.question: Optional[Dict] = None
+        self.pending_answers = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def add(self, player: Player):
+        self.players[player.name] = player
+        self.broadcast({"type": "joined", "room": self.name, "players": sorted(self.players)})
+
+        if self.state == "question":
+            player.engine.start()
+            player.engine.show(self.question, self.question_id)
+            player.send(self.question_message())
+            self.pending_answers += 1
+        elif self.state == "lobby" and len(self.players) >= self.server.autostart > 0:
+            self.start()
+
+    def remove(self, name: str):
+        player = self.players.pop(name, None)
+        if player is None:
+            return
+        if self.state == "question" and player.engine.phase == "question":
+            self.pending_answers -= 1
+            self._check_round_complete()
+        if not self.players:
+            self.close()
+
+    def close(self):
+        self._cancel_timer()
+        self.state = "closed"
+        self.server.rooms.pop(self.name, None)
+
+    def broadcast(self, message: Dict):
+        data = encode(message)
+        for player in list(self.players.values()):
+            player.send_raw(data)
+
+    def start(self):
+        if self.state not in ("lobby", "finished"):
+            return
+        self.sampler.reset()
+        self.question_number = 0
+        for player in self.players.values():
+            player.engine.start()
+        self.next_question()
+
+    def next_question(self):
+        self._cancel_timer()
+        if self.state == "closed":
+            return
+
+        if self.question_number >= self.server.total_questions:
+            self.finish()
+            return
+
+        idx = self.sampler.draw()
+        if idx is None:
+            self.finish("Все вопросы закончились!")
+            return
+
+        self.question_number += 1
+        self.question_id = idx
+        self.question = self.server.bank[idx]
+        self.state = "question"
+        self.pending_answers = len(self.players)
+
+        for player in self.players.values():
+            player.choice = None
+            player.engine.show(self.question, idx)
+
+        self.broadcast(self.question_message())
+        self._timer = self.server.loop.call_later(self.server.question_time, self.time_up)
+
+    def question_message(self) -> Dict:
+        return {
+            "type": "question",
+            "number": self.question_number,
+            "total": self.server.total_questions,
+            "question_id": self.question_id,
+            "question": self.question["question"],
+            "answers": self.question["answers"],
+            "category": self.question.get("category", "Общее"),
+            "difficulty": self.question.get("difficulty", 1),
+            "time_left": self.server.question_time,
+        }
+
+    def handle(self, player: Player, message: Dict):
+        kind = message.get("type")
+
+        if kind == "start":
+            self.start()
+            return
+
+        if self.state != "question":
+            player.send({"type": "error", "message": "Сейчас нет активного вопроса"})
+            return
+
+        number = message.get("number")
+        if number is not None and number != self.question_number:
+            player.send({"type": "answer_result", "seq": message.get("seq"), "kind": "ignored",
+                         "points": 0, "score": player.engine.score})
+            return
+
+        if kind == "answer":
+            choice = message.get("choice")
+            # bool - подкласс int, но True не номер ответа
+            if (not isinstance(choice, int) or isinstance(choice, bool)
+                    or not 0 <= choice < len(self.question["answers"])):
+                player.send({"type": "error", "message": f"'choice' должен быть числом "
+                                                         f"от 0 до {len(self.question['answers']) - 1}"})
+                return
+            transition = player.engine.answer(choice)
+            if transition.kind != "ignored":
+                player.choice = choice
+            self._reply(player, message, transition)
+        elif kind == "skip":
+            self._reply(player, message, player.engine.skip())
+        elif kind == "hint":
+            transition = player.engine.hint()
+            player.send({"type": "hint", "seq": message.get("seq"), "removed": transition.removed,
+                         "score": player.engine.score, "ignored": transition.kind == "ignored"})
+        else:
+            player.send({"type": "error", "message": f"Неизвестное сообщение: {kind}"})
+
+    def _reply(self, player: Player, message: Dict, transition):
+        player.send({
+            "type": "answer_result",
+            "seq": message.get("seq"),
+            "kind": transition.kind,
+            "points": transition.points,
+            "score": player.engine.score,
+        })
+        if transition.kind != "ignored":
+            self.pending_answers -= 1
+            self._check_round_complete()
+
+    def _check_round_complete(self):
+        if self.state == "question" and self.pending_answers <= 0:
+            self.end_round()
+
+    def time_up(self):
+        self._timer = None
+        for player in self.players.values():
+            transition = player.engine.tick(player.engine.time_left)
+            if transition.kind == "timeout":
+                player.send({"type": "answer_result", "seq": None, "kind": "timeout",
+                             "points": 0, "score": player.engine.score})
+        self.end_round()
+
+    def end_round(self):
+        self._cancel_timer()
+        self.state = "results"
+
+        counts = [0, 0, 0, 0]
+        for player in self.players.values():
+            if player.choice is not None and 0 <= player.choice < 4:
+                counts[player.choice] += 1
+
+        self.broadcast({
+            "type": "results",
+            "number": self.question_number,
+            "correct": self.question["correct"],
+            "counts": counts,
+            "scores": self.scores(),
+        })
+        self._timer = self.server.loop.call_later(self.server.results_pause, self.next_question)
+
+    def finish(self, message: Optional[str] = None):
+        self._cancel_timer()
+        self.state = "finished"
+        for player in self.players.values():
+            player.engine.finish(message)
+        self.broadcast({"type": "finished", "message": message or "Игра завершена!",
+                        "scores": self.scores()})
+
+    def scores(self) -> Dict[str, int]:
+        return {name: p.engine.score for name, p in self.players.items()}
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+class QuizServer:
+    def __init__(self, bank, total_questions: int = TOTAL_QUESTIONS,
+                 question_time: float = QUESTION_TIME, results_pause: float = RESULTS_PAUSE,
+                 autostart: int = 0, seed: Optional[int] = None,
+                 answer_log: Optional[AnswerLogWriter] = None):
+        self.bank = bank
+        self.total_questions = total_questions
+        self.question_time = question_time
+        self.results_pause = results_pause
+        self.autostart = autostart
+        self.seed = seed
+        self.answer_log = answer_log
+        self.rooms: Dict[str, Room] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.sessions = 0
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        self.loop = asyncio.get_running_loop()
+        return await asyncio.start_server(self.handle_client, host, port, limit=64 * 1024)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        player: Optional[Player] = None
+        room: Optional[Room] = None
+        self.sessions += 1
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("ожидался JSON-объект")
+                except ValueError as e:
+                    writer.write(encode({"type": "error", "message": f"Ошибка формата: {e}"}))
+                    continue
+
+                # Сбой при обработке одного сообщения не должен обрывать соединение игрока
+                try:
+                    if player is None:
+                        if message.get("type") != "join":
+                            writer.write(encode({"type": "error", "message": "Сначала отправьте join"}))
+                            continue
+                        room_name = str(message.get("room", "default"))
+                        room = self.rooms.get(room_name)
+                        if room is None:
+                            room = self.rooms[room_name] = Room(self, room_name)
+                        name = str(message.get("name") or f"player{self.sessions}")
+                        if name in room.players:
+                            name = f"{name}#{self.sessions}"
+                        engine = QuizEngine(self.bank, QuestionSampler(self.bank),
+                                            self.total_questions, int(self.question_time), self.seed)
+                        if self.answer_log is not None:
+                            AnswerLogger(self.answer_log).attach(engine)
+                        player = Player(name, writer, engine)
+                        player.send({"type": "welcome", "name": name, "room": room_name})
+                        room.add(player)
+                        continue
+
+                    room.handle(player, message)
+                except Exception as e:
+                    sender = player.name if player is not None else "нового игрока"
+                    print(f"[ERROR] Сообщение {message.get('type')!r} от {sender}: {e!r}",
+                          file=sys.stderr)
+                    writer.write(encode({"type": "error", "message": f"Сообщение не обработано: {e}"}))
+
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            if room is not None and player is not None:
+                room.remove(player.name)
+            writer.close()
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Сервер Умного Квиза (JSON lines по TCP)")
+    parser.add_argument("questions", help="файл банка вопросов (.json или .jsonl)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--questions-per-game", type=int, default=TOTAL_QUESTIONS)
+    parser.add_argument("--question-time", type=float, default=QUESTION_TIME)
+    parser.add_argument("--results-pause", type=float, default=RESULTS_PAUSE)
+    parser.add_argument("--autostart", type=int, default=0,
+                        help="начинать игру, когда в комнате столько игроков (0 - по команде start)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--answer-log", default=None, help="каталог журнала ответов")
+    return parser.parse_args(argv)
+
+
+async def serve(args):
+    bank = open_bank(args.questions)
+    answer_log = AnswerLogWriter(args.answer_log) if args.answer_log else None
+    server = QuizServer(bank, args.questions_per_game, args.question_time,
+                        args.results_pause, args.autostart, args.seed, answer_log)
+    tcp_server = await server.start(args.host, args.port)
+    print(f"Сервер квиза слушает {args.host}:{args.port}, вопросов в банке: {len(bank)}")
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        if answer_log is not None:
+            answer_log.close()
+
+
+def main(argv: List[str]) -> int:
+    try:
+        asyncio.run(serve(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,58 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import heapq
+from types import SimpleNamespace
+
+import pytest
+
+
+class StubTkWidget:
+    def __init__(self, *args, **kwargs):
+        self.destroyed = False
+
+    def destroy(self):
+        self.destroyed = True
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class VirtualRoot:
+    # Цикл событий Tk на виртуальных часах: after() срабатывает в свой момент run()
+    def __init__(self):
+        self.now = 0.0
+        self._timers = []
+        self._cancelled = set()
+        self._next_id = 0
+
+    def clock(self) -> float:
+        return self.now
+
+    def after(self, ms, func, *args):
+        self._next_id += 1
+        heapq.heappush(self._timers, (self.now + ms / 1000, self._next_id, func, args))
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        self._cancelled.add(after_id)
+
+    def run(self, seconds: float):
+        until = self.now + seconds
+        while self._timers and self._timers[0][0] <= until:
+            due, after_id, func, args = heapq.heappop(self._timers)
+            if after_id in self._cancelled:
+                continue
+            self.now = max(self.now, due)
+            func(*args)
+        self.now = until
+
+
+@pytest.fixture
+def tk_root(monkeypatch):
+    import overlay
+    monkeypatch.setattr(overlay, "tk", SimpleNamespace(Frame=StubTkWidget, Label=StubTkWidget,
+                                                       Button=StubTkWidget))
+    return VirtualRoot()
@@ -0,0 +1,53 @@
+import answer_log
+from answer_log import (AnswerLogWriter, AnswerLogger, EVENT_ANSWER, NO_CHOICE, question_key,
+                        read_records)
+from analytics import bank_keys, read_stats
+from engine import Transition
+from question_bank import ListQuestionBank
+
+
+def question(i):
+    return {"question": f"Вопрос {i}", "answers": ["a", "b", "c", "d"], "correct": 0}
+
+
+def test_out_of_range_choice_is_logged_as_no_choice(tmp_path):
+    writer = AnswerLogWriter(str(tmp_path))
+    writer.log(b"s" * 16, 0, EVENT_ANSWER, choice=1000)
+    writer.log(b"s" * 16, 0, EVENT_ANSWER, choice=2)
+    writer.close()
+
+    assert [record.choice for record in read_records(str(tmp_path))] == [NO_CHOICE, 2]
+    assert writer.invalid_choices == 1
+
+
+def test_stats_follow_questions_after_insert(tmp_path):
+    old = [question(i) for i in range(3)]
+    writer = AnswerLogWriter(str(tmp_path))
+    logger = AnswerLogger(writer)
+    for idx, q in enumerate(old):
+        for _ in range(idx + 1):
+            logger.on_transition(Transition("correct", question=q, question_id=idx, answer_index=0))
+    writer.close()
+
+    # Новый вопрос в начале банка сдвигает номера остальных
+    new = [question(99)] + old
+    stats = read_stats(str(tmp_path), bank_keys(ListQuestionBank(new)))
+
+    assert list(stats.answers) == [0, 1, 2, 3]
+    assert all(record.question_key == question_key(old[record.question_id])
+               for record in read_records(str(tmp_path)))
+
+
+def test_writers_never_share_a_segment(tmp_path, monkeypatch):
+    first = AnswerLogWriter(str(tmp_path))
+    first.log(b"a" * 16, 0, EVENT_ANSWER, choice=0)
+    first.close()
+
+    # Второй экран выбрал номер сегмента до того, как первый создал файл
+    monkeypatch.setattr(answer_log, "segment_paths", lambda directory: [])
+    second = AnswerLogWriter(str(tmp_path))
+    second.log(b"b" * 16, 1, EVENT_ANSWER, choice=1)
+    second.close()
+    monkeypatch.undo()
+
+    assert sorted(record.session_id[:1] for record in read_records(str(tmp_path))) == [b"a", b"b"]
@@ -0,0 +1,14 @@
+import io
+
+from applog import RingLogger
+
+
+def test_error_is_queued_when_pending_emptied_concurrently():
+    # max_pending=0: очередь "переполнена", но уже пуста, как после разбора потоком вывода
+    stream = io.StringIO()
+    logger = RingLogger(stream=stream, max_pending=0)
+    logger.error("test", "сообщение")
+    logger.close()
+
+    assert "сообщение" in stream.getvalue()
+    assert logger.dropped == {}
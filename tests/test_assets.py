@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+from assets import AssetPack, build_pack
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_get_returns_view_into_pack(tmp_path):
+    image = str(tmp_path / "cat.png")
+    Image.new("RGB", (800, 600), "red").save(image)
+    pack_path = str(tmp_path / "bank.assets")
+    assert build_pack(pack_path, [image]).built == 1
+
+    pack = AssetPack(pack_path)
+    data = pack.get(image)
+    assert isinstance(data, memoryview)
+    assert data.obj is pack._mm
+    assert bytes(data[:2]) == b"P6"
+
+    # Открытый пакет не мешает пересборке, а живой срез - закрытию
+    assert build_pack(pack_path, [image]).reused == 1
+    pack.close()
+    assert bytes(data[:2]) == b"P6"
+    data.release()
+    assert os.path.exists(pack_path)
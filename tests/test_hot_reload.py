@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+import hot_reload
+from adaptive import AdaptiveSampler
+from hot_reload import CHUNK_BYTES, BankReloader, FileChanged
+from question_bank import open_bank
+
+
+FIELDS = ("question", "answers", "correct", "category", "difficulty")
+
+
+def question(i, text=None):
+    return {"question": text or f"Вопрос {i} " + "x" * 100, "answers": ["a", "b", "c", f"d{i}"],
+            "correct": i % 4, "category": f"Категория {i % 5}", "difficulty": 1 + i % 3}
+
+
+def write(path, questions):
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            f.writelines(json.dumps(q, ensure_ascii=False) + "\n" for q in questions)
+        else:
+            json.dump(questions, f, ensure_ascii=False, indent=2)
+
+
+def edit_across_chunk(questions, path):
+    # Последний вопрос, начатый в первом блоке хешей, заканчивается уже во втором
+    with open(path, "rb") as f:
+        raw = f.read()
+    i = max(i for i, q in enumerate(questions)
+            if raw.find(q["question"].encode("utf-8")) < CHUNK_BYTES)
+    return questions[:i] + [question(i, "Исправленный")] + questions[i + 1:]
+
+
+EDITS = {
+    "insert": lambda qs, path: qs[:150] + [question(1000)] + qs[150:],
+    "insert_first": lambda qs, path: [question(1000)] + qs,
+    "delete": lambda qs, path: qs[:100] + qs[101:],
+    "delete_last": lambda qs, path: qs[:-1],
+    "edit_first": lambda qs, path: [question(0, "Исправленный")] + qs[1:],
+    "edit_last": lambda qs, path: qs[:-1] + [question(len(qs) - 1, "Исправленный")],
+    "edit_across_chunk": edit_across_chunk,
+}
+
+
+@pytest.mark.parametrize("ext", ["json", "jsonl"])
+@pytest.mark.parametrize("edit", sorted(EDITS))
+def test_reload_matches_fresh_load(tmp_path, ext, edit):
+    path = str(tmp_path / f"bank.{ext}")
+    old = [question(i) for i in range(300)]
+    write(path, old)
+    bank = open_bank(path)
+    reloader = BankReloader(path, bank)
+    sampler = AdaptiveSampler(bank, seed=1)
+
+    new = EDITS[edit](old, path)
+    write(path, new)
+    result = reloader.reload()
+
+    assert [[result.bank[i][field] for field in FIELDS] for i in range(len(new))] == \
+           [[q[field] for field in FIELDS] for q in new]
+    assert result.parsed == (0 if edit.startswith("delete") else 1)
+    for old_idx, new_idx in enumerate(result.remap):
+        if new_idx >= 0:
+            assert new[new_idx] == old[old_idx]
+        else:
+            assert old[old_idx] not in new
+
+    sampler.rebind(result.bank, result.remap, result.runs)
+    assert sampler._level_items == AdaptiveSampler(open_bank(path, rebuild=True))._level_items
+
+
+def test_jsonl_rewritten_during_reload_is_retried(tmp_path, monkeypatch):
+    path = str(tmp_path / "bank.jsonl")
+    old = [question(i) for i in range(300)]
+    write(path, old)
+    reloader = BankReloader(path, open_bank(path))
+
+    edited = old[:10] + [question(1000)] + old[10:]
+    latest = edited + [question(1001)]
+    write_index = hot_reload.write_jsonl_index
+
+    def rewrite_then_index(*args):
+        # Файл переписан после чтения raw, но до записи индекса
+        write(path, latest)
+        os.utime(path, ns=(1, 1))
+        write_index(*args)
+
+    write(path, edited)
+    monkeypatch.setattr(hot_reload, "write_jsonl_index", rewrite_then_index)
+    with pytest.raises(FileChanged):
+        reloader.reload()
+    monkeypatch.undo()
+
+    result = reloader.reload()
+    assert [result.bank[i]["question"] for i in range(len(latest))] == \
+           [q["question"] for q in latest]
@@ -0,0 +1,48 @@
+import csv
+import json
+
+import pytest
+
+from importer import import_files, iter_json_array_items
+from question_bank import JsonlQuestionBank
+
+
+def test_csv_quoted_newlines_survive_sharding(tmp_path):
+    source = tmp_path / "questions.csv"
+    with open(source, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["question", "answer_a", "answer_b", "answer_c", "answer_d", "correct"])
+        for i in range(200):
+            writer.writerow([f"Строка один {i}\nстрока \"два\"?", "a", "b", "c", "d", "A"])
+        writer.writerow(["Без ответов", "a", "b", "c", "d", "Z"])
+
+    output = str(tmp_path / "bank.jsonl")
+    # 4 процесса - 16 шардов, границы попадают внутрь полей в кавычках
+    imported, errors = import_files([str(source)], output, workers=4)
+
+    assert imported == 200
+    # Ошибка указывает на первую строку записи: заголовок + 200 записей по 2 строки
+    assert [error.split(": ", 1)[0] for error in errors] == [f"{source}:402"]
+    bank = JsonlQuestionBank(output)
+    assert [bank[i]["question"] for i in (0, 199)] == \
+           ['Строка один 0\nстрока "два"?', 'Строка один 199\nстрока "два"?']
+    bank.close()
+
+
+def test_json_must_be_top_level_list(tmp_path):
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps({"questions": [{"question": "q"}], "extra": 1}), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="список вопросов"):
+        list(iter_json_array_items(str(path)))
+
+
+def test_csv_unclosed_quote_is_reported(tmp_path):
+    source = tmp_path / "questions.csv"
+    source.write_text("question,answer_a,answer_b,answer_c,answer_d,correct\n"
+                      '"Без закрывающей кавычки,a,b,c,d,A\nq2,a,b,c,d,A\n', encoding="utf-8")
+
+    imported, errors = import_files([str(source)], str(tmp_path / "bank.jsonl"), workers=2)
+
+    assert imported == 0
+    assert errors == [f"{source}:2: кавычка не закрыта до конца файла"]
@@ -0,0 +1,18 @@
+from kiosk import SharedQuestionBank, compiled_bank, publish_bank
+from question_bank import ListQuestionBank
+
+
+def test_attached_bank_is_read_only():
+    bank = compiled_bank(ListQuestionBank(
+        [{"question": f"Вопрос {i}", "answers": ["a", "b", "c", "d"], "correct": i % 4}
+         for i in range(10)]))
+    shm = publish_bank(bank)
+    try:
+        shared = SharedQuestionBank(shm.name)
+        assert all(column.readonly for column in (shared.text, shared.text_offsets, shared.correct,
+                                                  shared.difficulties, shared.category_ids))
+        assert shared[3] == bank[3]
+        shared.close()
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,20 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from latency import LatencyRecorder, read_export
+
+SCREENS = 8
+SAVES = 5
+
+
+def save_sessions(path):
+    for _ in range(SAVES):
+        LatencyRecorder().save(path)
+
+
+def test_concurrent_saves_keep_every_session(tmp_path):
+    # Экраны киоска сохраняют сессии в один файл одновременно
+    path = str(tmp_path / "latency.json")
+    with ProcessPoolExecutor(SCREENS) as pool:
+        list(pool.map(save_sessions, [path] * SCREENS))
+
+    assert read_export(path)["sessions"] == SCREENS * SAVES
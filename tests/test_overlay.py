@@ -0,0 +1,40 @@
+from overlay import INFO_TIMEOUT_MS, LoopLagMonitor, Overlay
+
+
+def test_time_up_panel_dismisses_itself(tk_root):
+    panels = Overlay(tk_root)
+    timed_out = []
+    panels.show("Время вышло!", "Правильный ответ: a", "warning", tag="time_up",
+                on_timeout=lambda: timed_out.append(True))
+
+    tk_root.run(INFO_TIMEOUT_MS / 1000 - 0.1)
+    assert panels.current is not None
+    tk_root.run(0.2)
+    assert panels.current is None
+    assert panels.timed_out == 1 and timed_out == [True]
+
+
+def test_after_callbacks_run_while_panel_is_open(tk_root):
+    panels = Overlay(tk_root)
+    monitor = LoopLagMonitor(tk_root, clock=tk_root.clock)
+    monitor.start()
+    panels.show("Ошибка", "Что-то пошло не так", "error", timeout_ms=None)
+
+    tk_root.run(3.05)
+
+    assert panels.current is not None
+    assert monitor.samples == 30
+    assert monitor.stalls == 0
+
+
+def test_dismiss_removes_only_tagged_panels(tk_root):
+    panels = Overlay(tk_root)
+    panels.show("Время вышло!", "1", tag="time_up")
+    panels.show("Ошибка", "2", "error", tag="error")
+    panels.show("Время вышло!", "3", tag="time_up")
+
+    panels.dismiss("end_game")
+    assert panels.current.message == "1"
+    panels.dismiss("time_up")
+    assert panels.current.message == "2"
+    assert list(panels.queue) == []
@@ -0,0 +1,47 @@
+import glob
+import random
+
+from adaptive import AdaptiveSampler
+from engine import QuizEngine
+from image_cache import PREFETCH_AHEAD
+from question_bank import ListQuestionBank
+from replay import SessionRecorder, load_recording, replay
+
+
+def question(i):
+    return {"question": f"Вопрос {i}", "answers": ["a", "b", "c", "d"], "correct": i % 4,
+            "difficulty": 1 + i % 5}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_adaptive_game_with_prefetch_replays(tmp_path):
+    bank = ListQuestionBank([question(i) for i in range(300)])
+    clock = FakeClock()
+    sampler = AdaptiveSampler(bank, 7)
+    engine = QuizEngine(bank, sampler, total_questions=20, seed=7, clock=clock)
+    sampler.attach(engine)
+    recorder = SessionRecorder(str(tmp_path), "bank.json", adaptive=True).attach(engine)
+
+    # Как в Main: после старта и после каждого показанного вопроса - peek для предзагрузки
+    player = random.Random(1)
+    engine.start(7)
+    sampler.peek(PREFETCH_AHEAD)
+    transition = engine.load_question()
+    while transition.kind != "finished":
+        sampler.peek(PREFETCH_AHEAD)
+        clock.now += player.uniform(1, 5)
+        engine.answer(player.randrange(4))
+        transition = engine.next_question()
+    recorder.close()
+
+    [path] = glob.glob(str(tmp_path / "*.jsonl"))
+    result = replay(load_recording(path), bank)
+    assert result.mismatches == []
+    assert result.score == engine.score
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+from answer_log import AnswerLogWriter, read_records
+from question_bank import ListQuestionBank
+import server as server_module
+from server import QuizServer
+
+
+QUESTIONS = [{"question": f"Вопрос {i}", "answers": ["a", "b", "c", "d"], "correct": i % 4}
+             for i in range(5)]
+
+
+async def read_until(reader, kind):
+    while True:
+        message = json.loads(await asyncio.wait_for(reader.readline(), 5))
+        if message["type"] == kind:
+            return message
+
+
+async def play_malformed(log_dir):
+    answer_log = AnswerLogWriter(str(log_dir))
+    server = QuizServer(ListQuestionBank(QUESTIONS), total_questions=2, question_time=30,
+                        autostart=1, seed=1, answer_log=answer_log)
+    tcp_server = await server.start("127.0.0.1", 0)
+    port = tcp_server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b'{"type": "join", "name": "bot"}\n')
+        await read_until(reader, "question")
+
+        errors = []
+        for choice in (1000, -1, True, "1", 3.0):
+            writer.write((json.dumps({"type": "answer", "choice": choice}) + "\n").encode())
+            errors.append(await read_until(reader, "error"))
+
+        # Соединение живо, и нормальный ответ принимается
+        writer.write(b'{"type": "answer", "choice": 1}\n')
+        result = await read_until(reader, "answer_result")
+        writer.close()
+        return errors, result
+    finally:
+        tcp_server.close()
+        await tcp_server.wait_closed()
+        answer_log.close()
+
+
+def test_malformed_answer_is_rejected(tmp_path):
+    errors, result = asyncio.run(play_malformed(tmp_path))
+
+    assert len(errors) == 5
+    assert all("choice" in error["message"] for error in errors)
+    assert result["kind"] in ("correct", "incorrect")
+    records = list(read_records(str(tmp_path)))
+    assert [record.choice for record in records] == [1]
+
+
+async def play_failing_message(monkeypatch):
+    handle = server_module.Room.handle
+
+    def failing_handle(room, player, message):
+        if message.get("type") == "boom":
+            raise RuntimeError("сбой")
+        return handle(room, player, message)
+
+    monkeypatch.setattr(server_module.Room, "handle", failing_handle)
+    server = QuizServer(ListQuestionBank(QUESTIONS), total_questions=2, question_time=30,
+                        autostart=1, seed=1)
+    tcp_server = await server.start("127.0.0.1", 0)
+    port = tcp_server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b'{"type": "join", "name": "bot"}\n')
+        await read_until(reader, "question")
+        writer.write(b'{"type": "boom"}\n')
+        error = await read_until(reader, "error")
+        writer.write(b'{"type": "answer", "choice": 1}\n')
+        result = await read_until(reader, "answer_result")
+        writer.close()
+        return error, result
+    finally:
+        tcp_server.close()
+        await tcp_server.wait_closed()
+
+
+def test_failing_message_keeps_connection(monkeypatch):
+    error, result = asyncio.run(play_failing_message(monkeypatch))
+
+    assert "сбой" in error["message"]
+    assert result["kind"] in ("correct", "incorrect")
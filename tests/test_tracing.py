@@ -0,0 +1,38 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "benchmarks"))
+
+from question_bank import ListQuestionBank
+from stubs import make_headless_game
+from tracing import TRACED_METHODS, instrument
+
+
+QUESTIONS = [{"question": f"Вопрос {i}", "answers": ["a", "b", "c", "d"], "correct": i % 4}
+             for i in range(20)]
+
+
+def test_every_traced_callback_is_exported(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    game = make_headless_game(bank=ListQuestionBank(QUESTIONS), seed=1)
+    recorder = instrument(game)
+    try:
+        game.start_new_game()
+        game.load_question()
+        game.show_hint()
+        game.check_answer(game.engine.current_question["correct"])
+        game.next_question()
+        game.skip_question()
+        while game.engine.phase != "finished":
+            game.next_question()
+        game.root.run_idle()
+
+        path = tmp_path / "trace.json"
+        recorder.save(str(path))
+        names = {event["name"] for event in recorder.to_json()["traceEvents"]}
+        assert set(TRACED_METHODS) <= names
+    finally:
+        game.stop_timer()
+        game.answer_log.close()
+        game.leaderboard_writer.close()
@@ -0,0 +1,87 @@
+import math
+import time
+from typing import Callable, Dict, Optional
+
+
+class CountdownTimer:
+    # Обратный отсчет от дедлайна по time.monotonic(): задержки цикла событий
+    # не накапливаются, а метка перерисовывается только при смене секунды
+    def __init__(self, root, on_tick: Callable[[int], None],
+                 clock: Callable[[], float] = time.monotonic):
+        self.root = root
+        self.on_tick = on_tick
+        self.clock = clock
+        self.deadline = 0.0
+        self.running = False
+        self.last_shown: Optional[int] = None
+        self._after_id = None
+        self._expected_at = 0.0
+
+        self.callbacks = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.last_drift = 0.0
+
+    def start(self, duration: float):
+        self.cancel()
+        self.deadline = self.clock() + duration
+        self.running = True
+        self.last_shown = None
+        self._fire()
+
+    def cancel(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        self.running = False
+
+    @property
+    def remaining(self) -> float:
+        if not self.running:
+            return 0.0
+        return max(0.0, self.deadline - self.clock())
+
+    def _schedule(self, remaining: float):
+        # Просыпаемся сразу после следующей границы целой секунды
+        delay = remaining - (math.ceil(remaining) - 1)
+        delay_ms = max(1, int(delay * 1000) + 1)
+        self._expected_at = self.clock() + delay_ms / 1000
+        self._after_id = self.root.after(delay_ms, self._on_after)
+
+    def _on_after(self):
+        self._after_id = None
+        if not self.running:
+            return
+
+        lateness = max(0.0, self.clock() - self._expected_at)
+        self.callbacks += 1
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        self._fire()
+
+    def _fire(self):
+        now = self.clock()
+        remaining = self.deadline - now
+        shown = max(0, math.ceil(remaining))
+
+        if remaining <= 0:
+            self.running = False
+            self.last_drift = now - self.deadline
+        else:
+            self._schedule(remaining)
+
+        if shown != self.last_shown:
+            self.last_shown = shown
+            self.on_tick(shown)
+
+    def stats(self) -> Dict[str, float]:
+        mean = self.total_lateness / self.callbacks if self.callbacks else 0.0
+        return {
+            "callbacks": self.callbacks,
+            "mean_lateness_ms": mean * 1000,
+            "max_lateness_ms": self.max_lateness * 1000,
+            "last_drift_ms": self.last_drift * 1000,
+        }
@@ -0,0 +1,126 @@
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+TRACED_METHODS = ("load_question", "check_answer", "update_timer", "animate_correct_answer",
+                  "show_question_image", "show_hint", "next_question", "time_up", "end_game")
+MAX_EVENTS = 1_000_000
+
+
+class TraceRecorder:
+    # События в формате Chrome Trace Event (chrome://tracing, ui.perfetto.dev)
+    def __init__(self, max_events: int = MAX_EVENTS, clock: Callable[[], int] = time.perf_counter_ns):
+        self.clock = clock
+        self.max_events = max_events
+        self.events: List[Dict] = []
+        self.dropped = 0
+        self.pid = os.getpid()
+        self._origin = clock()
+        self._thread_names: Dict[int, str] = {}
+
+    def _us(self, ns: int) -> float:
+        return (ns - self._origin) / 1000
+
+    def _append(self, event: Dict):
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        event["pid"] = self.pid
+        event["tid"] = tid
+        self.events.append(event)
+
+    def span(self, name: str, start_ns: int, end_ns: int, category: str = "callback",
+             args: Optional[Dict] = None):
+        event = {"name": name, "cat": category, "ph": "X",
+                 "ts": self._us(start_ns), "dur": (end_ns - start_ns) / 1000}
+        if args:
+            event["args"] = args
+        self._append(event)
+
+    def counter(self, name: str, ns: int, **values):
+        self._append({"name": name, "ph": "C", "ts": self._us(ns), "args": values})
+
+    def wrap(self, func: Callable, name: Optional[str] = None, category: str = "callback") -> Callable:
+        name = name or getattr(func, "__name__", repr(func))
+        clock = self.clock
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.span(name, start, clock(), category)
+
+        return traced
+
+    def to_json(self) -> Dict:
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                     "args": {"name": name}} for tid, name in self._thread_names.items()]
+        return {
+            "traceEvents": metadata + self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_events": self.dropped},
+        }
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def trace_after(root, recorder: TraceRecorder):
+    # Оборачивает root.after/after_idle: каждый отложенный вызов становится
+    # спаном, а его опоздание относительно запланированного момента - счетчиком
+    original_after = root.after
+    clock = recorder.clock
+
+    def wrap_callback(func, delay_ms: int):
+        name = getattr(func, "__name__", "callback")
+        expected = clock() + delay_ms * 1_000_000
+
+        def callback(*args):
+            start = clock()
+            late_ms = max(0, start - expected) / 1_000_000
+            recorder.counter("after lateness, ms", start, **{name: late_ms})
+            try:
+                return func(*args)
+            finally:
+                recorder.span(f"after:{name}", start, clock(), "after",
+                              {"delay_ms": delay_ms, "late_ms": round(late_ms, 3)})
+
+        return callback
+
+    def after(ms, func=None, *args):
+        if func is None:
+            return original_after(ms)
+        return original_after(ms, wrap_callback(func, ms), *args)
+
+    def after_idle(func, *args):
+        # Tk.after_idle сам вызывает self.after("idle", ...), поэтому идем в исходный after
+        return original_after("idle", wrap_callback(func, 0), *args)
+
+    root.after = after
+    root.after_idle = after_idle
+
+
+def instrument(game, recorder: Optional[TraceRecorder] = None,
+               methods=TRACED_METHODS) -> TraceRecorder:
+    # Подменяем методы только у этого экземпляра: без --trace код игры не меняется
+    recorder = recorder or TraceRecorder()
+    for name in methods:
+        setattr(game, name, recorder.wrap(getattr(game, name), name))
+    # Таймер создан раньше и держит исходный метод: переводим его на обертку
+    timer = getattr(game, "timer", None)
+    if timer is not None and "update_timer" in methods:
+        timer.on_tick = game.update_timer
+    trace_after(game.root, recorder)
+    return recorder